@@ -0,0 +1,223 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import argparse
+import random
+import string
+
+DEGREE_DISTRIBUTIONS = ('zipf', 'uniform')
+
+# Relation classes matched by the default synonym and antonym regular expressions
+RELATION_CLASSES = ('syn', 'associated', 'broader', 'contrast', 'contrast-manual')
+
+# Share of the related terms of a wordpack taken from the relations of another base term
+AMBIGUOUS_SHARE = 0.2
+
+def generate_words(count:int, seed:int=0):
+    '''
+    Generates a deterministic list of distinct lowercase words
+
+    Arguments:
+        count {int} -- Number of words to generate
+        seed {int} -- Seed of the random number generator
+
+    Returns:
+        list -- The generated words
+    '''
+    rng = random.Random(seed)
+    words = {}
+    while len(words) < count:
+        word = ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 10)))
+        words[word] = None
+
+    return list(words)
+
+def generate_relations(fh, words:list, mean_degree:float=8.0, distribution:str='zipf', seed:int=0,
+                relations:dict=None):
+    '''
+    Writes a word relations file in the format expected by the default regular expressions, e.g.
+
+    #word[syn=0.5]:other|words;[syn-score]:9.10|6.50;[contrast=0.5]:opposite;[contrast-score]:8.75;
+
+    Arguments:
+        fh {file} -- File object the relations are written to
+        words {list} -- The vocabulary
+        mean_degree {float} -- Average number of related words listed on each line
+        distribution {str} -- Distribution of the number of related words per line: zipf or uniform
+        seed {int} -- Seed of the random number generator
+        relations {dict} -- If provided, filled with the list of related words written for each word
+
+    Returns:
+        int -- Number of related words written
+    '''
+    rng = random.Random(seed)
+    edges = 0
+    for word in words:
+        if distribution == 'zipf':
+            # Pareto distributed degrees with the requested mean
+            degree = int(rng.paretovariate(2.0) * mean_degree / 2.0)
+        else:
+            degree = rng.randint(0, int(mean_degree * 2))
+
+        line = ['#', word]
+        sections = {}
+        for _ in range(degree):
+            sections.setdefault(rng.choice(RELATION_CLASSES), []).append(rng.choice(words))
+
+        for relation_class, related_words in sections.items():
+            line.append(f"[{relation_class}={rng.random():.1f}]:{'|'.join(related_words)};")
+            line.append(f"[{relation_class}-score]:{'|'.join(f'{rng.uniform(0, 10):.2f}' for _ in related_words)};")
+            edges += len(related_words)
+            if relations is not None:
+                relations.setdefault(word, []).extend(related_words)
+
+        fh.write(''.join(line) + '\n')
+
+    return edges
+
+def generate_wordpacks(fh, words:list, packs:int=1000, terms_per_pack:int=4, related_per_term:int=6,
+                antonyms:bool=True, seed:int=0, relations:dict=None):
+    '''
+    Writes a wordpacks file in the format expected by generate_wordpacks
+
+    Base terms are drawn with a skewed distribution so that they recur across wordpacks
+
+    Arguments:
+        fh {file} -- File object the wordpacks are written to
+        words {list} -- The vocabulary
+        packs {int} -- Number of wordpacks
+        terms_per_pack {int} -- Number of base terms in each wordpack
+        related_per_term {int} -- Number of related terms listed for each base term
+        antonyms {bool} -- Writes '@ ANT-term' lines instead of '@ term' lines
+        seed {int} -- Seed of the random number generator
+        relations {dict} -- The related words of each word, used to list some related terms of another base term
+
+    Returns:
+        int -- Number of base terms written
+    '''
+    rng = random.Random(seed)
+    prefix = 'ANT-' if antonyms else ''
+
+    def pick_base_term():
+        if rng.random() < 0.5:
+            # Skewed towards the first words of the vocabulary
+            return words[min(int(rng.paretovariate(1.2)) - 1, len(words) - 1)]
+        return rng.choice(words)
+
+    terms = 0
+    for pack in range(1, packs + 1):
+        fh.write(f"### {pack} ###\n")
+        base_terms = {}
+        while len(base_terms) < min(terms_per_pack, len(words)):
+            base_terms[pick_base_term()] = None
+        # Related words of the base terms of this wordpack, some of which become ambiguous related terms
+        overlapping = [word for base_term in base_terms for word in (relations or {}).get(base_term, ())]
+        for base_term in base_terms:
+            related_terms = [rng.choice(overlapping) if overlapping and rng.random() < AMBIGUOUS_SHARE
+                             else rng.choice(words)
+                             for _ in range(related_per_term)]
+            fh.write(f"@ {prefix}{base_term} = {' · '.join(related_terms)}\n")
+            terms += 1
+
+    return terms
+
+def get_config():
+    '''
+    Defines the command line parameters and returns the parameters passed to the script
+
+    Returns:
+        argparse.args -- An object containing the parsed command line parameters
+    '''
+    parser = argparse.ArgumentParser(
+        prog=__file__,
+        description="Generate deterministic synthetic word relations and wordpacks files.",
+        formatter_class=lambda prog: argparse.ArgumentDefaultsHelpFormatter(prog, width=120))
+
+    parser.add_argument(
+        "-r", "--relations",
+        metavar='PATH',
+        required=True,
+        help="Word relations file to write")
+    parser.add_argument(
+        "-w", "--wordpacks",
+        metavar='PATH',
+        required=True,
+        help="Wordpacks file to write")
+    add_generator_arguments(parser)
+
+    return parser.parse_args(), parser
+
+def add_generator_arguments(parser):
+    '''Adds the parameters controlling the size of the generated files to a parser'''
+    parser.add_argument(
+        "--vocabulary",
+        metavar='NUM',
+        default=20000,
+        type=int,
+        help="Number of distinct words, which is also the number of lines of the word relations file")
+    parser.add_argument(
+        "--mean-degree",
+        metavar='NUM',
+        default=8.0,
+        type=float,
+        help="Average number of related words per line of the word relations file")
+    parser.add_argument(
+        "--degree-distribution",
+        choices=DEGREE_DISTRIBUTIONS,
+        default='zipf',
+        help="Distribution of the number of related words per line")
+    parser.add_argument(
+        "--packs",
+        metavar='NUM',
+        default=2000,
+        type=int,
+        help="Number of wordpacks")
+    parser.add_argument(
+        "--terms-per-pack",
+        metavar='NUM',
+        default=4,
+        type=int,
+        help="Number of base terms per wordpack")
+    parser.add_argument(
+        "--related-per-term",
+        metavar='NUM',
+        default=6,
+        type=int,
+        help="Number of related terms per base term")
+    parser.add_argument(
+        "--synonym-wordpacks",
+        action='store_true',
+        help="Write '@ term' lines for detect-synonyms.py instead of '@ ANT-term' lines")
+    parser.add_argument(
+        "--seed",
+        metavar='NUM',
+        default=0,
+        type=int,
+        help="Seed of the random number generators")
+
+def generate_files(args, relations_file:str, wordpacks_file:str):
+    '''
+    Writes the word relations and wordpacks files described by the generator parameters
+
+    Returns:
+        dict -- The number of words, related words and base terms written
+    '''
+    words = generate_words(args.vocabulary, args.seed)
+    relations = {}
+    with open(relations_file, 'w') as fh:
+        edges = generate_relations(fh, words, args.mean_degree, args.degree_distribution, args.seed, relations)
+    with open(wordpacks_file, 'w') as fh:
+        terms = generate_wordpacks(fh, words, args.packs, args.terms_per_pack, args.related_per_term,
+                                   not args.synonym_wordpacks, args.seed, relations)
+
+    return {'words': len(words), 'related_words': edges, 'base_terms': terms}
+
+def main():
+    '''Main function that gets called when the script is executed'''
+    args, parser = get_config()
+    counts = generate_files(args, args.relations, args.wordpacks)
+    print(f"Wrote {counts['words']} words with {counts['related_words']} related words to {args.relations} "
+          f"and {counts['base_terms']} base terms to {args.wordpacks}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generate import add_generator_arguments, generate_files
+from worddata.ambiguity import create_antonym_index, create_synonym_index
+from worddata.ambiguity import get_ambiguous_antonyms, get_ambiguous_synonyms
+from worddata.loader import generate_wordpacks, load_words_graphs, RelationSpec
+from worddata.loader import DEFAULT_PRIMARY_WORD_REGEX, DEFAULT_ANTONYM_REGEX, DEFAULT_ANTONYM_SCORE_REGEX
+from worddata.loader import DEFAULT_ANTONYM_SYNONYM_REGEX, DEFAULT_ANTONYM_SYNONYM_SCORE_REGEX
+from worddata.loader import DEFAULT_SYNONYM_REGEX, DEFAULT_SYNONYM_SCORE_REGEX
+from worddata.reader import open_text
+from worddata.sparse import create_sparse_antonym_index, create_sparse_synonym_index
+from worddata.stats import get_peak_rss_kb
+
+def main():
+    '''Main function that gets called when the script is executed'''
+    args, parser = get_config()
+    logging.basicConfig(level=logging.ERROR)
+    # The generated files go together, so an existing file is never replaced by a generated one
+    if (args.relations is None) != (args.wordpacks is None):
+        parser.error("--relations and --wordpacks must be passed together")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        relations_file = args.relations or os.path.join(tmp_dir, 'relations.txt')
+        wordpacks_file = args.wordpacks or os.path.join(tmp_dir, 'wordpacks.txt')
+
+        stage = time.perf_counter()
+        counts = None
+        if args.relations is None:
+            counts = generate_files(args, relations_file, wordpacks_file)
+        generate_seconds = time.perf_counter() - stage
+
+        results = {
+            'commit': _get_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'config': vars(args),
+            'generated': counts,
+            'generate_seconds': generate_seconds,
+            'relations_bytes': os.path.getsize(relations_file),
+            'wordpacks_bytes': os.path.getsize(wordpacks_file),
+            'stages': run_stages(relations_file, wordpacks_file, args.repeat, args.jobs)
+            }
+
+    output = json.dumps(results, indent=2)
+    if args.output is None:
+        print(output)
+    else:
+        with open(args.output, 'w') as fh:
+            fh.write(output + "\n")
+
+def run_stages(relations_file:str, wordpacks_file:str, repeat:int=1, jobs:int=1):
+    '''
+    Times the loader and detector stages on a word relations file and a wordpacks file
+
+    Each stage is run repeat times and the fastest run is reported
+
+    Returns:
+        dict -- A dictionary of stage names and their measurements
+    '''
+    stages = {}
+    specs = {
+        'antonyms': RelationSpec(DEFAULT_ANTONYM_REGEX, DEFAULT_ANTONYM_SCORE_REGEX),
+        'antonym_synonyms': RelationSpec(DEFAULT_ANTONYM_SYNONYM_REGEX, DEFAULT_ANTONYM_SYNONYM_SCORE_REGEX, 8.0),
+        'synonyms': RelationSpec(DEFAULT_SYNONYM_REGEX, DEFAULT_SYNONYM_SCORE_REGEX, 6.0)
+        }
+    with open_text(relations_file) as fh:
+        relation_lines = sum(1 for _ in fh)
+
+    graphs = _measure(stages, 'load_words_graphs', repeat, relation_lines,
+                      lambda: load_words_graphs(relations_file, DEFAULT_PRIMARY_WORD_REGEX, specs, jobs=jobs))
+    for name, graph in graphs.items():
+        stages['load_words_graphs'][name + '_nodes'] = len(graph)
+        stages['load_words_graphs'][name + '_edges'] = graph.edge_count()
+
+    wordpacks = _measure(stages, 'generate_wordpacks', repeat, len,
+                         lambda: list(generate_wordpacks(wordpacks_file)))
+
+    def detect_antonyms(graphs):
+        index = create_antonym_index(graphs['antonyms'], graphs['antonym_synonyms'])
+        return [get_ambiguous_antonyms(graphs['antonyms'], graphs['antonym_synonyms'], wordpack_dict, index)
+                for _, wordpack_dict in wordpacks]
+    _measure(stages, 'get_ambiguous_antonyms', repeat, len(wordpacks), lambda: detect_antonyms(graphs))
+
+    # The same wordpacks are checked for ambiguous synonyms
+    def detect_synonyms(graphs):
+        index = create_synonym_index(graphs['synonyms'])
+        return [get_ambiguous_synonyms(graphs['synonyms'], wordpack_dict, index)
+                for _, wordpack_dict in wordpacks]
+    _measure(stages, 'get_ambiguous_synonyms', repeat, len(wordpacks), lambda: detect_synonyms(graphs))
+
+    # The sparse engine is only measured when numpy and scipy are installed
+    def detect_sparse_antonyms():
+        index = create_sparse_antonym_index(graphs['antonyms'], graphs['antonym_synonyms'])
+        return list(index.detect_wordpacks(wordpacks))
+    def detect_sparse_synonyms():
+        index = create_sparse_synonym_index(graphs['synonyms'])
+        return list(index.detect_wordpacks(wordpacks))
+    try:
+        _measure(stages, 'sparse_ambiguous_antonyms', repeat, len(wordpacks), detect_sparse_antonyms)
+        _measure(stages, 'sparse_ambiguous_synonyms', repeat, len(wordpacks), detect_sparse_synonyms)
+    except ImportError as e:
+        logging.getLogger(__name__).warning("Skipping the sparse engine: %s", e)
+
+    # Frozen snapshots of the graphs are measured last since they add to the peak memory
+    frozen_graphs = _measure(stages, 'freeze_graphs', repeat, None,
+                             lambda: {name: graph.freeze() for name, graph in graphs.items()})
+    _measure(stages, 'frozen_ambiguous_antonyms', repeat, len(wordpacks), lambda: detect_antonyms(frozen_graphs))
+    _measure(stages, 'frozen_ambiguous_synonyms', repeat, len(wordpacks), lambda: detect_synonyms(frozen_graphs))
+
+    return stages
+
+def _measure(stages:dict, name:str, repeat:int, items, function:callable):
+    '''
+    Runs a stage function and records its fastest wall time, its CPU time, its throughput and
+    the peak resident memory of the process after it ran
+
+    The number of items processed by the stage is either a number or a function called with
+    the value returned by the stage function
+
+    Returns:
+        object -- The value returned by the last run of the stage function
+    '''
+    best = None
+    for _ in range(max(repeat, 1)):
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        result = function()
+        measurement = {'wall_seconds': time.perf_counter() - wall, 'cpu_seconds': time.process_time() - cpu}
+        if best is None or measurement['wall_seconds'] < best['wall_seconds']:
+            best = measurement
+
+    if callable(items):
+        items = items(result)
+    if items is not None:
+        best['items'] = items
+        best['items_per_second'] = items / best['wall_seconds'] if best['wall_seconds'] else None
+    best['peak_rss_kb'] = get_peak_rss_kb()
+    stages[name] = best
+
+    return result
+
+def _get_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def get_config():
+    '''
+    Defines the command line parameters and returns the parameters passed to the script
+
+    Returns:
+        argparse.args -- An object containing the parsed command line parameters
+    '''
+    parser = argparse.ArgumentParser(
+        prog=__file__,
+        description="Benchmark the word relations loader and the ambiguity detectors and output the measurements as JSON.",
+        formatter_class=lambda prog: argparse.ArgumentDefaultsHelpFormatter(prog, width=120))
+
+    parser.add_argument(
+        "-r", "--relations",
+        metavar='PATH',
+        required=False,
+        help="Existing word relations file to benchmark instead of generating one, along with --wordpacks")
+    parser.add_argument(
+        "-w", "--wordpacks",
+        metavar='PATH',
+        required=False,
+        help="Existing antonym wordpacks file to benchmark instead of generating one, along with --relations")
+    parser.add_argument(
+        "--repeat",
+        metavar='NUM',
+        default=1,
+        type=int,
+        help="Number of runs of each stage. The fastest run is reported")
+    parser.add_argument(
+        "-j", "--jobs",
+        metavar='NUM',
+        default=1,
+        type=int,
+        help="Number of processes used to parse the word relations file")
+    parser.add_argument(
+        "-o", "--output",
+        metavar='PATH',
+        required=False,
+        help="JSON file the measurements are written to instead of the standard output")
+    add_generator_arguments(parser)
+
+    return parser.parse_args(), parser
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import argparse
+from contextlib import nullcontext
+import logging
+
+from worddata.diagnostics import configure_logging, get_summary, log_summary
+from worddata.engine import DetectorEngine, generate_mixed_wordpacks
+from worddata.output import WordpackWriter
+from worddata.pipeline import BackgroundWriter, prefetch
+from worddata.runner import add_detection_arguments, add_engine_arguments, add_format_argument, add_log_level_argument
+from worddata.runner import add_relations_arguments, check_relations_arguments, get_engine_relation_specs
+from worddata.stats import RunStats, start_profiler, stop_profiler
+from worddata.workers import DetectionPool
+
+logger = logging.getLogger()
+
+def main():
+    '''Main function that gets called when the script is executed'''
+
+    args, parser = get_config()
+    configure_logging(args.log_level)
+    profiler = start_profiler(args.profile)
+    stats = RunStats()
+
+    # Create every graph from a single pass over the word relations and the indexes of both detections
+    with stats.stage('load_relations'):
+        engine = DetectorEngine.load(args.relations, args.primary_word_regex, get_engine_relation_specs(args),
+                                     args.word_delimeter, None if args.no_cache else args.cache_dir, args.mmap,
+                                     args.jobs, args.index_size, stats)
+
+        if args.stats:
+            for name, graph in engine.graphs.items():
+                stats.count(name + '_nodes', len(graph))
+                stats.count(name + '_edges', graph.edge_count())
+
+    # Parse the wordpacks file once and detect both kinds of base terms of each wordpack
+    wordpacks = generate_mixed_wordpacks(args.wordpacks)
+    if args.pipeline:
+        # Parse the next wordpacks while the previous ones are detected
+        wordpacks = prefetch(wordpacks)
+    background = BackgroundWriter if args.pipeline else nullcontext
+
+    # The worker processes are forked before the threads of the BackgroundWriters start
+    with stats.stage('detect'), DetectionPool(engine.detect_mixed, args.workers) as pool, \
+            open(args.antonyms_output, 'w+') as antonyms_output_fh, \
+            open(args.synonyms_output, 'w+') as synonyms_output_fh, \
+            background(antonyms_output_fh) as antonyms_fh, background(synonyms_output_fh) as synonyms_fh, \
+            WordpackWriter(antonyms_fh, args.format, 'ANT-') as antonyms_writer, \
+            WordpackWriter(synonyms_fh, args.format) as synonyms_writer:
+        for (wordpack_title, (synonym_dict, antonym_dict),
+             (ambiguous_synonyms, ambiguous_antonyms)) in pool.detect_wordpacks(wordpacks, stats=stats):
+            stats.count('wordpacks')
+            with stats.stage('write_output'):
+                if ambiguous_antonyms is not None:
+                    antonyms_writer.write(wordpack_title, antonym_dict, ambiguous_antonyms)
+                if ambiguous_synonyms is not None:
+                    synonyms_writer.write(wordpack_title, synonym_dict, ambiguous_synonyms)
+
+    logger.info("Ambiguity index statistics: %s", engine.stats())
+    log_summary()
+
+    stop_profiler(profiler, args.profile)
+    if args.stats:
+        stats.details['ambiguity_index'] = engine.stats()
+        stats.details['diagnostics'] = get_summary()
+        stats.write(args.stats)
+
+def get_config():
+    '''
+    Defines the command line parameters and returns the parameters passed to the script
+
+    Returns:
+        argparse.args -- An object containing the parsed command line parameters
+    '''
+    parser = argparse.ArgumentParser(
+        prog=__file__,
+        description="Take word packs holding both antonym and synonym base terms as input and output a file with "
+                    "the antonyms highlighted and a file with the synonyms highlighted.",
+        formatter_class=lambda prog: argparse.ArgumentDefaultsHelpFormatter(prog, width=120))
+
+    parser.add_argument(
+        "-w", "--wordpacks",
+        metavar='PATH',
+        required=True,
+        help="Wordpacks file to use as input, with '@ ANT-term =' antonym and '@ term =' synonym base terms")
+    parser.add_argument(
+        "-r", "--relations",
+        metavar='PATH',
+        required=True,
+        help="Word relations file to use as input")
+    add_engine_arguments(parser)
+    add_relations_arguments(parser)
+    add_detection_arguments(parser)
+    add_log_level_argument(parser)
+    add_format_argument(parser, "Format of the output files: the wordpacks with the ambiguous terms highlighted, one JSON "
+                                "object per wordpack or one tab separated row per related term")
+    parser.add_argument(
+        "--antonyms-output",
+        metavar='PATH',
+        required=False,
+        default="antonyms.txt",
+        help="Highlighted antonyms output file path")
+    parser.add_argument(
+        "--synonyms-output",
+        metavar='PATH',
+        required=False,
+        default="synonyms.txt",
+        help="Highlighted synonyms output file path")
+
+    args = parser.parse_args()
+    check_relations_arguments(parser, args)
+
+    return args, parser
+
+if __name__ == "__main__":
+    main()
@@ -2,76 +2,61 @@
 # -*- coding: utf-8 -*-
 
 import argparse
-from logging.config import dictConfig
-import logging
-
-from worddata.loader import generate_wordpacks, load_words_graph
-from worddata.graph import Graph
-
-# Setup logging
-logging_config = dict(
-    version = 1,
-    formatters = {
-        'f': {'format':
-              '%(asctime)s %(name)-12s %(levelname)-8s %(message)s'}
-        },
-    handlers = {
-        'h': {'class': 'logging.StreamHandler',
-              'formatter': 'f',
-              'level': logging.DEBUG}
-        },
-    loggers = {
-        'worddata.loader': {
-            'handlers': ['h'],
-            'level': logging.DEBUG,
-        }
-    },
-    root = {
-        'handlers': ['h'],
-        'level': logging.DEBUG,
-        }
-)
-dictConfig(logging_config)
-logger = logging.getLogger()
-
-args = None
+
+from worddata.ambiguity import DEFAULT_ANTONYM_HOPS, create_antonym_index, get_ambiguous_antonyms
+from worddata.diagnostics import configure_logging
+from worddata.loader import RelationSpec
+from worddata.loader import DEFAULT_PRIMARY_WORD_REGEX, DEFAULT_ANTONYM_REGEX, DEFAULT_ANTONYM_SCORE_REGEX
+from worddata.loader import DEFAULT_ANTONYM_SYNONYM_REGEX, DEFAULT_ANTONYM_SYNONYM_SCORE_REGEX
+from worddata.runner import DetectionRun
+from worddata.sparse import create_sparse_antonym_index
+
+class AntonymDetection(DetectionRun):
+    """Detects the related terms of a base term that are antonyms of another base term of the
+    wordpack, or synonyms of those antonyms
+    """
+    name = 'antonyms'
+    term_format = '^@ ANT-([^=]+) ='
+    term_prefix = 'ANT-'
+    default_hops = DEFAULT_ANTONYM_HOPS
+    hops_help = ("Number of synonym hops taken from each antonym of a base term, e.g. 2 to also check the synonyms of "
+                 "the synonyms of its antonyms")
+    demand_loaded = "synonyms of the antonyms of the base terms"
+
+    def get_relation_specs(self):
+        return {
+            'antonyms': RelationSpec(self.args.antonym_regex, self.args.antonym_score_regex),
+            'synonyms': RelationSpec(self.args.synonym_regex, self.args.synonym_score_regex, self.args.score_cutoff)
+            }
+
+    def load_demanded_graphs(self, base_terms):
+        # Only keep the antonyms of the base terms, then the synonyms of those antonyms
+        antonym_graph = self.load_graph('antonyms', set(base_terms))
+        antonyms = set()
+        for base_term in base_terms:
+            node = antonym_graph[base_term]
+            if node is not None:
+                antonyms.update(node.neighbor_set)
+
+        return {'antonyms': antonym_graph, 'synonyms': self.load_graph('synonyms', antonyms)}
+
+    def create_index(self, graphs):
+        return create_antonym_index(graphs['antonyms'], graphs['synonyms'], self.args.index_size, self.args.hops,
+                                    self.args.hop_cutoff)
+
+    def create_sparse_index(self, graphs):
+        return create_sparse_antonym_index(graphs['antonyms'], graphs['synonyms'])
+
+    def detect(self, graphs, index, wordpack_dict):
+        return get_ambiguous_antonyms(graphs['antonyms'], graphs['synonyms'], wordpack_dict, index)
 
 def main():
     '''Main function that gets called when the script is executed'''
     
     args, parser = get_config()
+    configure_logging(args.log_level)
 
-    # Create a graph of related antonyms from our data
-    antonym_graph = load_words_graph(args.relations, args.primary_word_regex, args.antonym_regex, args.antonym_score_regex, args.word_delimeter)
-    # Create a graph of related synonyms from our data
-    synonym_graph = load_words_graph(args.relations, args.primary_word_regex, args.synonym_regex, args.synonym_score_regex, args.word_delimeter, args.score_cutoff)
-
-    # Parse out the wordpack title and the groups of words in it
-    wordpacks = generate_wordpacks(args.wordpacks)
-    with open(args.output, 'w+') as fh:
-        for (wordpack_title, wordpack_dict) in wordpacks:
-            ambiguous_antonyms = get_ambiguous_antonyms(antonym_graph, synonym_graph, wordpack_dict)
-            fh.write(wordpack_title + "\n")
-            for base_term, related_terms in wordpack_dict.items():
-                base_terms_overlap = ', '.join(set(ambiguous_antonyms[base_term]['overlap']))
-                if base_terms_overlap:
-                    fh.write(f"[ {base_terms_overlap} ] @ ANT-{base_term} = ")
-                else:
-                    fh.write(f"@ ANT-{base_term} = ")
-
-                output = ""
-                for related_term in related_terms:
-                    if related_term in ambiguous_antonyms[base_term]['related_terms']:
-                        term_index = ambiguous_antonyms[base_term]['related_terms'].index(related_term)
-                        matching_base_term = ambiguous_antonyms[base_term]['overlap'][term_index]
-                        output = output + f"[ {matching_base_term} : {related_term} ]" + " · "
-                        continue
-                    
-                    output = output + related_term + " · "
-                output = output[:-3] + "\n"
-                fh.write(output)
-
-        #break
+    AntonymDetection(args).run()
 
 def get_config():
     '''
@@ -99,31 +84,31 @@ def get_config():
         "-p", "--primary-word-regex",
         metavar='REGEX',
         required=False, 
-        default="^#([^\[]+)",
+        default=DEFAULT_PRIMARY_WORD_REGEX,
         help="Regex to parse the list of words in the word relations file")
     parser.add_argument(
         "-a", "--antonym-regex",
         metavar='REGEX',
         required=False,
-        default="\[(?:contrast-manual|contrast)=\d+\.\d+\]:([^;]+)",
+        default=DEFAULT_ANTONYM_REGEX,
         help="Regex to parse the list of antonyms in the word relations file")
     parser.add_argument(
         "-as", "--antonym-score-regex",
         required=False,
         metavar='REGEX',
-        default="\[(?:contrast-manual|contrast)-score\]:([^;]+)",
+        default=DEFAULT_ANTONYM_SCORE_REGEX,
         help="Regex to parse the score of antonyms in the word relations file")
     parser.add_argument(
         "-s", "--synonym-regex",
         required=False,
         metavar='REGEX',
-        default='\[(?:syn|associated)[^=\]]*?=\d+\.\d+\]:([^;]+)',
+        default=DEFAULT_ANTONYM_SYNONYM_REGEX,
         help="Regex to parse the list of synonyms in the word relations file")
     parser.add_argument(
         "-ss", "--synonym-score-regex",
         metavar='REGEX',
         required=False,
-        default='\[(?:syn|associated).*?-score\]:([^;]+)',
+        default=DEFAULT_ANTONYM_SYNONYM_SCORE_REGEX,
         help="Regex to parse the score of synonyms in the word relations file")
     parser.add_argument(
         "-d", "--word-delimeter",
@@ -138,6 +123,7 @@ def get_config():
         default="8.0",
         type=float,
         help="Eliminate synonyms that are below the provided value")
+    AntonymDetection.add_arguments(parser)
     parser.add_argument(
         "-o", "--output",
         metavar='PATH',
@@ -145,54 +131,10 @@ def get_config():
         default="output.txt",
         help="Highlighted antonyms output file path")
 
-    return parser.parse_args(), parser
-
-def get_ambiguous_antonyms(antonyms_graph:Graph, synonyms_graph:Graph, wordpack_dict:dict):
-    '''Iterates through a wordpack and determines if a base term's related terms are antonyms of another base term in the wordpack.
-
-    Consider a wordpack_dict as follows:
-
-    {
-        base_term1: [ antonym1, antonym2, antonym3 ],
-        base_term2: [ antonym4, antonym5, antonym6 ]
-    }
-
-    If antonym3 is also an antonym of base_term2, then it's considered ambiguous
-
-    Arguments:
-        graph {Graph} -- A graph of antonyms
-        wordpack_dict {dict} -- A wordpack encapsulated within a dictionary object where keys are the base terms and their value is a list of related terms
-    '''
-    # Data structure that will be returned 
-    return_ds = {}
-    for base_term, related_terms in wordpack_dict.items():
-        # Create a datastructure to track matches
-        return_ds[base_term] = {
-            'overlap': [],
-            'related_terms': []
-            }
+    args = parser.parse_args()
+    AntonymDetection.check_arguments(parser, args)
 
-        for base_term2, related_terms2 in wordpack_dict.items():
-            # Don't compare the same group of words
-            if ( base_term == base_term2 ): continue
-            # Check if we have antonyms for base_term2 in the graph
-            if base_term2 not in antonyms_graph.nodes: continue
-
-            # Get the antonyms of base_term2
-            antonyms = list(antonyms_graph.nodes[base_term2].neighbors.keys())
-            for antonym in list(antonyms_graph.nodes[base_term2].neighbors.keys()):
-                if antonym not in synonyms_graph.nodes:
-                    continue
-                synonyms = list(synonyms_graph.nodes[antonym].neighbors.keys())
-                antonyms.extend(synonyms)
-
-            for related_term in related_terms:
-                if ( related_term in antonyms ):
-                    return_ds[base_term]['overlap'].append(base_term2)
-                    return_ds[base_term]['related_terms'].append(related_term)
-                    logger.info(f"Base term '{base_term}' and its related term '{related_term}' are ambiguous with base term group '{base_term2}'")
-        
-    return return_ds
+    return args, parser
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
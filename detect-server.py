@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import argparse
+import sys
+
+from worddata.diagnostics import configure_logging
+from worddata.runner import add_engine_arguments, add_log_level_argument, add_relations_arguments
+from worddata.runner import check_relations_arguments, get_engine_relation_specs
+from worddata.server import DetectionService, serve_http, serve_lines
+
+def main():
+    '''Main function that gets called when the script is executed'''
+
+    args, parser = get_config()
+    configure_logging(args.log_level)
+
+    service = DetectionService(args.relations, args.primary_word_regex, get_engine_relation_specs(args),
+                               args.word_delimeter, None if args.no_cache else args.cache_dir, args.mmap, args.jobs,
+                               args.index_size)
+
+    if args.stdin:
+        serve_lines(service, sys.stdin, sys.stdout)
+    else:
+        serve_http(service, args.host, args.port)
+
+def get_config():
+    '''
+    Defines the command line parameters and returns the parameters passed to the script
+
+    Returns:
+        argparse.args -- An object containing the parsed command line parameters
+    '''
+    parser = argparse.ArgumentParser(
+        prog=__file__,
+        description="Load the word relations once and answer ambiguous antonym and synonym queries for wordpacks "
+                    "over HTTP or standard input.",
+        formatter_class=lambda prog: argparse.ArgumentDefaultsHelpFormatter(prog, width=120))
+
+    parser.add_argument(
+        "-r", "--relations",
+        metavar='PATH',
+        required=True,
+        help="Word relations file to use as input. It is reloaded when it changes")
+    add_engine_arguments(parser)
+    add_relations_arguments(parser, index_scope='requests')
+    parser.add_argument(
+        "--host",
+        metavar='HOST',
+        required=False,
+        default="127.0.0.1",
+        help="Address the HTTP server listens on")
+    parser.add_argument(
+        "--port",
+        metavar='NUM',
+        required=False,
+        default=8080,
+        type=int,
+        help="Port the HTTP server listens on")
+    parser.add_argument(
+        "--stdin",
+        action='store_true',
+        help="Read one JSON request per line from the standard input and write one JSON response per line to the "
+             "standard output instead of serving HTTP")
+    add_log_level_argument(parser, "after each load", ambiguities=False)
+
+    args = parser.parse_args()
+    check_relations_arguments(parser, args)
+
+    return args, parser
+
+if __name__ == "__main__":
+    main()
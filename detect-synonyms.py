@@ -2,74 +2,48 @@
 # -*- coding: utf-8 -*-
 
 import argparse
-from logging.config import dictConfig
-import logging
-
-from worddata.loader import generate_wordpacks, load_words_graph
-from worddata.graph import Graph
-
-# Setup logging
-logging_config = dict(
-    version = 1,
-    formatters = {
-        'f': {'format':
-              '%(asctime)s %(name)-12s %(levelname)-8s %(message)s'}
-        },
-    handlers = {
-        'h': {'class': 'logging.StreamHandler',
-              'formatter': 'f',
-              'level': logging.DEBUG}
-        },
-    loggers = {
-        'worddata.loader': {
-            'handlers': ['h'],
-            'level': logging.DEBUG,
-        }
-    },
-    root = {
-        'handlers': ['h'],
-        'level': logging.DEBUG,
-        }
-)
-dictConfig(logging_config)
-logger = logging.getLogger()
-
-args = None
+
+from worddata.ambiguity import DEFAULT_SYNONYM_HOPS, create_synonym_index, get_ambiguous_synonyms
+from worddata.diagnostics import configure_logging
+from worddata.loader import RelationSpec
+from worddata.loader import DEFAULT_PRIMARY_WORD_REGEX, DEFAULT_SYNONYM_REGEX, DEFAULT_SYNONYM_SCORE_REGEX
+from worddata.runner import DetectionRun
+from worddata.sparse import create_sparse_synonym_index
+
+class SynonymDetection(DetectionRun):
+    """Detects the related terms of a base term that are synonyms of another base term of the wordpack
+    """
+    name = 'synonyms'
+    term_format = '^@ ([^=]+) ='
+    default_hops = DEFAULT_SYNONYM_HOPS
+    hops_help = ("Number of synonym hops taken from each synonym of a base term, e.g. 1 to also check the synonyms of "
+                 "its synonyms")
+    demand_loaded = "synonyms of the base terms"
+
+    def get_relation_specs(self):
+        # Create a graph of related synonyms from our data
+        return {'synonyms': RelationSpec(self.args.synonym_regex, self.args.synonym_score_regex, self.args.score_cutoff)}
+
+    def load_demanded_graphs(self, base_terms):
+        # Only keep the synonyms of the base terms
+        return {'synonyms': self.load_graph('synonyms', set(base_terms))}
+
+    def create_index(self, graphs):
+        return create_synonym_index(graphs['synonyms'], self.args.index_size, self.args.hops, self.args.hop_cutoff)
+
+    def create_sparse_index(self, graphs):
+        return create_sparse_synonym_index(graphs['synonyms'])
+
+    def detect(self, graphs, index, wordpack_dict):
+        return get_ambiguous_synonyms(graphs['synonyms'], wordpack_dict, index)
 
 def main():
     '''Main function that gets called when the script is executed'''
     
     args, parser = get_config()
+    configure_logging(args.log_level)
 
-    # Create a graph of related synonyms from our data
-    synonym_graph = load_words_graph(args.relations, args.primary_word_regex, args.synonym_regex, args.synonym_score_regex, args.word_delimeter, args.score_cutoff)
-
-    # Parse out the wordpack title and the groups of words in it
-    wordpacks = generate_wordpacks(args.wordpacks, term_format='^@ ([^=]+) =')
-    with open(args.output, 'w+') as fh:
-        for (wordpack_title, wordpack_dict) in wordpacks:
-            ambiguous_synonyms = get_ambiguous_synonyms(synonym_graph, wordpack_dict)
-            fh.write(wordpack_title + "\n")
-            for base_term, related_terms in wordpack_dict.items():
-                base_terms_overlap = ', '.join(set(ambiguous_synonyms[base_term]['overlap']))
-                if base_terms_overlap:
-                    fh.write(f"[ {base_terms_overlap} ] @ {base_term} = ")
-                else:
-                    fh.write(f"@ {base_term} = ")
-
-                output = ""
-                for related_term in related_terms:
-                    if related_term in ambiguous_synonyms[base_term]['related_terms']:
-                        term_index = ambiguous_synonyms[base_term]['related_terms'].index(related_term)
-                        matching_base_term = ambiguous_synonyms[base_term]['overlap'][term_index]
-                        output = output + f"[ {matching_base_term} : {related_term} ]" + " · "
-                        continue
-                    
-                    output = output + related_term + " · "
-                output = output[:-3] + "\n"
-                fh.write(output)
-
-        #break
+    SynonymDetection(args).run()
 
 def get_config():
     '''
@@ -97,19 +71,19 @@ def get_config():
         "-p", "--primary-word-regex",
         metavar='REGEX',
         required=False, 
-        default="^#([^\[]+)",
+        default=DEFAULT_PRIMARY_WORD_REGEX,
         help="Regex to parse the list of words in the word relations file")
     parser.add_argument(
         "-s", "--synonym-regex",
         required=False,
         metavar='REGEX',
-        default='\[(?:associated|syn|broader|custom-list|handcraft|memberof|narrower)[\w\s\-\{\}]*?=\d+\.\d+\]:([^;]+)',
+        default=DEFAULT_SYNONYM_REGEX,
         help="Regex to parse the list of synonyms in the word relations file")
     parser.add_argument(
         "-ss", "--synonym-score-regex",
         metavar='REGEX',
         required=False,
-        default='\[(?:associated|syn|broader|custom-list|handcraft|memberof|narrowe)[\w\s\-\{\}]*?-score\]:([^;]+)',
+        default=DEFAULT_SYNONYM_SCORE_REGEX,
         help="Regex to parse the score of synonyms in the word relations file")
     parser.add_argument(
         "-d", "--word-delimeter",
@@ -124,6 +98,7 @@ def get_config():
         default="6.0",
         type=float,
         help="Eliminate synonyms that are below the provided value")
+    SynonymDetection.add_arguments(parser)
     parser.add_argument(
         "-o", "--output",
         metavar='PATH',
@@ -131,49 +106,10 @@ def get_config():
         default="output.txt",
         help="Highlighted synonyms output file path")
 
-    return parser.parse_args(), parser
-
-def get_ambiguous_synonyms(synonyms_graph:Graph, wordpack_dict:dict):
-    '''Iterates through a wordpack and determines if a base term's related terms are synonyms of another base term in the wordpack.
-
-    Consider a wordpack_dict as follows:
+    args = parser.parse_args()
+    SynonymDetection.check_arguments(parser, args)
 
-    {
-        base_term1: [ synonym1, synonym2, synonym3 ],
-        base_term2: [ synonym4, synonym5, synonym6 ]
-    }
-
-    If synonym3 is also an synonym of base_term2, then it's considered ambiguous
-
-    Arguments:
-        graph {Graph} -- A graph of synonyms
-        wordpack_dict {dict} -- A wordpack encapsulated within a dictionary object where keys are the base terms and their value is a list of related terms
-    '''
-    # Data structure that will be returned 
-    return_ds = {}
-    for base_term, related_terms in wordpack_dict.items():
-        # Create a datastructure to track matches
-        return_ds[base_term] = {
-            'overlap': [],
-            'related_terms': []
-            }
-
-        for base_term2, related_terms2 in wordpack_dict.items():
-            # Don't compare the same group of words
-            if ( base_term == base_term2 ): continue
-            # Check if we have synonyms for base_term2 in the graph
-            if base_term2 not in synonyms_graph.nodes: continue
-
-            # Get the synonyms of base_term2
-            synonyms = list(synonyms_graph.nodes[base_term2].neighbors.keys())
-
-            for related_term in related_terms:
-                if ( related_term in synonyms ):
-                    return_ds[base_term]['overlap'].append(base_term2)
-                    return_ds[base_term]['related_terms'].append(related_term)
-                    logger.info(f"Base term '{base_term}' and its related term '{related_term}' are ambiguous with base term group '{base_term2}'")
-        
-    return return_ds
+    return args, parser
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from benchmarks.generate import generate_relations, generate_wordpacks, generate_words
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Stages of benchmarks/run.py that are always measured
+STAGES = ('load_words_graphs', 'generate_wordpacks', 'get_ambiguous_antonyms', 'get_ambiguous_synonyms',
+          'freeze_graphs', 'frozen_ambiguous_antonyms', 'frozen_ambiguous_synonyms')
+
+def generate(seed:int):
+    '''
+    Returns:
+        tuple -- The words, the word relations file and the wordpacks file generated with a seed
+    '''
+    words = generate_words(100, seed)
+    relations = {}
+    relations_fh = io.StringIO()
+    generate_relations(relations_fh, words, seed=seed, relations=relations)
+    wordpacks_fh = io.StringIO()
+    generate_wordpacks(wordpacks_fh, words, packs=20, seed=seed, relations=relations)
+
+    return words, relations_fh.getvalue(), wordpacks_fh.getvalue()
+
+def read_file(path:str):
+    with open(path) as fh:
+        return fh.read()
+
+class GenerateTest(unittest.TestCase):
+    def test_same_seed_same_files(self):
+        self.assertEqual(generate(1), generate(1))
+
+    def test_other_seed_other_files(self):
+        words, relations, wordpacks = generate(1)
+        other_words, other_relations, other_wordpacks = generate(2)
+        self.assertNotEqual(words, other_words)
+        self.assertNotEqual(relations, other_relations)
+        self.assertNotEqual(wordpacks, other_wordpacks)
+
+    def test_script(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            contents = []
+            for run, seed in enumerate(['3', '3', '4']):
+                paths = [os.path.join(tmp_dir, f"relations{run}.txt"), os.path.join(tmp_dir, f"wordpacks{run}.txt")]
+                subprocess.run([sys.executable, os.path.join(ROOT_DIR, 'benchmarks', 'generate.py'),
+                                '-r', paths[0], '-w', paths[1], '--vocabulary', '100', '--packs', '20',
+                                '--seed', seed], check=True, capture_output=True)
+                contents.append([read_file(path) for path in paths])
+
+        self.assertEqual(contents[0], contents[1])
+        self.assertNotEqual(contents[0][0], contents[2][0])
+        self.assertNotEqual(contents[0][1], contents[2][1])
+
+class RunTest(unittest.TestCase):
+    def test_measurements(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_file = os.path.join(tmp_dir, 'bench.json')
+            subprocess.run([sys.executable, os.path.join(ROOT_DIR, 'benchmarks', 'run.py'),
+                            '--vocabulary', '200', '--packs', '30', '--output', output_file],
+                           check=True, capture_output=True)
+            with open(output_file) as fh:
+                results = json.load(fh)
+
+        # The commit is None when the tree isn't a git checkout
+        self.assertIn('commit', results)
+        if results['commit'] is not None:
+            self.assertRegex(results['commit'], r'^[0-9a-f]{40}$')
+        self.assertEqual(results['generated']['words'], 200)
+
+        stages = results['stages']
+        for name in STAGES:
+            with self.subTest(stage=name):
+                self.assertGreaterEqual(stages[name]['wall_seconds'], 0)
+                self.assertGreaterEqual(stages[name]['cpu_seconds'], 0)
+                self.assertGreater(stages[name]['peak_rss_kb'], 0)
+        self.assertEqual(stages['load_words_graphs']['items'], 200)
+        for name in ('generate_wordpacks', 'get_ambiguous_antonyms', 'get_ambiguous_synonyms'):
+            with self.subTest(stage=name):
+                self.assertEqual(stages[name]['items'], 30)
+                self.assertIn('items_per_second', stages[name])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+import os
+import tempfile
+import unittest
+
+from worddata.cache import get_file_fingerprint, load_words_graphs_cached, open_compiled_graphs
+from worddata.cache import read_compiled_graphs, write_compiled_graphs
+from worddata.loader import DEFAULT_ANTONYM_REGEX, DEFAULT_ANTONYM_SCORE_REGEX, DEFAULT_PRIMARY_WORD_REGEX
+from worddata.loader import DEFAULT_SYNONYM_REGEX, DEFAULT_SYNONYM_SCORE_REGEX, RelationSpec
+from worddata.stats import RunStats
+
+RELATIONS = """#hot[contrast=0.5]:cold|cool;[contrast-score]:9.00|7.50;[syn=0.5]:warm;[syn-score]:8.00;
+#cold[contrast=0.5]:hot;[contrast-score]:9.00;[syn=0.5]:chilly|icy;[syn-score]:9.50|4.00;
+#café[syn=0.5]:bistro;[syn-score]:7.00;
+"""
+
+SPECS = {
+    'antonyms': RelationSpec(DEFAULT_ANTONYM_REGEX, DEFAULT_ANTONYM_SCORE_REGEX),
+    'synonyms': RelationSpec(DEFAULT_SYNONYM_REGEX, DEFAULT_SYNONYM_SCORE_REGEX, 6.0)
+    }
+
+def get_edges(graph):
+    '''
+    Returns:
+        dict -- The neighbors and edge scores of each word of a graph
+    '''
+    return {name: dict(node.neighbors) for name, node in graph.nodes.items()}
+
+class CacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.relations_file = os.path.join(self.tmp_dir.name, 'relations.txt')
+        self.cache_dir = os.path.join(self.tmp_dir.name, 'cache')
+        with open(self.relations_file, 'w') as fh:
+            fh.write(RELATIONS)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def load(self, memory_map=False):
+        stats = RunStats()
+        graphs = load_words_graphs_cached(self.relations_file, DEFAULT_PRIMARY_WORD_REGEX, SPECS,
+                                          cache_dir=self.cache_dir, memory_map=memory_map, stats=stats)
+        return graphs, stats.counters
+
+    def test_second_load_reads_the_cache(self):
+        graphs, counters = self.load()
+        self.assertEqual(counters.get('relations_cache_misses'), 1)
+        # Every primary word is a node of every graph
+        self.assertEqual(get_edges(graphs['antonyms']), {
+            'hot': {'cold': 9.0, 'cool': 7.5},
+            'cold': {'hot': 9.0},
+            'cool': {'hot': 7.5},
+            'café': {}
+            })
+
+        cached_graphs, counters = self.load()
+        self.assertEqual(counters.get('relations_cache_hits'), 1)
+        for name in SPECS:
+            self.assertEqual(get_edges(cached_graphs[name]), get_edges(graphs[name]))
+
+    def test_changed_file_is_parsed_again(self):
+        self.load()
+        with open(self.relations_file, 'a') as fh:
+            fh.write("#warm[contrast=0.5]:frosty;[contrast-score]:8.00;\n")
+
+        graphs, counters = self.load()
+        self.assertEqual(counters.get('relations_cache_misses'), 1)
+        self.assertEqual(graphs['antonyms']['warm'].neighbors, {'frosty': 8.0})
+
+    def test_memory_mapped_graphs(self):
+        graphs, _ = self.load()
+        mapped_graphs, _ = self.load(memory_map=True)
+
+        for name in SPECS:
+            self.assertEqual(get_edges(mapped_graphs[name]), get_edges(graphs[name]))
+            self.assertEqual(len(mapped_graphs[name]), len(graphs[name]))
+            self.assertEqual(mapped_graphs[name].edge_count(), graphs[name].edge_count())
+        self.assertEqual(set(mapped_graphs['synonyms']['café'].neighbor_set), {'bistro'})
+        self.assertIsNone(mapped_graphs['synonyms']['unknown'])
+
+    def test_stale_compiled_file_is_not_read(self):
+        graphs, _ = self.load()
+        path = os.path.join(self.tmp_dir.name, 'graphs.bin')
+        fingerprint = get_file_fingerprint(self.relations_file)
+        write_compiled_graphs(path, graphs, fingerprint)
+
+        self.assertEqual(set(read_compiled_graphs(path, fingerprint)), set(SPECS))
+        self.assertIsNone(read_compiled_graphs(path, [0, 0]))
+        self.assertIsNone(open_compiled_graphs(path, [0, 0]))
+
+if __name__ == '__main__':
+    unittest.main()
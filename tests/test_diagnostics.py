@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import os
+import tempfile
+import unittest
+
+from worddata.diagnostics import Diagnostics, clear_diagnostics
+from worddata.loader import DEFAULT_ANTONYM_REGEX, DEFAULT_ANTONYM_SCORE_REGEX, DEFAULT_PRIMARY_WORD_REGEX
+from worddata.loader import RelationSpec, load_words_graphs
+
+class DiagnosticsTest(unittest.TestCase):
+    def test_summary_keeps_the_first_examples(self):
+        diagnostics = Diagnostics(samples=2)
+        for line_num in range(5):
+            diagnostics.record('missing', "Missing on line {line_num}", line_num=line_num)
+        diagnostics.record('other', "Other")
+
+        self.assertEqual(diagnostics.summary(), {
+            'missing': {'count': 5, 'examples': ["Missing on line 0", "Missing on line 1"]},
+            'other': {'count': 1, 'examples': ["Other"]}
+            })
+
+    def test_merge_keeps_the_order_of_the_occurrences(self):
+        chunks = [Diagnostics(samples=None), Diagnostics(samples=None)]
+        for chunk in chunks:
+            chunk.record('a', "A on line {line_num}", line_num=0)
+            chunk.record('b', "B on line {line_num}", line_num=1)
+            chunk.record('a', "A on line {line_num}", line_num=2)
+
+        diagnostics = Diagnostics('test.diagnostics', samples=3)
+        with self.assertLogs('test.diagnostics', logging.DEBUG) as logs:
+            diagnostics.merge(chunks[0], 0)
+            diagnostics.merge(chunks[1], 10)
+
+        self.assertEqual([record.getMessage() for record in logs.records],
+                         ["A on line 0", "B on line 1", "A on line 2", "A on line 10", "B on line 11", "A on line 12"])
+        self.assertEqual(diagnostics.summary(), {
+            'a': {'count': 4, 'examples': ["A on line 0", "A on line 2", "A on line 10"]},
+            'b': {'count': 2, 'examples': ["B on line 1", "B on line 11"]}
+            })
+
+    def test_clear(self):
+        diagnostics = Diagnostics()
+        diagnostics.record('a', "A")
+        diagnostics.clear()
+        self.assertEqual(diagnostics.summary(), {})
+
+    def test_discard(self):
+        diagnostics = Diagnostics(samples=1)
+        diagnostics.record('a', "A")
+        diagnostics.record('b', "B")
+        diagnostics.discard('a')
+        diagnostics.discard('unknown')
+        self.assertEqual(diagnostics.summary(), {'b': {'count': 1, 'examples': ["B"]}})
+
+        # The examples of a discarded category are kept again
+        diagnostics.record('a', "A again")
+        self.assertEqual(diagnostics.summary()['a'], {'count': 1, 'examples': ["A again"]})
+
+class ParallelLoadDiagnosticsTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.relations_file = os.path.join(self.tmp_dir.name, 'relations.txt')
+        with open(self.relations_file, 'w') as fh:
+            for i in range(200):
+                if i % 7 == 0:
+                    fh.write("no primary word\n")
+                elif i % 5 == 0:
+                    fh.write(f"#word{i}[contrast=0.5]:other{i}|more{i};[contrast-score]:9.00;\n")
+                else:
+                    fh.write(f"#word{i}[contrast=0.5]:other{i};[contrast-score]:9.00;\n")
+        self.specs = {'antonyms': RelationSpec(DEFAULT_ANTONYM_REGEX, DEFAULT_ANTONYM_SCORE_REGEX)}
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+        clear_diagnostics()
+
+    def load(self, jobs):
+        with self.assertLogs('worddata.loader', logging.DEBUG) as logs:
+            graphs = load_words_graphs(self.relations_file, DEFAULT_PRIMARY_WORD_REGEX, self.specs, jobs=jobs)
+
+        messages = [record.getMessage() for record in logs.records if record.levelno == logging.DEBUG
+                    and 'Processing' not in record.getMessage()]
+        return graphs['antonyms'], messages
+
+    def test_parallel_load_logs_like_a_serial_load(self):
+        graph, messages = self.load(1)
+        parallel_graph, parallel_messages = self.load(2)
+
+        # 29 lines without a primary word and 34 lines with a word without a score
+        self.assertEqual(len(messages), 29 + 34)
+        self.assertEqual(parallel_messages, messages)
+        self.assertEqual({name: dict(node.neighbors) for name, node in parallel_graph.nodes.items()},
+                         {name: dict(node.neighbors) for name, node in graph.nodes.items()})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from benchmarks.generate import generate_relations, generate_wordpacks, generate_words
+from worddata.ambiguity import get_ambiguous_antonyms, get_ambiguous_synonyms
+from worddata.engine import DetectorEngine, generate_mixed_wordpacks, split_wordpack
+from worddata.loader import DEFAULT_ANTONYM_REGEX, DEFAULT_ANTONYM_SCORE_REGEX, DEFAULT_PRIMARY_WORD_REGEX
+from worddata.loader import DEFAULT_ANTONYM_SYNONYM_REGEX, DEFAULT_ANTONYM_SYNONYM_SCORE_REGEX
+from worddata.loader import DEFAULT_SYNONYM_REGEX, DEFAULT_SYNONYM_SCORE_REGEX, RelationSpec
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RELATIONS = """#hot[contrast=0.5]:cold|cool;[contrast-score]:9.00|7.50;[syn=0.5]:warm;[syn-score]:8.00;
+#cold[contrast=0.5]:hot;[contrast-score]:9.00;[syn=0.5]:chilly;[syn-score]:9.50;
+#warm[syn=0.5]:hot|tepid;[syn-score]:8.00|7.00;
+"""
+
+SPECS = {
+    'antonyms': RelationSpec(DEFAULT_ANTONYM_REGEX, DEFAULT_ANTONYM_SCORE_REGEX),
+    'antonym_synonyms': RelationSpec(DEFAULT_ANTONYM_SYNONYM_REGEX, DEFAULT_ANTONYM_SYNONYM_SCORE_REGEX, 8.0),
+    'synonyms': RelationSpec(DEFAULT_SYNONYM_REGEX, DEFAULT_SYNONYM_SCORE_REGEX, 6.0)
+    }
+
+# cool, a related term of cold, is an antonym of the other base term hot
+ANTONYM_DICT = {'hot': ['cold'], 'cold': ['cool']}
+# tepid, a related term of hot, is a synonym of the other base term warm
+SYNONYM_DICT = {'hot': ['tepid'], 'warm': ['balmy']}
+
+class DetectorEngineTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.relations_file = os.path.join(cls.tmp_dir.name, 'relations.txt')
+        with open(cls.relations_file, 'w') as fh:
+            fh.write(RELATIONS)
+        cls.engine = DetectorEngine.load(cls.relations_file, DEFAULT_PRIMARY_WORD_REGEX, SPECS, cache_dir=None)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+
+    def test_missing_graphs(self):
+        with self.assertRaises(ValueError):
+            DetectorEngine({'antonyms': self.engine.graphs['antonyms']})
+
+    def test_detect(self):
+        graphs = self.engine.graphs
+        antonyms = self.engine.detect('antonyms', ANTONYM_DICT)
+        self.assertEqual(antonyms['cold'], {'overlap': ['hot'], 'related_terms': ['cool']})
+        self.assertEqual(antonyms, get_ambiguous_antonyms(graphs['antonyms'], graphs['antonym_synonyms'],
+                                                          ANTONYM_DICT))
+
+        synonyms = self.engine.detect('synonyms', SYNONYM_DICT)
+        self.assertEqual(synonyms['hot'], {'overlap': ['warm'], 'related_terms': ['tepid']})
+        self.assertEqual(synonyms, get_ambiguous_synonyms(graphs['synonyms'], SYNONYM_DICT))
+
+        with self.assertRaises(ValueError):
+            self.engine.detect('hypernyms', ANTONYM_DICT)
+
+    def test_detect_mixed(self):
+        self.assertEqual(self.engine.detect_mixed((SYNONYM_DICT, ANTONYM_DICT)),
+                         (self.engine.detect('synonyms', SYNONYM_DICT), self.engine.detect('antonyms', ANTONYM_DICT)))
+        # Only the kinds of base terms the wordpack holds are detected
+        self.assertEqual(self.engine.detect_mixed(({}, ANTONYM_DICT)),
+                         (None, self.engine.detect('antonyms', ANTONYM_DICT)))
+        self.assertEqual(self.engine.detect_mixed((SYNONYM_DICT, {})),
+                         (self.engine.detect('synonyms', SYNONYM_DICT), None))
+
+    def test_stats(self):
+        self.engine.detect('antonyms', ANTONYM_DICT)
+        stats = self.engine.stats()
+        self.assertEqual(set(stats), {'antonyms', 'synonyms'})
+        self.assertGreater(stats['antonyms']['size'], 0)
+
+    def test_split_wordpack(self):
+        self.assertEqual(split_wordpack({'hot': ['tepid'], 'ANT-hot ': ['cold'], 'warm': ['balmy']}),
+                         ({'hot': ['tepid'], 'warm': ['balmy']}, {'hot': ['cold']}))
+
+    def test_generate_mixed_wordpacks(self):
+        wordpacks_file = os.path.join(self.tmp_dir.name, 'wordpacks.txt')
+        with open(wordpacks_file, 'w') as fh:
+            fh.write("### 1 ###\n@ hot = tepid\n@ ANT-hot = cold\n### 2 ###\n@ ANT-cold = cool\n")
+
+        self.assertEqual(list(generate_mixed_wordpacks(wordpacks_file)), [
+            ('### 1 ###', ({'hot': ['tepid']}, {'hot': ['cold']})),
+            ('### 2 ###', ({}, {'cold': ['cool']}))
+            ])
+
+class DetectAmbiguitiesTest(unittest.TestCase):
+    """Checks that detect-ambiguities.py writes the outputs of detect-antonyms.py and
+    detect-synonyms.py, which reads '@ ANT-term =' lines as synonym base terms too and is therefore
+    run on the wordpacks file without them
+    """
+    PACKS = 40
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.relations_file = os.path.join(cls.tmp_dir.name, 'relations.txt')
+        cls.synonyms_file = os.path.join(cls.tmp_dir.name, 'synonyms.txt')
+        cls.mixed_file = os.path.join(cls.tmp_dir.name, 'mixed.txt')
+
+        words = generate_words(300)
+        relations = {}
+        with open(cls.relations_file, 'w') as fh:
+            generate_relations(fh, words, relations=relations)
+        antonym_lines = cls.generate(words, relations, True, seed=1)
+        synonym_lines = cls.generate(words, relations, False, seed=2)
+
+        # Every wordpack holds both kinds of base terms, except the last one which only holds antonyms
+        with open(cls.mixed_file, 'w') as mixed_fh, open(cls.synonyms_file, 'w') as synonyms_fh:
+            for pack in range(cls.PACKS):
+                title = f"### {pack + 1} ###\n"
+                mixed_fh.write(title)
+                if pack < cls.PACKS - 1:
+                    synonyms_fh.write(title + ''.join(synonym_lines[pack]))
+                    mixed_fh.write(''.join(synonym_lines[pack]))
+                mixed_fh.write(''.join(antonym_lines[pack]))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+
+    @classmethod
+    def generate(cls, words, relations, antonyms, seed):
+        # The base term lines of each wordpack generated
+        wordpacks_file = os.path.join(cls.tmp_dir.name, 'generated.txt')
+        with open(wordpacks_file, 'w') as fh:
+            generate_wordpacks(fh, words, packs=cls.PACKS, antonyms=antonyms, seed=seed, relations=relations)
+
+        packs = []
+        with open(wordpacks_file, 'r') as fh:
+            for line in fh:
+                if line.startswith('###'):
+                    packs.append([])
+                else:
+                    packs[-1].append(line)
+
+        return packs
+
+    def run_script(self, script, *options):
+        subprocess.run([sys.executable, os.path.join(ROOT_DIR, script), '-r', self.relations_file, '--no-cache',
+                        '--log-level', 'WARNING', *options], check=True, cwd=self.tmp_dir.name)
+
+    def read(self, name):
+        with open(os.path.join(self.tmp_dir.name, name), 'r') as fh:
+            return fh.read()
+
+    def test_outputs_of_the_separate_scripts(self):
+        for options in [(), ('--format', 'tsv'), ('--workers', '2'), ('--pipeline',)]:
+            with self.subTest(options=options):
+                self.run_script('detect-antonyms.py', '-w', self.mixed_file, '-o', 'antonyms.expected', *options)
+                self.run_script('detect-synonyms.py', '-w', self.synonyms_file, '-o', 'synonyms.expected', *options)
+                self.run_script('detect-ambiguities.py', '-w', self.mixed_file, '--antonyms-output', 'antonyms.out',
+                                '--synonyms-output', 'synonyms.out', *options)
+
+                self.assertEqual(self.read('antonyms.out'), self.read('antonyms.expected'))
+                self.assertEqual(self.read('synonyms.out'), self.read('synonyms.expected'))
+                if not options:
+                    self.assertIn('[ ', self.read('antonyms.out'))
+                    self.assertIn('[ ', self.read('synonyms.out'))
+                self.assertNotIn(f"### {self.PACKS} ###", self.read('synonyms.out'))
+
+if __name__ == '__main__':
+    unittest.main()
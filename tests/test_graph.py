@@ -0,0 +1,346 @@
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import tempfile
+import unittest
+
+from worddata.ambiguity import AmbiguityIndex, NeighborhoodMemo, create_antonym_index, create_synonym_index
+from worddata.ambiguity import expand_synonyms, find_overlaps
+from worddata.ambiguity import get_ambiguous_antonyms, get_ambiguous_synonyms
+from worddata.cache import open_compiled_graphs, write_compiled_graphs
+from worddata.graph import Graph, expand_neighborhood
+
+def create_graph(edges):
+    '''
+    Returns:
+        Graph -- A graph of the (word, word, score) edges
+    '''
+    graph = Graph()
+    for name_u, name_v, score in edges:
+        graph.add_node(name_u)
+        graph.add_node(name_v)
+        graph.add_edge(name_u, name_v, score)
+
+    return graph
+
+# big - large - huge - enormous, with a weak edge between large and vast
+EDGES = [('big', 'large', 9.0), ('large', 'huge', 8.0), ('huge', 'enormous', 7.0), ('large', 'vast', 2.0),
+         ('small', 'tiny', 9.0)]
+
+class GraphTest(unittest.TestCase):
+    def test_add_edge_keeps_the_highest_score(self):
+        for scores, expected in [((5.0, 3.0), 5.0), ((3.0, 5.0), 5.0), ((None, 4.0), 4.0), ((4.0, None), 4.0),
+                                 ((None, None), None)]:
+            with self.subTest(scores=scores):
+                graph = create_graph([('big', 'large', score) for score in scores])
+                self.assertEqual(graph['big'].neighbors, {'large': expected})
+                self.assertEqual(graph['large'].neighbors, {'big': expected})
+                self.assertEqual(graph.edge_count(), 1)
+
+    def test_delete_node_removes_the_edges_to_it(self):
+        graph = create_graph(EDGES + [('large', 'large', 1.0)])
+        graph.delete_node('large')
+        graph.delete_node('unknown')
+
+        self.assertIsNone(graph['large'])
+        self.assertEqual(graph['big'].neighbors, {})
+        self.assertEqual(graph['huge'].neighbors, {'enormous': 7.0})
+        self.assertEqual(graph['vast'].neighbors, {})
+        self.assertEqual(graph.edge_count(), 2)
+
+    def test_edge_count_counts_a_self_loop_once(self):
+        graph = create_graph([('big', 'big', 1.0), ('big', 'large', 9.0)])
+        self.assertEqual(graph['big'].degree, 2)
+        self.assertEqual(graph.edge_count(), 2)
+        self.assertEqual(graph.freeze().edge_count(), 2)
+
+    def test_filter(self):
+        graph = create_graph(EDGES + [('big', 'wide', None)])
+        graph.add_node('alone')
+        filtered = graph.filter(5.0)
+
+        # Unscored edges and edges below the cutoff are dropped, but every word is kept
+        self.assertEqual(set(filtered.nodes), set(graph.nodes))
+        self.assertEqual(filtered['big'].neighbors, {'large': 9.0})
+        self.assertEqual(filtered['large'].neighbors, {'big': 9.0, 'huge': 8.0})
+        self.assertEqual(filtered['vast'].neighbors, {})
+        self.assertEqual(filtered['wide'].neighbors, {})
+        self.assertEqual(filtered['alone'].neighbors, {})
+        self.assertEqual(filtered.edge_count(), 4)
+        # The graph itself is unchanged
+        self.assertEqual(graph['big'].neighbors, {'large': 9.0, 'wide': None})
+
+    def test_words_are_interned(self):
+        graph = Graph()
+        node = graph.add_node(''.join(['bi', 'g']))
+        self.assertIs(node.value, sys.intern('big'))
+        self.assertIs(graph.add_node('big'), node)
+        with self.assertRaises(AttributeError):
+            node.extra = None
+
+class ExpandNeighborhoodTest(unittest.TestCase):
+    def setUp(self):
+        self.graph = create_graph(EDGES)
+
+    def test_hops(self):
+        self.assertEqual(expand_neighborhood(self.graph, 'big', 0), frozenset())
+        self.assertEqual(expand_neighborhood(self.graph, 'big', 1), {'large'})
+        self.assertEqual(expand_neighborhood(self.graph, 'big', 2), {'large', 'huge', 'vast'})
+        self.assertEqual(expand_neighborhood(self.graph, 'big', 5), {'large', 'huge', 'vast', 'enormous'})
+
+    def test_start_word_is_left_out(self):
+        # Every path of two hops or more from large leads back to it through its neighbors
+        self.assertNotIn('large', expand_neighborhood(self.graph, 'large', 4))
+
+    def test_unknown_word(self):
+        self.assertEqual(expand_neighborhood(self.graph, 'unknown', 2), frozenset())
+
+    def test_score_cutoff(self):
+        self.assertEqual(expand_neighborhood(self.graph, 'big', 2, score_cutoff=5.0), {'large', 'huge'})
+
+    def test_unscored_edges_are_only_followed_without_cutoff(self):
+        graph = create_graph([('big', 'large', None)])
+        self.assertEqual(expand_neighborhood(graph, 'big', 1), {'large'})
+        self.assertEqual(expand_neighborhood(graph, 'big', 1, score_cutoff=1.0), frozenset())
+
+    def test_max_frontier_expands_the_best_scored_words(self):
+        graph = create_graph([('big', 'large', 9.0), ('big', 'vast', 1.0), ('large', 'huge', 9.0),
+                              ('vast', 'wide', 9.0)])
+        # vast is still part of the neighborhood but only large is expanded at the next hop
+        self.assertEqual(expand_neighborhood(graph, 'big', 2, max_frontier=1), {'large', 'vast', 'huge'})
+
+    def test_memo(self):
+        memo = {}
+        neighborhood = expand_neighborhood(self.graph, 'big', 2, memo=memo)
+        self.assertIs(memo[('big', 2)], neighborhood)
+        self.assertIs(expand_neighborhood(self.graph, 'big', 2, memo=memo), neighborhood)
+
+    def test_memo_is_bounded_by_the_index_size(self):
+        # A chain of words, each reaching different words in two hops
+        graph = create_graph([(f"word{i}", f"word{i + 1}", 9.0) for i in range(50)])
+        words = [f"word{i}" for i in range(51)]
+        for index in [create_synonym_index(graph, 5, hops=2), create_antonym_index(graph, graph, 5, hops=2)]:
+            with self.subTest(index=index):
+                index.precompute(words)
+                for word in words:
+                    index[word]
+                self.assertEqual(len(index.memo), 5)
+                self.assertEqual(index.stats()['memo_size'], 5)
+
+        memo = NeighborhoodMemo(2)
+        for word in ['big', 'large', 'big', 'huge']:
+            expand_neighborhood(self.graph, word, 2, memo=memo)
+        # large was the least recently used
+        self.assertEqual(len(memo), 2)
+        self.assertIsNone(memo.get(('large', 2)))
+        self.assertEqual(memo.get(('big', 2)), {'large', 'huge', 'vast'})
+
+        # An index that keeps nothing doesn't memoize either
+        memo = NeighborhoodMemo(0)
+        expand_neighborhood(self.graph, 'big', 2, memo=memo)
+        self.assertEqual(len(memo), 0)
+
+    def test_mapped_and_frozen_graphs(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'graphs.bin')
+            write_compiled_graphs(path, {'synonyms': self.graph})
+            mapped = open_compiled_graphs(path)['synonyms']
+            for hops in range(4):
+                expected = expand_neighborhood(self.graph, 'big', hops, 5.0)
+                self.assertEqual(mapped.expand('big', hops, 5.0), expected)
+                self.assertEqual(self.graph.freeze().expand('big', hops, 5.0), expected)
+
+class FrozenGraphTest(unittest.TestCase):
+    def setUp(self):
+        self.graph = create_graph(EDGES)
+        self.frozen = self.graph.freeze()
+
+    def test_snapshot(self):
+        self.assertEqual(len(self.frozen), len(self.graph))
+        self.assertEqual(self.frozen.edge_count(), self.graph.edge_count())
+        self.assertEqual(self.frozen.degree('large'), 3)
+        self.assertEqual(self.frozen.degree('unknown'), 0)
+        self.assertEqual(self.frozen['large'].neighbor_set, frozenset({'big', 'huge', 'vast'}))
+        self.assertEqual(dict(self.frozen['large'].neighbors), {'big': 9.0, 'huge': 8.0, 'vast': 2.0})
+        self.assertIsNone(self.frozen['unknown'])
+        self.assertIs(self.frozen.freeze(), self.frozen)
+
+    def test_later_changes_to_the_graph_are_not_seen(self):
+        self.graph.add_edge('big', 'vast', 5.0)
+        self.assertNotIn('vast', self.frozen['big'].neighbor_set)
+
+    def test_immutable(self):
+        with self.assertRaises(TypeError):
+            self.frozen.nodes['new'] = None
+        with self.assertRaises(TypeError):
+            self.frozen['big'].neighbors['new'] = 1.0
+        with self.assertRaises(AttributeError):
+            self.frozen['big'].neighbor_set.add('new')
+
+    def test_equality_and_hash(self):
+        # The same edges added in another order
+        other = create_graph(reversed(EDGES)).freeze()
+        self.assertEqual(other, self.frozen)
+        self.assertEqual(hash(other), hash(self.frozen))
+        self.assertEqual(len({self.frozen, other}), 1)
+
+        changed = create_graph(EDGES[:-1] + [('small', 'tiny', 8.0)]).freeze()
+        self.assertNotEqual(changed, self.frozen)
+
+    def test_detection_matches_the_graph(self):
+        antonyms = create_graph([('big', 'small', 9.0), ('large', 'tiny', 8.0), ('huge', 'tiny', 7.0)])
+        wordpack_dict = {'big': ['tiny', 'little'], 'small': ['large', 'huge'], 'large': ['small', 'minute']}
+
+        self.assertEqual(get_ambiguous_antonyms(antonyms.freeze(), self.frozen, wordpack_dict,
+                                                create_antonym_index(antonyms.freeze(), self.frozen)),
+                         get_ambiguous_antonyms(antonyms, self.graph, wordpack_dict,
+                                                create_antonym_index(antonyms, self.graph)))
+        self.assertEqual(get_ambiguous_synonyms(self.frozen, wordpack_dict, create_synonym_index(self.frozen, hops=1)),
+                         get_ambiguous_synonyms(self.graph, wordpack_dict, create_synonym_index(self.graph, hops=1)))
+
+class AmbiguityIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.expanded = []
+        def expand(term):
+            self.expanded.append(term)
+            return {term.upper()}
+        self.expand = expand
+
+    def test_expansions_are_computed_once(self):
+        index = AmbiguityIndex(self.expand, 10)
+        self.assertEqual(index['big'], frozenset({'BIG'}))
+        self.assertIsInstance(index['big'], frozenset)
+        self.assertEqual(self.expanded, ['big'])
+        self.assertIn('big', index)
+        self.assertEqual(len(index), 1)
+
+    def test_least_recently_used_is_evicted(self):
+        index = AmbiguityIndex(self.expand, 2)
+        index['big']
+        index['small']
+        # A hit makes big the most recently used
+        index['big']
+        index['huge']
+
+        self.assertNotIn('small', index)
+        self.assertIn('big', index)
+        self.assertIn('huge', index)
+        index['small']
+        self.assertNotIn('big', index)
+        self.assertEqual(self.expanded, ['big', 'small', 'huge', 'small'])
+
+    def test_stats(self):
+        index = AmbiguityIndex(self.expand, 2)
+        self.assertEqual(index.stats()['hit_rate'], 0.0)
+        for term in ['big', 'big', 'small', 'huge', 'big', 'huge']:
+            index[term]
+
+        self.assertEqual(index.stats(), {
+            'size': 2,
+            'max_size': 2,
+            'precomputed': 0,
+            'hits': 2,
+            'misses': 4,
+            'evictions': 2,
+            'hit_rate': 2 / 6,
+            'memo_size': 0
+            })
+
+    def test_precompute(self):
+        index = AmbiguityIndex(self.expand, 2)
+        index.precompute(['big', 'big', 'small', 'huge'])
+
+        # Precomputing stops once the index is full and doesn't count lookups
+        self.assertEqual(self.expanded, ['big', 'small'])
+        stats = index.stats()
+        self.assertEqual((stats['precomputed'], stats['hits'], stats['misses'], stats['evictions']), (2, 0, 0, 0))
+        index['small']
+        self.assertEqual(index.stats()['hits'], 1)
+
+    def test_size_zero_keeps_nothing(self):
+        index = AmbiguityIndex(self.expand, 0)
+        self.assertEqual(index['big'], frozenset({'BIG'}))
+        self.assertEqual(index['big'], frozenset({'BIG'}))
+        index.precompute(['small'])
+
+        self.assertEqual(self.expanded, ['big', 'big'])
+        self.assertEqual(len(index), 0)
+        stats = index.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['evictions'], stats['precomputed']), (0, 2, 0, 0))
+
+def find_overlaps_by_pairs(wordpack_dict, expansions):
+    '''
+    The comparison of every pair of base terms that find_overlaps replaced
+
+    Returns:
+        dict -- The same structure as find_overlaps
+    '''
+    return_ds = {}
+    for base_term, related_terms in wordpack_dict.items():
+        return_ds[base_term] = {'overlap': [], 'related_terms': []}
+        for base_term2 in wordpack_dict:
+            if base_term == base_term2:
+                continue
+            for related_term in related_terms:
+                if related_term in expansions[base_term2]:
+                    return_ds[base_term]['overlap'].append(base_term2)
+                    return_ds[base_term]['related_terms'].append(related_term)
+
+    return return_ds
+
+class FindOverlapsTest(unittest.TestCase):
+    def test_overlaps(self):
+        wordpack_dict = {
+            # cold is listed twice
+            'hot': ['cold', 'chilly', 'cold'],
+            # cold is in the expansions of hot and of big
+            'cold': ['hot', 'warm', 'cold'],
+            'big': ['small', 'cold'],
+            # dry is in the expansion of big, which comes after cold
+            'wet': ['dry', 'hot']
+            }
+        expansions = {
+            # The expansion of hot contains its own related terms cold and chilly
+            'hot': {'cold', 'chilly', 'small'},
+            'cold': {'hot', 'warm'},
+            'big': {'small', 'cold', 'dry'},
+            'wet': {'rain'}
+            }
+
+        overlaps = find_overlaps(wordpack_dict, expansions)
+        self.assertEqual(overlaps, {
+            'hot': {'overlap': ['big', 'big'], 'related_terms': ['cold', 'cold']},
+            'cold': {'overlap': ['hot', 'big'], 'related_terms': ['cold', 'cold']},
+            'big': {'overlap': ['hot', 'hot'], 'related_terms': ['small', 'cold']},
+            # Ordered by base term and then by related term
+            'wet': {'overlap': ['cold', 'big'], 'related_terms': ['hot', 'dry']}
+            })
+        self.assertEqual(overlaps, find_overlaps_by_pairs(wordpack_dict, expansions))
+
+    def test_no_overlaps(self):
+        wordpack_dict = {'hot': ['cold'], 'big': []}
+        self.assertEqual(find_overlaps(wordpack_dict, {'hot': {'cold'}, 'big': set()}), {
+            'hot': {'overlap': [], 'related_terms': []},
+            'big': {'overlap': [], 'related_terms': []}
+            })
+
+class ExpandSynonymsTest(unittest.TestCase):
+    def setUp(self):
+        self.graph = create_graph(EDGES)
+
+    def test_hops(self):
+        self.assertEqual(expand_synonyms(self.graph, 'big', 0), {'large'})
+        self.assertEqual(expand_synonyms(self.graph, 'big', 1), {'large', 'huge', 'vast'})
+
+    def test_term_is_left_out_of_the_hops(self):
+        # The synonyms of large include big itself
+        self.assertNotIn('big', expand_synonyms(self.graph, 'big', 2))
+
+    def test_no_ambiguity_through_the_term_itself(self):
+        wordpack_dict = {'big': ['tiny'], 'small': ['big']}
+        ambiguities = get_ambiguous_synonyms(self.graph, wordpack_dict, create_synonym_index(self.graph, hops=1))
+        self.assertEqual(ambiguities['small'], {'overlap': [], 'related_terms': []})
+
+if __name__ == '__main__':
+    unittest.main()
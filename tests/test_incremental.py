@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+import io
+import os
+import tempfile
+import unittest
+
+from worddata.incremental import IncrementalState, get_state_key, get_wordpack_hash
+from worddata.output import WordpackWriter
+
+WORDPACKS = [
+    ('### 1 ###', {'hot': ['cold']}),
+    ('### 2 ###', {'big': ['small']}),
+    ('### 3 ###', {'wet': ['dry']})
+    ]
+
+class IncrementalStateTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.state_file = os.path.join(self.tmp_dir.name, 'state.json')
+        self.detected = []
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def detect_wordpacks(self, wordpacks):
+        for wordpack_title, wordpack_dict in wordpacks:
+            self.detected.append(wordpack_title)
+            yield wordpack_title, wordpack_dict, {term: {'overlap': [], 'related_terms': []}
+                                                  for term in wordpack_dict}
+
+    def run_incremental(self, wordpacks, key='key'):
+        self.detected = []
+        state = IncrementalState(self.state_file, key)
+        fh = io.StringIO()
+        with WordpackWriter(fh) as writer:
+            state.write_wordpacks(writer, wordpacks, self.detect_wordpacks)
+        state.save()
+
+        return fh.getvalue(), state
+
+    def test_only_changed_wordpacks_are_detected(self):
+        output, state = self.run_incremental(WORDPACKS)
+        self.assertEqual((state.reused, state.detected), (0, 3))
+
+        changed = [WORDPACKS[0], ('### 2 ###', {'big': ['tiny']}), WORDPACKS[2]]
+        changed_output, state = self.run_incremental(changed)
+        self.assertEqual(self.detected, ['### 2 ###'])
+        self.assertEqual((state.reused, state.detected), (2, 1))
+        # The reused and detected wordpacks are written in order
+        self.assertEqual(changed_output, output.replace('small', 'tiny'))
+
+        self.assertEqual(self.run_incremental(changed)[0], changed_output)
+        self.assertEqual(self.detected, [])
+
+    def test_changed_key_detects_every_wordpack(self):
+        self.run_incremental(WORDPACKS)
+        _, state = self.run_incremental(WORDPACKS, key='other key')
+        self.assertEqual((state.reused, state.detected), (0, 3))
+
+    def test_unreadable_state_detects_every_wordpack(self):
+        with open(self.state_file, 'w') as fh:
+            fh.write("{not json")
+
+        with self.assertLogs('worddata.incremental', 'WARNING'):
+            _, state = self.run_incremental(WORDPACKS)
+        self.assertEqual(state.detected, 3)
+
+    def test_removed_wordpacks_are_dropped_from_the_state(self):
+        self.run_incremental(WORDPACKS)
+        self.run_incremental(WORDPACKS[:1])
+        _, state = self.run_incremental(WORDPACKS)
+        self.assertEqual((state.reused, state.detected), (1, 2))
+
+    def test_wordpack_hash(self):
+        self.assertEqual(get_wordpack_hash('### 1 ###', {'hot': ['cold']}),
+                         get_wordpack_hash('### 1 ###', {'hot': ['cold']}))
+        self.assertNotEqual(get_wordpack_hash('### 1 ###', {'hot': ['cold']}),
+                            get_wordpack_hash('### 2 ###', {'hot': ['cold']}))
+        # The order of the related terms matters to the output
+        self.assertNotEqual(get_wordpack_hash('### 1 ###', {'hot': ['cold', 'cool']}),
+                            get_wordpack_hash('### 1 ###', {'hot': ['cool', 'cold']}))
+
+    def test_state_key(self):
+        relations_file = os.path.join(self.tmp_dir.name, 'relations.txt')
+        with open(relations_file, 'w') as fh:
+            fh.write("#hot[contrast=0.5]:cold;[contrast-score]:9.00;\n")
+
+        key = get_state_key(relations_file, output_format='text')
+        self.assertEqual(get_state_key(relations_file, output_format='text'), key)
+        self.assertNotEqual(get_state_key(relations_file, output_format='tsv'), key)
+
+        with open(relations_file, 'a') as fh:
+            fh.write("#big[contrast=0.5]:small;[contrast-score]:9.00;\n")
+        self.assertNotEqual(get_state_key(relations_file, output_format='text'), key)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from benchmarks.generate import generate_relations, generate_words
+from worddata import loader
+from worddata.diagnostics import clear_diagnostics, get_diagnostics
+from worddata.loader import DEFAULT_ANTONYM_REGEX, DEFAULT_ANTONYM_SCORE_REGEX, DEFAULT_PRIMARY_WORD_REGEX
+from worddata.loader import DEFAULT_ANTONYM_SYNONYM_REGEX, DEFAULT_ANTONYM_SYNONYM_SCORE_REGEX
+from worddata.loader import DEFAULT_SYNONYM_REGEX, DEFAULT_SYNONYM_SCORE_REGEX, RelationSpec
+from worddata.loader import load_words_graph, load_words_graphs, parse_wordpacks
+
+SPECS = {
+    'antonyms': RelationSpec(DEFAULT_ANTONYM_REGEX, DEFAULT_ANTONYM_SCORE_REGEX),
+    'synonyms': RelationSpec(DEFAULT_SYNONYM_REGEX, DEFAULT_SYNONYM_SCORE_REGEX, 6.0)
+    }
+
+def get_edges(graph):
+    '''
+    Returns:
+        dict -- The neighbors and edge scores of each word of a graph
+    '''
+    return {name: dict(node.neighbors) for name, node in graph.nodes.items()}
+
+class LoadWordsGraphsTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.relations_file = os.path.join(self.tmp_dir.name, 'relations.txt')
+        with open(self.relations_file, 'w') as fh:
+            generate_relations(fh, generate_words(500))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+        clear_diagnostics()
+
+    def test_single_pass_matches_a_pass_per_graph(self):
+        graphs = load_words_graphs(self.relations_file, DEFAULT_PRIMARY_WORD_REGEX, SPECS)
+        for name, spec in SPECS.items():
+            with self.subTest(name=name):
+                graph = load_words_graph(self.relations_file, DEFAULT_PRIMARY_WORD_REGEX, spec.words_parser,
+                                         spec.score_parser, score_cutoff=spec.score_cutoff)
+                self.assertEqual(get_edges(graphs[name]), get_edges(graph))
+                self.assertGreater(graph.edge_count(), 0)
+
+    def test_score_cutoff(self):
+        graphs = load_words_graphs(self.relations_file, DEFAULT_PRIMARY_WORD_REGEX, SPECS)
+        scores = [score for node in graphs['synonyms'].nodes.values() for score in node.neighbors.values()]
+        self.assertTrue(scores)
+        self.assertGreaterEqual(min(scores), 6.0)
+
+    def test_parallel_load_matches_a_serial_load(self):
+        graphs = load_words_graphs(self.relations_file, DEFAULT_PRIMARY_WORD_REGEX, SPECS)
+        parallel_graphs = load_words_graphs(self.relations_file, DEFAULT_PRIMARY_WORD_REGEX, SPECS, jobs=3)
+        for name in SPECS:
+            self.assertEqual(get_edges(parallel_graphs[name]), get_edges(graphs[name]))
+
+    def test_vocabularies(self):
+        graphs = load_words_graphs(self.relations_file, DEFAULT_PRIMARY_WORD_REGEX, SPECS)
+        word = max(graphs['antonyms'].nodes, key=lambda name: graphs['antonyms'][name].degree)
+        limited_graphs = load_words_graphs(self.relations_file, DEFAULT_PRIMARY_WORD_REGEX, SPECS,
+                                           vocabularies={'antonyms': {word}})
+
+        # Only the edges touching the word are kept, the graphs without a vocabulary keep every edge
+        for name, node in limited_graphs['antonyms'].nodes.items():
+            for neighbor in node.neighbors:
+                self.assertIn(word, (name, neighbor))
+        self.assertEqual(limited_graphs['antonyms'][word].neighbors, graphs['antonyms'][word].neighbors)
+        self.assertEqual(get_edges(limited_graphs['synonyms']), get_edges(graphs['synonyms']))
+
+# Lines in the default format, then lines the section parser leaves to the regular expressions
+VALID_LINES = [
+    "#big[syn=0.5]:large|huge;[syn-score]:9.10|6.50;[contrast=0.5]:small;[contrast-score]:8.75;\n",
+    "#small[contrast-manual=1.0]:big|large;[contrast-manual-score]:9.00;[narrower=0.2]:tiny;[narrower-score]:7.00;\n",
+    # The antonym synonym score regex matches from the associated tag to the contrast-score tag
+    "#hot[associated=0.3]:warm;[contrast=0.1]:cold;[contrast-score]:9.50;[associated-score]:8.50;\n",
+    "#cold[associated{1}=0.3]:cool|chilly;[broader=0.1]:temperature;[unknown-tag]:ignored;\n",
+    "#warm word[syn=0.5]:hot;[syn-score]:9.00;",
+    ]
+MALFORMED_LINES = [
+    "\n",
+    "no primary word[syn=0.5]:large;[syn-score]:9.00;\n",
+    "#[syn=0.5]:large;[syn-score]:9.00;\n",
+    "#huge\n",
+    "#vast[syn=0.5]:large;[syn-score]:9.00\n",
+    "#wide[syn=0.5]:;[syn-score]:9.00;[syn=0.5]:broad;[syn-score]:8.00;\n",
+    "#tall[syn=0.5]:high[er];[syn-score]:9.00;\n",
+    "#short[syn=0.5]:low;;[syn-score]:9.00;\n",
+    ]
+SECTION_SPECS = dict(SPECS, antonym_synonyms=RelationSpec(DEFAULT_ANTONYM_SYNONYM_REGEX,
+                                                          DEFAULT_ANTONYM_SYNONYM_SCORE_REGEX, 8.0))
+
+class SectionParserTest(unittest.TestCase):
+    """Checks the section parser of the default format against the regular expressions
+    """
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+        clear_diagnostics()
+
+    def load(self, lines, regexes:bool=False):
+        '''
+        Returns:
+            tuple(dict, dict) -- The edges of each graph loaded from the lines and the summary of the diagnostics
+        '''
+        relations_file = os.path.join(self.tmp_dir.name, 'relations.txt')
+        with open(relations_file, 'w') as fh:
+            fh.writelines(lines)
+
+        clear_diagnostics()
+        if regexes:
+            with mock.patch.object(loader, '_get_section_parser', lambda *args: None):
+                graphs = load_words_graphs(relations_file, DEFAULT_PRIMARY_WORD_REGEX, SECTION_SPECS)
+        else:
+            graphs = load_words_graphs(relations_file, DEFAULT_PRIMARY_WORD_REGEX, SECTION_SPECS)
+
+        return {name: get_edges(graph) for name, graph in graphs.items()}, get_diagnostics('worddata.loader').summary()
+
+    def test_only_default_regexes(self):
+        self.assertIsNotNone(loader._get_section_parser(DEFAULT_PRIMARY_WORD_REGEX, SECTION_SPECS))
+        self.assertIsNone(loader._get_section_parser(r"^#(\w+)", SECTION_SPECS))
+        self.assertIsNone(loader._get_section_parser(DEFAULT_PRIMARY_WORD_REGEX,
+                                                     {'antonyms': RelationSpec(r"\[ant\]:([^;]+)", DEFAULT_ANTONYM_SCORE_REGEX)}))
+
+    def test_lines_left_to_the_regexes(self):
+        parser = loader._get_section_parser(DEFAULT_PRIMARY_WORD_REGEX, SECTION_SPECS)
+        for line in VALID_LINES:
+            self.assertIsNotNone(parser.parse(line), line)
+        for line in MALFORMED_LINES:
+            self.assertIsNone(parser.parse(line), line)
+
+    def test_valid_lines(self):
+        edges, summary = self.load(VALID_LINES)
+        self.assertEqual((edges, summary), self.load(VALID_LINES, regexes=True))
+
+        # The best score of a relation listed twice is kept and large has no score on the line of small
+        self.assertEqual(edges['antonyms']['big'], {'small': 9.0})
+        self.assertEqual(edges['antonyms']['small'], {'big': 9.0})
+        self.assertEqual(edges['synonyms']['warm word'], {'hot': 9.0})
+        self.assertEqual(edges['antonym_synonyms']['hot'], {'warm': 9.5, 'warm word': 9.0})
+        # Words without a score and the words of unknown tags are not added
+        self.assertNotIn('cool', edges['antonym_synonyms'])
+        self.assertNotIn('ignored', edges['synonyms'])
+        self.assertEqual(summary['score_not_found']['count'], 6)
+        self.assertEqual(summary['scores_not_found']['count'], 3)
+
+    def test_malformed_lines(self):
+        lines = VALID_LINES[:1] + MALFORMED_LINES + VALID_LINES[1:-1]
+        edges, summary = self.load(lines)
+        self.assertEqual((edges, summary), self.load(lines, regexes=True))
+        self.assertEqual(summary['primary_word_not_found']['count'], 3)
+        # The empty section of wide isn't matched, so its first score goes to the words of the next section
+        self.assertEqual(edges['synonyms']['broad'], {'wide': 9.0})
+
+    def test_generated_file(self):
+        with open(os.path.join(self.tmp_dir.name, 'generated.txt'), 'w') as fh:
+            generate_relations(fh, generate_words(300))
+        with open(fh.name) as fh:
+            lines = fh.readlines()
+        self.assertEqual(self.load(lines), self.load(lines, regexes=True))
+
+class ParseWordpacksTest(unittest.TestCase):
+    def test_wordpacks(self):
+        lines = ["Lines before the first title are ignored\n",
+                 "@ ANT-ignored = term\n",
+                 "### 1 ###\n",
+                 "@ ANT-hot = cold · cool\n",
+                 "not a term line\n",
+                 "@ ANT-café = thé\n",
+                 "### 2 ###\n",
+                 "### 3 ###\n",
+                 "@ ANT-big = small\n"]
+
+        # Wordpacks without terms are left out
+        self.assertEqual(list(parse_wordpacks(lines)), [
+            ('### 1 ###', {'hot': ['cold', 'cool'], 'café': ['thé']}),
+            ('### 3 ###', {'big': ['small']})
+            ])
+
+    def test_term_format(self):
+        lines = ["### 1 ###\n", "@ hot = warm\n", "@ ANT-hot = cold\n"]
+        self.assertEqual(list(parse_wordpacks(lines, term_format='^@ ([^=]+) =')),
+                         [('### 1 ###', {'hot': ['warm'], 'ANT-hot': ['cold']})])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+import io
+import json
+import unittest
+
+from worddata.output import TSV_HEADER, WordpackWriter, get_matching_base_terms
+
+WORDPACK_DICT = {'tree': ['maple', 'dog', 'green'], 'dog': ['rover', 'canine']}
+
+# dog is both a related term of tree and a base term of the wordpack
+AMBIGUITIES = {
+    'tree': {'overlap': ['dog'], 'related_terms': ['dog']},
+    'dog': {'overlap': [], 'related_terms': []}
+    }
+
+class WordpackWriterTest(unittest.TestCase):
+    def render(self, output_format, **kwargs):
+        fh = io.StringIO()
+        with WordpackWriter(fh, output_format, **kwargs) as writer:
+            rendered = writer.write('### 1 ###', WORDPACK_DICT, AMBIGUITIES)
+
+        return fh.getvalue(), rendered
+
+    def test_text(self):
+        output, rendered = self.render('text', term_prefix='ANT-')
+        self.assertEqual(output, "### 1 ###\n"
+                                 "[ dog ] @ ANT-tree = maple · [ dog : dog ] · green\n"
+                                 "@ ANT-dog = rover · canine\n")
+        self.assertEqual(rendered, output)
+
+    def test_jsonl(self):
+        output, _ = self.render('jsonl')
+        self.assertEqual(json.loads(output), {
+            'wordpack': '### 1 ###',
+            'terms': [
+                {'base_term': 'tree', 'related_terms': ['maple', 'dog', 'green'],
+                 'ambiguous': [{'related_term': 'dog', 'base_term': 'dog'}]},
+                {'base_term': 'dog', 'related_terms': ['rover', 'canine'], 'ambiguous': []}
+                ]
+            })
+
+    def test_tsv(self):
+        output, _ = self.render('tsv')
+        self.assertEqual(output, TSV_HEADER +
+                         "### 1 ###\ttree\tmaple\t\n"
+                         "### 1 ###\ttree\tdog\tdog\n"
+                         "### 1 ###\ttree\tgreen\t\n"
+                         "### 1 ###\tdog\trover\t\n"
+                         "### 1 ###\tdog\tcanine\t\n")
+
+        output, _ = self.render('tsv', header=False)
+        self.assertFalse(output.startswith(TSV_HEADER))
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            WordpackWriter(io.StringIO(), 'csv')
+
+    def test_batches(self):
+        fh = io.StringIO()
+        flushed = []
+        writer = WordpackWriter(fh, batch_size=40, on_flush=lambda wordpacks: flushed.append((fh.getvalue(), wordpacks)))
+        rendered = writer.write('### 1 ###', WORDPACK_DICT, AMBIGUITIES)
+        self.assertEqual(flushed, [(rendered, 1)])
+
+        writer.write_rendered("### 2 ###\n")
+        self.assertEqual(fh.getvalue(), rendered)
+        writer.flush()
+        self.assertEqual(fh.getvalue(), rendered + "### 2 ###\n")
+        self.assertEqual(flushed[1], (rendered + "### 2 ###\n", 1))
+
+        # Nothing left to write
+        writer.flush()
+        self.assertEqual(len(flushed), 2)
+
+    def test_header_is_not_counted_as_a_wordpack(self):
+        flushed = []
+        with WordpackWriter(io.StringIO(), 'tsv', on_flush=flushed.append) as writer:
+            writer.write('### 1 ###', WORDPACK_DICT, AMBIGUITIES)
+            writer.write('### 2 ###', WORDPACK_DICT, AMBIGUITIES)
+        self.assertEqual(flushed, [2])
+
+    def test_first_matching_base_term(self):
+        ambiguity = {'overlap': ['tree', 'dog'], 'related_terms': ['canine', 'canine']}
+        self.assertEqual(get_matching_base_terms(ambiguity), {'canine': 'tree'})
+
+if __name__ == '__main__':
+    unittest.main()
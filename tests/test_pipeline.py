@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+import io
+import threading
+import unittest
+
+from worddata.pipeline import BackgroundTask, BackgroundWriter, prefetch
+
+class PrefetchTest(unittest.TestCase):
+    def test_order(self):
+        self.assertEqual(list(prefetch(range(1000), chunksize=7, queue_size=2)), list(range(1000)))
+        self.assertEqual(list(prefetch([])), [])
+
+    def test_exception_is_raised_again(self):
+        def items():
+            yield from range(10)
+            raise KeyError('missing')
+
+        received = []
+        with self.assertRaises(KeyError):
+            for item in prefetch(items(), chunksize=3):
+                received.append(item)
+        self.assertEqual(received, list(range(9)))
+
+    def test_producer_stops_with_the_consumer(self):
+        threads = threading.active_count()
+        produced = []
+        def items():
+            for item in range(1000):
+                produced.append(item)
+                yield item
+
+        items_prefetched = prefetch(items(), chunksize=1, queue_size=1)
+        self.assertEqual(next(items_prefetched), 0)
+        items_prefetched.close()
+
+        # The producer is joined, so it doesn't read any further
+        self.assertEqual(threading.active_count(), threads)
+        self.assertLess(len(produced), 10)
+
+class BackgroundTaskTest(unittest.TestCase):
+    def test_result(self):
+        self.assertEqual(BackgroundTask(sorted, [3, 1, 2], reverse=True).result(), [3, 2, 1])
+
+    def test_exception_is_raised_again(self):
+        task = BackgroundTask(int, 'not a number')
+        with self.assertRaises(ValueError):
+            task.result()
+
+class _FailingFile(io.StringIO):
+    def write(self, text):
+        if 'fail' in text:
+            raise OSError("No space left on device")
+        return super().write(text)
+
+class BackgroundWriterTest(unittest.TestCase):
+    def test_writes(self):
+        fh = io.StringIO()
+        with BackgroundWriter(fh, queue_size=2) as writer:
+            for i in range(100):
+                writer.write(f"line {i}\n")
+            self.assertEqual(writer.tell(), len(''.join(f"line {i}\n" for i in range(100))))
+
+        self.assertEqual(fh.getvalue().splitlines(), [f"line {i}" for i in range(100)])
+        self.assertFalse(fh.closed)
+
+    def test_error_is_raised_by_the_next_call(self):
+        fh = _FailingFile()
+        writer = BackgroundWriter(fh)
+        writer.write("first\n")
+        writer.write("fail\n")
+        with self.assertRaises(OSError):
+            writer.flush()
+
+        # The error is only raised once
+        writer.write("last\n")
+        writer.close()
+        self.assertEqual(fh.getvalue(), "first\nlast\n")
+
+if __name__ == '__main__':
+    unittest.main()
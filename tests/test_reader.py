@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+import gzip
+import os
+import tempfile
+import unittest
+
+from worddata.loader import generate_wordpacks
+from worddata.reader import get_compression, open_binary, open_text
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+WORDPACKS = """### 1 ###
+@ ANT-hot = cold · cool
+@ ANT-café = tea
+### 2 ###
+@ ANT-big = small
+"""
+
+class ReaderTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.plain_file = os.path.join(self.tmp_dir.name, 'wordpacks.txt')
+        with open(self.plain_file, 'w') as fh:
+            fh.write(WORDPACKS)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write_gzip(self):
+        gzip_file = os.path.join(self.tmp_dir.name, 'wordpacks.txt.gz')
+        with open(self.plain_file, 'rb') as fh, gzip.open(gzip_file, 'wb') as gz:
+            gz.write(fh.read())
+        return gzip_file
+
+    def read_lines(self, file, **kwargs):
+        with open_text(file, **kwargs) as fh:
+            return list(fh)
+
+    def test_get_compression(self):
+        self.assertIsNone(get_compression(self.plain_file))
+        self.assertEqual(get_compression(self.write_gzip()), 'gzip')
+
+    def test_empty_file(self):
+        empty_file = os.path.join(self.tmp_dir.name, 'empty.txt')
+        open(empty_file, 'w').close()
+        self.assertIsNone(get_compression(empty_file))
+        self.assertEqual(self.read_lines(empty_file), [])
+
+    def test_gzip_lines_match_the_plain_lines(self):
+        with open(self.plain_file, 'r') as fh:
+            expected = list(fh)
+
+        self.assertEqual(self.read_lines(self.plain_file), expected)
+        self.assertEqual(self.read_lines(self.write_gzip()), expected)
+        # Lines spanning several blocks are decoded whole
+        self.assertEqual(self.read_lines(self.write_gzip(), block_size=8), expected)
+
+    def test_open_binary(self):
+        with open(self.plain_file, 'rb') as fh:
+            expected = fh.read()
+
+        with open_binary(self.write_gzip()) as fh:
+            self.assertEqual(fh.read(), expected)
+
+    def test_compressed_wordpacks(self):
+        self.assertEqual(list(generate_wordpacks(self.write_gzip())), list(generate_wordpacks(self.plain_file)))
+
+    @unittest.skipIf(zstandard is None, "zstandard is not installed")
+    def test_zstd_lines_match_the_plain_lines(self):
+        zstd_file = os.path.join(self.tmp_dir.name, 'wordpacks.txt.zst')
+        with open(zstd_file, 'wb') as fh:
+            with open(self.plain_file, 'rb') as plain:
+                fh.write(zstandard.ZstdCompressor().compress(plain.read()))
+
+        self.assertEqual(get_compression(zstd_file), 'zstd')
+        self.assertEqual(self.read_lines(zstd_file), self.read_lines(self.plain_file))
+
+if __name__ == '__main__':
+    unittest.main()
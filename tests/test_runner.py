@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+
+import argparse
+from contextlib import redirect_stderr
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from benchmarks.generate import generate_relations, generate_wordpacks, generate_words
+from worddata.runner import DetectionRun
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+try:
+    import numpy
+    import scipy
+except ImportError:
+    numpy = None
+
+class _DetectionScriptTest:
+    """Runs a detection script with different options and checks that they all give the output of
+    a plain run
+    """
+    script = None
+    antonyms = None
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.relations_file = os.path.join(cls.tmp_dir.name, 'relations.txt')
+        cls.wordpacks_file = os.path.join(cls.tmp_dir.name, 'wordpacks.txt')
+
+        words = generate_words(300)
+        relations = {}
+        with open(cls.relations_file, 'w') as fh:
+            generate_relations(fh, words, relations=relations)
+        with open(cls.wordpacks_file, 'w') as fh:
+            generate_wordpacks(fh, words, packs=60, antonyms=cls.antonyms, relations=relations)
+
+        cls.expected = cls.run_script()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+
+    @classmethod
+    def run_script(cls, *options):
+        output_file = os.path.join(cls.tmp_dir.name, 'output.txt')
+        subprocess.run([sys.executable, os.path.join(ROOT_DIR, cls.script), '-r', cls.relations_file,
+                        '-w', cls.wordpacks_file, '-o', output_file, '--no-cache', '--log-level', 'WARNING',
+                        *options], check=True, cwd=cls.tmp_dir.name)
+        with open(output_file, 'r') as fh:
+            return fh.read()
+
+    def test_ambiguities_are_found(self):
+        self.assertIn('[ ', self.expected)
+
+    def test_options_give_the_same_output(self):
+        for options in [('--pipeline',), ('--workers', '2'), ('--demand-load',), ('--jobs', '2'),
+                        ('--resume',)]:
+            with self.subTest(options=options):
+                self.assertEqual(self.run_script(*options), self.expected)
+
+    @unittest.skipIf(numpy is None, "numpy and scipy are not installed")
+    def test_sparse_engine(self):
+        self.assertEqual(self.run_script('--engine', 'sparse'), self.expected)
+
+    def test_shards_concatenate_to_the_whole_output(self):
+        for output_format in ['text', 'tsv']:
+            with self.subTest(output_format=output_format):
+                expected = self.run_script('--format', output_format)
+                shards = [self.run_script('--format', output_format, '--shard', f"{number}/3")
+                          for number in range(1, 4)]
+                self.assertEqual(''.join(shards), expected)
+
+    def test_incremental(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            state_file = os.path.join(tmp_dir, 'state.json')
+            self.assertEqual(self.run_script('--incremental', state_file), self.expected)
+            # The second run reuses the output of every wordpack
+            self.assertEqual(self.run_script('--incremental', state_file), self.expected)
+
+class AntonymDetectionTest(_DetectionScriptTest, unittest.TestCase):
+    script = 'detect-antonyms.py'
+    antonyms = True
+
+class SynonymDetectionTest(_DetectionScriptTest, unittest.TestCase):
+    script = 'detect-synonyms.py'
+    antonyms = False
+
+class CheckArgumentsTest(unittest.TestCase):
+    def check(self, *options):
+        '''
+        Returns:
+            str -- The error of the parameters, or None if they can be used together
+        '''
+        parser = argparse.ArgumentParser()
+        DetectionRun.add_arguments(parser)
+        args = parser.parse_args(options)
+        stderr = io.StringIO()
+        try:
+            with redirect_stderr(stderr):
+                DetectionRun.check_arguments(parser, args)
+        except SystemExit:
+            return stderr.getvalue()
+
+        return None
+
+    def test_sparse_engine_without_numpy(self):
+        with mock.patch('worddata.runner.np', None):
+            self.assertIn("--engine sparse requires the numpy and scipy packages", self.check('--engine', 'sparse'))
+            self.assertIsNone(self.check('--engine', 'python'))
+
+    def test_incompatible_options(self):
+        for options in [('--mmap', '--no-cache'), ('--hops', '-1'), ('--resume', '--incremental', 'state.json')]:
+            with self.subTest(options=options):
+                self.assertIsNotNone(self.check(*options))
+
+if __name__ == '__main__':
+    unittest.main()
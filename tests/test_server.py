@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+
+from http.server import ThreadingHTTPServer
+import io
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+import urllib.error
+import urllib.request
+
+from worddata.diagnostics import clear_diagnostics
+from worddata.loader import DEFAULT_ANTONYM_REGEX, DEFAULT_ANTONYM_SCORE_REGEX, DEFAULT_PRIMARY_WORD_REGEX
+from worddata.loader import DEFAULT_SYNONYM_REGEX, DEFAULT_SYNONYM_SCORE_REGEX, RelationSpec
+from worddata.engine import DetectorEngine
+from worddata.server import DetectionService, _RequestHandler, serve_lines
+
+RELATIONS = """#hot[contrast=0.5]:cold|cool;[contrast-score]:9.00|7.50;[syn=0.5]:warm;[syn-score]:8.00;
+#cold[contrast=0.5]:hot;[contrast-score]:9.00;[syn=0.5]:chilly;[syn-score]:9.50;
+"""
+
+SPECS = {
+    'antonyms': RelationSpec(DEFAULT_ANTONYM_REGEX, DEFAULT_ANTONYM_SCORE_REGEX),
+    'antonym_synonyms': RelationSpec(DEFAULT_SYNONYM_REGEX, DEFAULT_SYNONYM_SCORE_REGEX, 6.0),
+    'synonyms': RelationSpec(DEFAULT_SYNONYM_REGEX, DEFAULT_SYNONYM_SCORE_REGEX, 6.0)
+    }
+
+# cool, a related term of cold, is an antonym of the other base term hot
+WORDPACK = {'wordpack': '### 1 ###', 'terms': {'hot': ['cold'], 'cold': ['cool']}}
+
+class DetectionServiceTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.relations_file = os.path.join(self.tmp_dir.name, 'relations.txt')
+        with open(self.relations_file, 'w') as fh:
+            fh.write(RELATIONS)
+        self.service = DetectionService(self.relations_file, DEFAULT_PRIMARY_WORD_REGEX, SPECS, cache_dir=None)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+        clear_diagnostics()
+
+    def test_wordpacks(self):
+        response = self.service.handle({'id': 1, 'wordpacks': [WORDPACK]})
+        self.assertEqual(response['id'], 1)
+        self.assertEqual(response['wordpacks'][0]['terms'][1]['ambiguous'],
+                         [{'related_term': 'cool', 'base_term': 'hot'}])
+
+    def test_text(self):
+        text = "### 1 ###\n@ ANT-hot = cold\n@ ANT-cold = cool\n"
+        response = self.service.handle({'id': 1, 'text': text, 'format': 'text'})
+        self.assertEqual(response, {'id': 1, 'text': "### 1 ###\n@ ANT-hot = cold\n[ hot ] @ ANT-cold = [ hot : cool ]\n"})
+
+        # The same wordpacks submitted as text or as records get the same answer
+        self.assertEqual(self.service.handle({'text': text})['wordpacks'],
+                         self.service.handle({'wordpacks': [WORDPACK]})['wordpacks'])
+
+    def test_invalid_requests(self):
+        invalid_requests = [
+            ['not', 'an', 'object'],
+            {'id': 1},
+            {'id': 1, 'wordpacks': WORDPACK},
+            {'id': 1, 'text': 1},
+            {'id': 1, 'mode': 'hypernyms', 'wordpacks': [WORDPACK]},
+            {'id': 1, 'wordpacks': [WORDPACK], 'format': 'xml'},
+            {'id': 1, 'wordpacks': ['### 1 ###']},
+            {'id': 1, 'wordpacks': [{'terms': WORDPACK['terms']}]},
+            {'id': 1, 'wordpacks': [{'wordpack': 1, 'terms': WORDPACK['terms']}], 'format': 'text'},
+            {'id': 1, 'wordpacks': [{'wordpack': '### 1 ###', 'terms': {'hot': 'cold'}}]},
+            {'id': 1, 'wordpacks': [{'wordpack': '### 1 ###', 'terms': {'hot': [1]}}]}
+            ]
+        for request in invalid_requests:
+            with self.subTest(request=request):
+                status, response = self.service.answer(request)
+                self.assertEqual(status, 400)
+                self.assertIn('error', response)
+                self.assertNotIn('wordpacks', response)
+
+    def test_unexpected_exception(self):
+        with mock.patch.object(self.service._engine, 'detect', side_effect=RuntimeError("boom")):
+            with self.assertLogs('worddata.server', 'ERROR'):
+                status, response = self.service.answer({'id': 1, 'wordpacks': [WORDPACK]})
+
+        self.assertEqual(status, 500)
+        self.assertEqual(response, {'id': 1, 'error': "Internal error: boom"})
+        self.assertEqual(self.service.answer({'id': 2, 'wordpacks': [WORDPACK]})[0], 200)
+
+    def test_requests_are_detected_concurrently(self):
+        started = threading.Event()
+        release = threading.Event()
+        detect = self.service._engine.detect
+
+        def blocking_detect(*args):
+            # Only the first request blocks until it is released
+            if not started.is_set():
+                started.set()
+                release.wait(10)
+            return detect(*args)
+
+        responses = []
+        with mock.patch.object(self.service._engine, 'detect', side_effect=blocking_detect):
+            thread = threading.Thread(target=lambda: responses.append(self.service.handle({'wordpacks': [WORDPACK]})))
+            thread.start()
+            try:
+                self.assertTrue(started.wait(10))
+                # The status and other requests are answered while the first request is detected
+                status_thread = threading.Thread(target=self.service.status)
+                status_thread.start()
+                status_thread.join(5)
+                self.assertFalse(status_thread.is_alive())
+                self.assertIn('wordpacks', self.service.handle({'mode': 'synonyms', 'wordpacks': [WORDPACK]}))
+            finally:
+                release.set()
+                thread.join()
+
+        self.assertIn('wordpacks', responses[0])
+        self.assertEqual(self.service.status()['requests'], 2)
+
+    def test_reload_when_the_relations_file_changed(self):
+        self.assertFalse(self.service.reload_if_changed())
+        with open(self.relations_file, 'a') as fh:
+            fh.write("#big[contrast=0.5]:small;[contrast-score]:9.00;\n")
+
+        self.assertTrue(self.service.reload_if_changed())
+        self.assertEqual(self.service.status()['reloads'], 1)
+
+    def test_failed_reload_is_not_retried_until_the_file_changes(self):
+        with open(self.relations_file, 'a') as fh:
+            fh.write("#big[contrast=0.5]:small;[contrast-score]:not a score;\n")
+
+        load = DetectorEngine.load
+        with mock.patch.object(DetectorEngine, 'load', side_effect=load) as engine_load:
+            with self.assertLogs('worddata.server', 'ERROR'):
+                self.assertFalse(self.service.reload_if_changed())
+            failed_fingerprint = self.service.status()['failed_fingerprint']
+            self.assertIsNotNone(failed_fingerprint)
+
+            # The requests are answered with the previous graphs without loading the file again
+            for _ in range(3):
+                self.assertEqual(self.service.answer({'wordpacks': [WORDPACK]})[0], 200)
+            self.assertFalse(self.service.reload_if_changed())
+            self.assertEqual(engine_load.call_count, 1)
+
+            with open(self.relations_file, 'w') as fh:
+                fh.write(RELATIONS + "#big[contrast=0.5]:small;[contrast-score]:9.00;\n")
+            self.assertTrue(self.service.reload_if_changed())
+            self.assertEqual(engine_load.call_count, 2)
+
+        status = self.service.status()
+        self.assertIsNone(status['failed_fingerprint'])
+        self.assertEqual(status['reloads'], 1)
+        self.assertEqual(status['nodes']['antonyms'], 5)
+
+    def test_serve_lines_keeps_serving_after_a_bad_request(self):
+        input_fh = io.StringIO('{"id": 1, "wordpacks": [{"terms": {}}]}\n'
+                               'not json\n'
+                               '\n' +
+                               json.dumps({'id': 3, 'wordpacks': [WORDPACK]}) + '\n')
+        output_fh = io.StringIO()
+        serve_lines(self.service, input_fh, output_fh)
+
+        responses = [json.loads(line) for line in output_fh.getvalue().splitlines()]
+        self.assertEqual([response['id'] for response in responses], [1, None, 3])
+        self.assertIn('error', responses[0])
+        self.assertIn('error', responses[1])
+        self.assertIn('wordpacks', responses[2])
+
+class HTTPServerTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        relations_file = os.path.join(self.tmp_dir.name, 'relations.txt')
+        with open(relations_file, 'w') as fh:
+            fh.write(RELATIONS)
+        self.service = DetectionService(relations_file, DEFAULT_PRIMARY_WORD_REGEX, SPECS, cache_dir=None)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _RequestHandler)
+        self.server.service = self.service
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        self.tmp_dir.cleanup()
+        clear_diagnostics()
+
+    def post(self, path, body=None):
+        host, port = self.server.server_address[:2]
+        request = urllib.request.Request(f"http://{host}:{port}{path}", data=json.dumps(body).encode('utf-8'),
+                                         method='POST')
+        try:
+            with urllib.request.urlopen(request, timeout=10) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read())
+
+    def test_status_codes(self):
+        self.assertEqual(self.post('/detect', {'id': 1, 'wordpacks': [WORDPACK]})[0], 200)
+        self.assertEqual(self.post('/detect', {'id': 2}), (400, {'id': 2, 'error': mock.ANY}))
+
+        with mock.patch.object(self.service._engine, 'detect', side_effect=RuntimeError("boom")):
+            with self.assertLogs('worddata.server', 'ERROR'):
+                self.assertEqual(self.post('/detect', {'id': 3, 'wordpacks': [WORDPACK]}),
+                                 (500, {'id': 3, 'error': "Internal error: boom"}))
+
+        self.assertEqual(self.post('/reload'), (200, {'reloaded': False}))
+        self.assertEqual(self.post('/unknown')[0], 404)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+import random
+import unittest
+
+from worddata.ambiguity import create_antonym_index, create_synonym_index
+from worddata.ambiguity import get_ambiguous_antonyms, get_ambiguous_synonyms
+from worddata.graph import Graph
+from worddata.sparse import create_sparse_antonym_index, create_sparse_synonym_index
+
+try:
+    import numpy
+    import scipy
+except ImportError:
+    numpy = None
+
+WORDS = [f"word{i}" for i in range(60)]
+
+def create_random_graph(rng, edges):
+    '''
+    Returns:
+        Graph -- A graph of random edges between WORDS
+    '''
+    graph = Graph()
+    for _ in range(edges):
+        name_u, name_v = rng.sample(WORDS, 2)
+        graph.add_node(name_u)
+        graph.add_node(name_v)
+        graph.add_edge(name_u, name_v, rng.uniform(0, 10))
+
+    return graph
+
+def create_random_wordpacks(rng, count):
+    '''
+    Returns:
+        list -- Tuples of the title and dictionary of random wordpacks, including unknown words
+    '''
+    words = WORDS + ['unknown']
+    return [(f"### {i} ###", {base_term: rng.sample(words, rng.randint(1, 6))
+                              for base_term in rng.sample(words, rng.randint(1, 5))})
+            for i in range(count)]
+
+@unittest.skipIf(numpy is None, "numpy and scipy are not installed")
+class SparseAmbiguityIndexTest(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(1)
+        self.antonyms_graph = create_random_graph(rng, 80)
+        self.synonyms_graph = create_random_graph(rng, 80)
+        self.wordpacks = create_random_wordpacks(rng, 50)
+
+    def test_antonyms_match_the_python_engine(self):
+        index = create_sparse_antonym_index(self.antonyms_graph, self.synonyms_graph)
+        python_index = create_antonym_index(self.antonyms_graph, self.synonyms_graph)
+
+        results = list(index.detect_wordpacks(self.wordpacks, batch_size=7))
+        self.assertEqual([(title, wordpack_dict) for title, wordpack_dict, _ in results], self.wordpacks)
+        for (_, wordpack_dict), (_, _, ambiguities) in zip(self.wordpacks, results):
+            self.assertEqual(ambiguities, get_ambiguous_antonyms(self.antonyms_graph, self.synonyms_graph,
+                                                                 wordpack_dict, python_index))
+        self.assertEqual(index.batches, 8)
+
+    def test_synonyms_match_the_python_engine(self):
+        index = create_sparse_synonym_index(self.synonyms_graph)
+        python_index = create_synonym_index(self.synonyms_graph)
+
+        for _, wordpack_dict in self.wordpacks:
+            self.assertEqual(index.detect(wordpack_dict),
+                             get_ambiguous_synonyms(self.synonyms_graph, wordpack_dict, python_index))
+
+if __name__ == '__main__':
+    unittest.main()
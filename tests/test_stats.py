@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import pstats
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+from benchmarks.generate import generate_relations, generate_wordpacks, generate_words
+from worddata.stats import LATENCY_PERCENTILES, RunStats, get_latency_summary
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Stages of a run of detect-antonyms.py and detect-synonyms.py
+STAGES = ('parse_wordpacks', 'load_relations', 'build_index', 'detect', 'write_output')
+
+class RunStatsTest(unittest.TestCase):
+    def test_nested_stages_are_deducted(self):
+        stats = RunStats()
+        with stats.stage('outer'):
+            time.sleep(0.02)
+            with stats.stage('inner'):
+                stats.count('items', 3)
+                time.sleep(0.05)
+        stages = stats.report()['stages']
+
+        # The time of the outer stage excludes the time of the inner one
+        self.assertGreaterEqual(stages['inner']['wall_seconds'], 0.05)
+        self.assertLess(stages['outer']['wall_seconds'], stages['inner']['wall_seconds'])
+        self.assertEqual(stages['inner']['counters'], {'items': 3})
+        self.assertEqual(stages['outer']['counters'], {})
+        self.assertGreater(stages['inner']['rates']['items_per_second'], 0)
+        self.assertEqual(stats.counters, {'items': 3})
+
+    def test_latency_summary(self):
+        self.assertEqual(get_latency_summary([]), {'count': 0})
+        summary = get_latency_summary([i / 100 for i in range(100, 0, -1)])
+        self.assertEqual(summary['count'], 100)
+        self.assertEqual(summary['max'], 1.0)
+        self.assertEqual((summary['p50'], summary['p90'], summary['p99']), (0.5, 0.9, 0.99))
+
+class StatsOptionsTest(unittest.TestCase):
+    """Runs detect-antonyms.py with --stats and --profile
+    """
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.relations_file = os.path.join(cls.tmp_dir.name, 'relations.txt')
+        cls.wordpacks_file = os.path.join(cls.tmp_dir.name, 'wordpacks.txt')
+        cls.stats_file = os.path.join(cls.tmp_dir.name, 'stats.json')
+        cls.profile_file = os.path.join(cls.tmp_dir.name, 'profile.out')
+
+        words = generate_words(200)
+        relations = {}
+        with open(cls.relations_file, 'w') as fh:
+            generate_relations(fh, words, relations=relations)
+        # One line per word
+        cls.lines = len(words)
+        with open(cls.wordpacks_file, 'w') as fh:
+            generate_wordpacks(fh, words, packs=30, antonyms=True, relations=relations)
+
+        subprocess.run([sys.executable, os.path.join(ROOT_DIR, 'detect-antonyms.py'), '-r', cls.relations_file,
+                        '-w', cls.wordpacks_file, '-o', os.path.join(cls.tmp_dir.name, 'output.txt'), '--no-cache',
+                        '--log-level', 'WARNING', '--stats', cls.stats_file, '--profile', cls.profile_file],
+                       check=True, cwd=cls.tmp_dir.name)
+        with open(cls.stats_file, 'r') as fh:
+            cls.report = json.load(fh)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+
+    def test_stages(self):
+        for name in STAGES:
+            with self.subTest(stage=name):
+                stage = self.report['stages'][name]
+                self.assertGreaterEqual(stage['wall_seconds'], 0)
+                self.assertGreaterEqual(stage['cpu_seconds'], 0)
+                self.assertIn('peak_rss_kb', stage)
+        self.assertGreater(self.report['wall_seconds'], 0)
+        self.assertGreater(self.report['cpu_seconds'], 0)
+        self.assertIn('peak_rss_kb', self.report)
+
+    def test_counters(self):
+        counters = self.report['counters']
+        self.assertEqual(counters['relations_lines'], self.lines)
+        self.assertEqual(counters['wordpacks'], 30)
+        self.assertGreater(counters['antonyms_edges'], 0)
+        self.assertGreater(counters['synonyms_edges'], 0)
+        self.assertEqual(self.report['stages']['load_relations']['counters']['relations_lines'], self.lines)
+        self.assertIn('ambiguity_index', self.report)
+
+    def test_latency_percentiles(self):
+        latency = self.report['wordpack_latency_seconds']
+        self.assertEqual(latency['count'], 30)
+        for percentile in LATENCY_PERCENTILES:
+            self.assertLessEqual(latency[f'p{percentile}'], latency['max'])
+
+    def test_profile(self):
+        profile = pstats.Stats(self.profile_file)
+        self.assertGreater(profile.total_calls, 0)
+        functions = {function_name for _, _, function_name in profile.stats}
+        self.assertIn('load_words_graphs', functions)
+
+class DemandLoadStatsTest(unittest.TestCase):
+    """Checks that the two passes of --demand-load over the word relations file count its lines and
+    problems once
+    """
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.relations_file = os.path.join(self.tmp_dir.name, 'relations.txt')
+        self.wordpacks_file = os.path.join(self.tmp_dir.name, 'wordpacks.txt')
+        self.stats_file = os.path.join(self.tmp_dir.name, 'stats.json')
+
+        words = generate_words(200)
+        relations = {}
+        with open(self.relations_file, 'w') as fh:
+            # Two lines without a primary word, numbered by the lines parsed before them
+            fh.write("not a word relations line\n")
+            generate_relations(fh, words, relations=relations)
+            fh.write("[syn=0.5]:orphan;[syn-score]:9.00;\n")
+        self.lines = len(words) + 2
+        with open(self.wordpacks_file, 'w') as fh:
+            generate_wordpacks(fh, words, packs=30, antonyms=True, relations=relations)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_lines_and_problems_are_counted_once(self):
+        for options in [(), ('--jobs', '2')]:
+            with self.subTest(options=options):
+                result = subprocess.run([sys.executable, os.path.join(ROOT_DIR, 'detect-antonyms.py'),
+                                         '-r', self.relations_file, '-w', self.wordpacks_file,
+                                         '-o', os.path.join(self.tmp_dir.name, 'output.txt'), '--demand-load',
+                                         '--log-level', 'WARNING', '--stats', self.stats_file, *options],
+                                        check=True, cwd=self.tmp_dir.name, capture_output=True, text=True)
+                with open(self.stats_file, 'r') as fh:
+                    report = json.load(fh)
+
+                self.assertEqual(report['counters']['relations_lines'], self.lines)
+                self.assertEqual(report['counters']['relations_skipped_lines'], 2)
+                problems = report['diagnostics']['worddata.loader']['primary_word_not_found']
+                self.assertEqual(problems['count'], 2)
+                self.assertEqual(problems['examples'], ["Primary word not found on line 0",
+                                                        "Primary word not found on line 200"])
+                self.assertIn("2 occurrences of primary_word_not_found", result.stderr)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+
+import gzip
+import importlib.util
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from benchmarks.generate import generate_relations, generate_wordpacks as write_wordpacks, generate_words
+from worddata.loader import generate_wordpacks
+from worddata.output import WordpackWriter
+from worddata.wordpacks import ResumeCheckpoint, WordpackIndex, get_index_path, parse_shard
+
+def get_wordpacks_text(count):
+    '''
+    Returns:
+        str -- A wordpacks file of count wordpacks, preceded by a line that isn't part of any wordpack
+    '''
+    lines = ["Wordpacks\n"]
+    for i in range(1, count + 1):
+        lines.append(f"### {i} ###\n")
+        lines.append(f"@ ANT-café{i} = thé{i} · cold{i}\n")
+        lines.append(f"@ ANT-big{i} = small{i}\n")
+
+    return ''.join(lines)
+
+class WordpackIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.wordpacks_file = os.path.join(self.tmp_dir.name, 'wordpacks.txt')
+        with open(self.wordpacks_file, 'w') as fh:
+            fh.write(get_wordpacks_text(10))
+        self.wordpacks = list(generate_wordpacks(self.wordpacks_file))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def read(self, index, positions, **kwargs):
+        return list(index.generate_wordpacks(positions, **kwargs))
+
+    def test_build(self):
+        index = WordpackIndex.build(self.wordpacks_file)
+        self.assertEqual(len(index), 10)
+        self.assertEqual(index.titles, [wordpack_title for wordpack_title, _ in self.wordpacks])
+        self.assertEqual(index.size, os.path.getsize(self.wordpacks_file))
+        self.assertEqual(self.read(index, index.select()), self.wordpacks)
+
+    def test_shards_concatenate_to_the_whole_file(self):
+        index = WordpackIndex.build(self.wordpacks_file)
+        shards = [index.select(shard=(number, 3)) for number in range(1, 4)]
+        self.assertEqual([len(positions) for positions in shards], [3, 3, 4])
+        self.assertEqual([wordpack for positions in shards for wordpack in self.read(index, positions)],
+                         self.wordpacks)
+
+    def test_select_titles_and_start(self):
+        index = WordpackIndex.build(self.wordpacks_file)
+        with self.assertLogs('worddata.wordpacks', 'WARNING'):
+            positions = index.select(titles=['### 9 ###', '### 2 ###', '### 3 ###', '### 42 ###'])
+        self.assertEqual(positions, [1, 2, 8])
+        self.assertEqual(self.read(index, positions), [self.wordpacks[1], self.wordpacks[2], self.wordpacks[8]])
+
+        self.assertEqual(list(index.select(start=7)), [7, 8, 9])
+        self.assertEqual(list(index.select(shard=(2, 2), start=3)), [5, 6, 7, 8, 9])
+        self.assertEqual(list(index.select(shard=(1, 2), start=7)), [])
+
+    def test_positions_of_the_wordpacks_read(self):
+        index = WordpackIndex.build(self.wordpacks_file)
+        positions = []
+        self.read(index, [0, 4, 5, 9], on_read=positions.append)
+        self.assertEqual(positions, [0, 4, 5, 9])
+
+    def test_compressed_file(self):
+        gzip_file = self.wordpacks_file + '.gz'
+        with open(self.wordpacks_file, 'rb') as fh, gzip.open(gzip_file, 'wb') as gz:
+            gz.write(fh.read())
+
+        index = WordpackIndex.build(gzip_file)
+        self.assertEqual(index.size, os.path.getsize(self.wordpacks_file))
+        self.assertEqual(self.read(index, index.select(shard=(2, 3))), self.wordpacks[3:6])
+
+    def test_load_reads_the_cached_index(self):
+        cache_dir = os.path.join(self.tmp_dir.name, 'cache')
+        index = WordpackIndex.load(self.wordpacks_file, cache_dir=cache_dir)
+        self.assertTrue(os.path.exists(get_index_path(cache_dir, self.wordpacks_file)))
+
+        with self.assertLogs('worddata.wordpacks', 'INFO') as logs:
+            cached_index = WordpackIndex.load(self.wordpacks_file, cache_dir=cache_dir)
+        self.assertIn('from cache', logs.output[0])
+        self.assertEqual(cached_index.titles, index.titles)
+        self.assertEqual(list(cached_index.offsets), list(index.offsets))
+        self.assertEqual(cached_index.size, index.size)
+
+        # A changed wordpacks file is indexed again
+        with open(self.wordpacks_file, 'a') as fh:
+            fh.write("### 11 ###\n@ ANT-wet = dry\n")
+        self.assertEqual(len(WordpackIndex.load(self.wordpacks_file, cache_dir=cache_dir)), 11)
+
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard('2/4'), (2, 4))
+        for value in ['0/4', '5/4', '2', 'a/b']:
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError):
+                    parse_shard(value)
+
+class ResumeCheckpointTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.output_file = os.path.join(self.tmp_dir.name, 'output.txt')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write_interrupted(self, key='key'):
+        # Writes and checkpoints wordpacks 0 and 1, then writes wordpack 2 without a checkpoint
+        checkpoint = ResumeCheckpoint(self.output_file, key)
+        with checkpoint.open_output() as fh:
+            for position in range(3):
+                checkpoint.track(position)
+            for position in range(2):
+                fh.write(f"wordpack {position}\n")
+                checkpoint.written()
+            checkpoint.save(fh)
+            fh.write("wordpack 2\n")
+
+    def test_resume_after_the_last_checkpoint(self):
+        self.write_interrupted()
+
+        checkpoint = ResumeCheckpoint(self.output_file, 'key')
+        self.assertEqual(checkpoint.start, 2)
+        with checkpoint.open_output() as fh:
+            fh.write("wordpack 2\n")
+        with open(self.output_file, 'r') as fh:
+            self.assertEqual(fh.read(), "wordpack 0\nwordpack 1\nwordpack 2\n")
+
+        checkpoint.remove()
+        self.assertFalse(os.path.exists(checkpoint.path))
+        self.assertEqual(ResumeCheckpoint(self.output_file, 'key').start, 0)
+
+    def test_changed_key_starts_over(self):
+        self.write_interrupted()
+        checkpoint = ResumeCheckpoint(self.output_file, 'other key')
+        self.assertEqual(checkpoint.start, 0)
+
+        with checkpoint.open_output() as fh:
+            fh.write("wordpack 0\n")
+        with open(self.output_file, 'r') as fh:
+            self.assertEqual(fh.read(), "wordpack 0\n")
+
+    def test_shorter_output_starts_over(self):
+        self.write_interrupted()
+        with open(self.output_file, 'w') as fh:
+            fh.write("wordpack 0\n")
+
+        self.assertEqual(ResumeCheckpoint(self.output_file, 'key').start, 0)
+
+    def test_missing_output_starts_over(self):
+        self.write_interrupted()
+        os.unlink(self.output_file)
+
+        self.assertEqual(ResumeCheckpoint(self.output_file, 'key').start, 0)
+
+class InterruptedRunTest(unittest.TestCase):
+    """Interrupts detect-antonyms.py --resume while a wordpack is rendered and checks that the
+    resumed run gives the output of a plain run
+    """
+    @classmethod
+    def setUpClass(cls):
+        root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        spec = importlib.util.spec_from_file_location('detect_antonyms', os.path.join(root_dir, 'detect-antonyms.py'))
+        cls.script = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(cls.script)
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.relations_file = os.path.join(self.tmp_dir.name, 'relations.txt')
+        self.wordpacks_file = os.path.join(self.tmp_dir.name, 'wordpacks.txt')
+
+        words = generate_words(200)
+        relations = {}
+        with open(self.relations_file, 'w') as fh:
+            generate_relations(fh, words, relations=relations)
+        with open(self.wordpacks_file, 'w') as fh:
+            write_wordpacks(fh, words, packs=50, antonyms=True, relations=relations)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def run_script(self, output_file, *options):
+        argv = ['detect-antonyms.py', '-r', self.relations_file, '-w', self.wordpacks_file, '-o', output_file,
+                '--no-cache', '--cache-dir', os.path.join(self.tmp_dir.name, 'cache'), *options]
+        with mock.patch.object(sys, 'argv', argv), self.assertNoLogs(level='WARNING'):
+            args, _ = self.script.get_config()
+            self.script.AntonymDetection(args).run()
+
+        with open(output_file, 'r') as fh:
+            return fh.read()
+
+    def test_resume_after_an_interrupted_render(self):
+        expected = self.run_script(os.path.join(self.tmp_dir.name, 'expected.txt'))
+        render_text = WordpackWriter._render_text
+        renders = 0
+
+        def interrupt_render(writer, *args):
+            nonlocal renders
+            renders += 1
+            if renders == interrupt_at:
+                raise KeyboardInterrupt
+            return render_text(writer, *args)
+
+        # Interrupt within the first batch, and in a later batch after some of them were flushed
+        for interrupt_at, batch_size in [(20, None), (31, 500)]:
+            with self.subTest(interrupt_at=interrupt_at, batch_size=batch_size):
+                renders = 0
+                output_file = os.path.join(self.tmp_dir.name, f"output{interrupt_at}.txt")
+                defaults = WordpackWriter.__init__.__defaults__
+                if batch_size is not None:
+                    defaults = defaults[:2] + (batch_size,) + defaults[3:]
+
+                with mock.patch.object(WordpackWriter, '_render_text', interrupt_render), \
+                        mock.patch.object(WordpackWriter.__init__, '__defaults__', defaults):
+                    with self.assertRaises(KeyboardInterrupt):
+                        self.run_script(output_file, '--resume')
+
+                with open(output_file, 'r') as fh:
+                    self.assertLess(len(fh.read()), len(expected))
+                self.assertEqual(self.run_script(output_file, '--resume'), expected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+
+import importlib.util
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from benchmarks.generate import generate_relations, generate_wordpacks, generate_words
+from worddata import workers
+from worddata.stats import RunStats
+from worddata.workers import DetectionPool, detect_wordpacks
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def detect_slowly(wordpack_dict):
+    # Finishes the wordpacks out of order
+    time.sleep(random.random() / 500)
+    return {base_term: sorted(related_terms) for base_term, related_terms in wordpack_dict.items()}, os.getpid()
+
+def fail_on_wordpack_13(wordpack_dict):
+    if 'term13' in wordpack_dict:
+        raise ValueError("Unable to detect wordpack 13")
+    return {}
+
+def get_wordpacks(count):
+    return [(f"### {i} ###", {f"term{i}": [f"b{i}", f"a{i}"]}) for i in range(count)]
+
+@unittest.skipIf('fork' not in multiprocessing.get_all_start_methods(), "the fork start method is not available")
+class DetectWordpacksTest(unittest.TestCase):
+    def test_order_is_preserved_across_chunks(self):
+        wordpacks = get_wordpacks(100)
+        stats = RunStats()
+        results = list(detect_wordpacks(detect_slowly, iter(wordpacks), workers=3, chunksize=7, stats=stats))
+
+        self.assertEqual([(title, wordpack_dict) for title, wordpack_dict, _ in results], wordpacks)
+        self.assertEqual([result for _, _, (result, _) in results],
+                         [{f"term{i}": [f"a{i}", f"b{i}"]} for i in range(100)])
+        # The wordpacks were detected in the worker processes
+        self.assertNotIn(os.getpid(), {pid for _, _, (_, pid) in results})
+        self.assertEqual(len(stats.latencies), 100)
+
+    def test_single_process(self):
+        results = list(detect_wordpacks(detect_slowly, get_wordpacks(5), workers=1))
+        self.assertEqual({pid for _, _, (_, pid) in results}, {os.getpid()})
+
+    def test_empty_input(self):
+        for workers in [1, 2]:
+            with self.subTest(workers=workers):
+                self.assertEqual(list(detect_wordpacks(detect_slowly, iter([]), workers=workers)), [])
+
+    def test_worker_exception_reaches_the_parent(self):
+        outcome = []
+
+        def consume(pool):
+            try:
+                for wordpack_title, _, _ in pool.detect_wordpacks(get_wordpacks(50), chunksize=4):
+                    outcome.append(wordpack_title)
+            except ValueError as e:
+                outcome.append(e)
+
+        # The pool must not hang on the failed wordpack
+        with DetectionPool(fail_on_wordpack_13, 2) as pool:
+            thread = threading.Thread(target=consume, args=(pool,), daemon=True)
+            thread.start()
+            thread.join(30)
+        self.assertFalse(thread.is_alive())
+
+        self.assertIsInstance(outcome[-1], ValueError)
+        self.assertEqual(str(outcome[-1]), "Unable to detect wordpack 13")
+        # The wordpacks of the chunks before the one of the failed wordpack, 12 to 15, were yielded in order
+        self.assertEqual(outcome[:-1], [f"### {i} ###" for i in range(12)])
+
+    def test_detection_function_is_released(self):
+        with self.assertRaises(ValueError):
+            list(detect_wordpacks(fail_on_wordpack_13, get_wordpacks(20), workers=2, chunksize=4))
+        self.assertIsNone(workers._detect)
+
+        results = detect_wordpacks(detect_slowly, get_wordpacks(20), workers=2, chunksize=4)
+        next(results)
+        self.assertIs(workers._detect, detect_slowly)
+        results.close()
+        self.assertIsNone(workers._detect)
+
+@unittest.skipIf('fork' not in multiprocessing.get_all_start_methods(), "the fork start method is not available")
+class ForkTest(unittest.TestCase):
+    """Checks that the worker processes are forked while the process has a single thread
+    """
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.relations_file = os.path.join(self.tmp_dir.name, 'relations.txt')
+        self.wordpacks_file = os.path.join(self.tmp_dir.name, 'wordpacks.txt')
+
+        words = generate_words(200)
+        relations = {}
+        with open(self.relations_file, 'w') as fh:
+            generate_relations(fh, words, relations=relations)
+        with open(self.wordpacks_file, 'w') as fh:
+            generate_wordpacks(fh, words, packs=30, antonyms=True, relations=relations)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_pipeline_with_workers(self):
+        spec = importlib.util.spec_from_file_location('detect_antonyms', os.path.join(ROOT_DIR, 'detect-antonyms.py'))
+        script = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(script)
+
+        threads = []
+        fork = os.fork
+        def count_threads():
+            threads.append(threading.active_count())
+            return fork()
+
+        argv = ['detect-antonyms.py', '-r', self.relations_file, '-w', self.wordpacks_file,
+                '-o', os.path.join(self.tmp_dir.name, 'output.txt'), '--no-cache', '--pipeline', '--workers', '2']
+        with mock.patch.object(sys, 'argv', argv), mock.patch('os.fork', count_threads):
+            args, _ = script.get_config()
+            script.AntonymDetection(args).run()
+
+        self.assertEqual(threads, [1, 1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,313 @@
+# -*- coding: utf-8 -*-
+
+from collections import OrderedDict
+import logging
+import threading
+
+from worddata.graph import DEFAULT_MAX_FRONTIER
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_SIZE = 100000
+
+# Number of synonym hops taken from the antonyms of a base term and from its synonyms
+DEFAULT_ANTONYM_HOPS = 1
+DEFAULT_SYNONYM_HOPS = 0
+
+def get_ambiguous_antonyms(antonyms_graph, synonyms_graph, wordpack_dict:dict, index=None):
+    '''Iterates through a wordpack and determines if a base term's related terms are antonyms of another base term in the wordpack.
+
+    Consider a wordpack_dict as follows:
+
+    {
+        base_term1: [ antonym1, antonym2, antonym3 ],
+        base_term2: [ antonym4, antonym5, antonym6 ]
+    }
+
+    If antonym3 is also an antonym of base_term2, or a synonym of one of its antonyms, then it's considered ambiguous
+
+    Arguments:
+        antonyms_graph {Graph} -- A graph of antonyms
+        synonyms_graph {Graph} -- A graph of synonyms
+        wordpack_dict {dict} -- A wordpack encapsulated within a dictionary object where keys are the base terms and their value is a list of related terms
+        index {AmbiguityIndex} -- An index created by create_antonym_index for the same graphs, or None to expand the base terms of this wordpack only
+
+    Returns:
+        dict -- A dictionary where keys are the base terms and their value is a dictionary holding the list of
+                'related_terms' that are ambiguous and the list of base terms they 'overlap' with at the same positions
+    '''
+    if index is None:
+        index = create_antonym_index(antonyms_graph, synonyms_graph, 0)
+
+    return find_overlaps(wordpack_dict, {base_term: index[base_term] for base_term in wordpack_dict})
+
+def get_ambiguous_synonyms(synonyms_graph, wordpack_dict:dict, index=None):
+    '''Iterates through a wordpack and determines if a base term's related terms are synonyms of another base term in the wordpack.
+
+    Consider a wordpack_dict as follows:
+
+    {
+        base_term1: [ synonym1, synonym2, synonym3 ],
+        base_term2: [ synonym4, synonym5, synonym6 ]
+    }
+
+    If synonym3 is also an synonym of base_term2, then it's considered ambiguous
+
+    Arguments:
+        synonyms_graph {Graph} -- A graph of synonyms
+        wordpack_dict {dict} -- A wordpack encapsulated within a dictionary object where keys are the base terms and their value is a list of related terms
+        index {AmbiguityIndex} -- An index created by create_synonym_index for the same graph, or None to expand the base terms of this wordpack only
+
+    Returns:
+        dict -- The same structure as get_ambiguous_antonyms
+    '''
+    if index is None:
+        index = create_synonym_index(synonyms_graph, 0)
+
+    return find_overlaps(wordpack_dict, {base_term: index[base_term] for base_term in wordpack_dict})
+
+def create_antonym_index(antonyms_graph, synonyms_graph, max_size:int=DEFAULT_INDEX_SIZE,
+                         hops:int=DEFAULT_ANTONYM_HOPS, hop_cutoff:float=None,
+                         max_frontier:int=DEFAULT_MAX_FRONTIER):
+    '''
+    Returns:
+        AmbiguityIndex -- An index of the antonyms of base terms and the synonyms of those antonyms, see expand_antonyms
+    '''
+    # The synonyms of antonyms are shared by many base terms once they are more than a hop away
+    memo = NeighborhoodMemo(max_size) if hops > DEFAULT_ANTONYM_HOPS or hop_cutoff is not None else None
+
+    return AmbiguityIndex(lambda term: expand_antonyms(antonyms_graph, synonyms_graph, term, hops, hop_cutoff,
+                                                       max_frontier, memo), max_size, memo)
+
+def create_synonym_index(synonyms_graph, max_size:int=DEFAULT_INDEX_SIZE, hops:int=DEFAULT_SYNONYM_HOPS,
+                         hop_cutoff:float=None, max_frontier:int=DEFAULT_MAX_FRONTIER):
+    '''
+    Returns:
+        AmbiguityIndex -- An index of the synonyms of base terms, see expand_synonyms
+    '''
+    memo = NeighborhoodMemo(max_size) if hops > DEFAULT_SYNONYM_HOPS else None
+
+    return AmbiguityIndex(lambda term: expand_synonyms(synonyms_graph, term, hops, hop_cutoff, max_frontier, memo),
+                          max_size, memo)
+
+class AmbiguityIndex:
+    """A bounded least recently used cache of the expanded set of related words of base terms
+
+    The expansion of a base term is computed once from the graphs and shared by every
+    wordpack that contains the base term, so detection only intersects sets. The index can
+    be shared by threads: the cache is updated under a lock, but terms are expanded outside
+    of it.
+    """
+    def __init__(self, expand:callable, max_size:int=DEFAULT_INDEX_SIZE, memo=None):
+        '''
+        Arguments:
+            expand {Callable} -- Returns the expanded set of related words of a term
+            max_size {int} -- The maximum number of expanded terms kept
+            memo {NeighborhoodMemo} -- The memo of the neighborhoods used by expand, if any, reported by stats
+        '''
+        self.max_size = max_size
+        self.memo = memo
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.precomputed = 0
+        self._expand = expand
+        self._expansions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getitem__(self, term):
+        with self._lock:
+            expansion = self._expansions.get(term)
+            if expansion is not None:
+                self.hits += 1
+                self._expansions.move_to_end(term)
+                return expansion
+
+            self.misses += 1
+
+        return self._add(term)
+
+    def __len__(self):
+        return len(self._expansions)
+
+    def __contains__(self, term):
+        return term in self._expansions
+
+    def precompute(self, terms):
+        '''Expands terms up to the size of the index without counting them as hits or misses'''
+        for term in terms:
+            if len(self._expansions) >= self.max_size:
+                break
+            if term not in self._expansions:
+                self._add(term)
+                with self._lock:
+                    self.precomputed += 1
+
+    def stats(self):
+        '''
+        Returns:
+            dict -- The size of the index and its hit and miss counters
+        '''
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._expansions),
+                'max_size': self.max_size,
+                'precomputed': self.precomputed,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'memo_size': 0 if self.memo is None else len(self.memo)
+                }
+
+    def _add(self, term):
+        expansion = frozenset(self._expand(term))
+        if self.max_size > 0:
+            with self._lock:
+                self._expansions[term] = expansion
+                if len(self._expansions) > self.max_size:
+                    self._expansions.popitem(last=False)
+                    self.evictions += 1
+
+        return expansion
+
+class NeighborhoodMemo:
+    """A bounded least recently used memo of the neighborhoods found by expand_neighborhood
+
+    The neighborhoods of the words reached by the hops are shared by many base terms. The
+    memo keeps as many of them as the AmbiguityIndex it serves keeps base terms, so deep
+    hops over a large wordpacks file don't keep every word reached in memory.
+    """
+    def __init__(self, max_size:int=DEFAULT_INDEX_SIZE):
+        self.max_size = max_size
+        self._neighborhoods = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            neighborhood = self._neighborhoods.get(key)
+            if neighborhood is not None:
+                self._neighborhoods.move_to_end(key)
+
+            return neighborhood
+
+    def __setitem__(self, key, neighborhood):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._neighborhoods[key] = neighborhood
+            if len(self._neighborhoods) > self.max_size:
+                self._neighborhoods.popitem(last=False)
+
+    def __len__(self):
+        return len(self._neighborhoods)
+
+def expand_antonyms(antonyms_graph, synonyms_graph, term:str, hops:int=DEFAULT_ANTONYM_HOPS,
+                    hop_cutoff:float=None, max_frontier:int=DEFAULT_MAX_FRONTIER, memo:dict=None):
+    '''
+    Arguments:
+        hops {int} -- Number of synonym hops taken from each antonym
+        hop_cutoff {float} -- The minimum score of the synonyms followed by the hops, or None to follow every synonym
+        max_frontier {int} -- The maximum number of words expanded at each hop, see expand_neighborhood
+        memo {NeighborhoodMemo} -- The synonyms of antonyms found for previous terms with the same settings
+
+    Returns:
+        set -- The antonyms of a term and the synonyms of each of those antonyms up to a number of hops away
+    '''
+    node = antonyms_graph[term]
+    if node is None:
+        return set()
+
+    expanded = set(node.neighbor_set)
+    for antonym in node.neighbor_set:
+        if hops == 1 and hop_cutoff is None:
+            # A single hop reaches the synonyms of the antonym, read without copying them
+            synonym_node = synonyms_graph[antonym]
+            if synonym_node is not None:
+                expanded.update(synonym_node.neighbor_set)
+        else:
+            expanded.update(synonyms_graph.expand(antonym, hops, hop_cutoff, max_frontier, memo))
+
+    return expanded
+
+def expand_synonyms(synonyms_graph, term:str, hops:int=DEFAULT_SYNONYM_HOPS, hop_cutoff:float=None,
+                    max_frontier:int=DEFAULT_MAX_FRONTIER, memo:dict=None):
+    '''
+    Arguments:
+        hops {int} -- Number of synonym hops taken from each synonym
+        hop_cutoff {float} -- The minimum score of the synonyms followed by the hops, or None to follow every synonym
+        max_frontier {int} -- The maximum number of words expanded at each hop, see expand_neighborhood
+        memo {NeighborhoodMemo} -- The synonyms of synonyms found for previous terms with the same settings
+
+    Returns:
+        set -- The synonyms of a term and the synonyms of each of those synonyms up to a number of hops away. The
+               term itself is left out of the synonyms of its synonyms, which always lead back to it
+    '''
+    node = synonyms_graph[term]
+    if node is None:
+        return set()
+
+    expanded = set(node.neighbor_set)
+    if hops > 0:
+        for synonym in node.neighbor_set:
+            expanded.update(synonyms_graph.expand(synonym, hops, hop_cutoff, max_frontier, memo))
+        if term not in node.neighbor_set:
+            expanded.discard(term)
+
+    return expanded
+
+def find_overlaps(wordpack_dict:dict, expansions:dict):
+    '''Finds the related terms of each base term that belong to the expanded set of words of another base term
+
+    The related terms of the wordpack are indexed by the base terms whose expansion contains them
+    so that each base term's expansion is only intersected once with the wordpack.
+
+    Arguments:
+        wordpack_dict {dict} -- A wordpack where keys are the base terms and their value is a list of related terms
+        expansions {dict} -- A dictionary where keys are the base terms and their value is their set of expanded words
+
+    Returns:
+        dict -- The same structure as get_ambiguous_antonyms, with the overlaps ordered by base term and then by related term
+    '''
+    base_terms = list(wordpack_dict)
+    related_words = set()
+    for related_terms in wordpack_dict.values():
+        related_words.update(related_terms)
+
+    # Inverted index of related words to the position of the base terms whose expansion contains them
+    index = {}
+    for position, base_term in enumerate(base_terms):
+        for word in _intersection(expansions[base_term], related_words):
+            index.setdefault(word, []).append(position)
+
+    # Data structure that will be returned
+    return_ds = {}
+    # Each ambiguity is only logged at DEBUG level, checked once per wordpack
+    debug = logger.isEnabledFor(logging.DEBUG)
+    for base_position, (base_term, related_terms) in enumerate(wordpack_dict.items()):
+        matches = []
+        for term_position, related_term in enumerate(related_terms):
+            for position in index.get(related_term, ()):
+                # Don't compare the same group of words
+                if position != base_position:
+                    matches.append((position, term_position))
+        matches.sort()
+
+        return_ds[base_term] = {
+            'overlap': [base_terms[position] for position, _ in matches],
+            'related_terms': [related_terms[term_position] for _, term_position in matches]
+            }
+
+        if debug:
+            for position, term_position in matches:
+                logger.debug("Base term '%s' and its related term '%s' are ambiguous with base term group '%s'",
+                             base_term, related_terms[term_position], base_terms[position])
+
+    return return_ds
+
+def _intersection(a, b):
+    # Iterate over the smaller set
+    if len(a) > len(b):
+        a, b = b, a
+    return [x for x in a if x in b]
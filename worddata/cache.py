@@ -0,0 +1,302 @@
+# -*- coding: utf-8 -*-
+
+from array import array
+from worddata.graph import Graph, MappedGraph
+from worddata.loader import load_words_graphs
+import hashlib
+import json
+import logging
+import math
+import mmap
+import os
+import struct
+import sys
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT_VERSION = 1
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'ambiguous-words')
+
+_MAGIC = b'AWGRAPH\0'
+_HEADER_LENGTH = struct.Struct('<Q')
+_ALIGNMENT = 8
+
+def load_words_graphs_cached(file:str, primary_word_parser:str, relation_specs:dict,
+                word_delimiter:str='|', cache_dir:str=DEFAULT_CACHE_DIR, memory_map:bool=False,
+                jobs:int=1, stats=None):
+    """Loads the graphs described by relation_specs from a compiled cache file, or parses
+    the word relations file and writes the compiled cache file if it is missing or stale
+
+    The cache file is named after the word relations file path and the parser settings.
+    It is rebuilt automatically when the size or the modification time of the word
+    relations file changes.
+
+    When memory_map is set, the graphs are MappedGraph objects served directly from the
+    memory-mapped cache file instead of Graph objects built in memory. Processes mapping
+    the same cache file share a single copy of it.
+
+    Arguments:
+        file {str} -- The word relations file to load
+        primary_word_parser {str} -- Regular expression used to parse the primary word in data file
+        relation_specs {dict} -- A dictionary of graph names and the RelationSpec used to build each graph
+        word_delimeter {str} -- Regular expression used to split the related words into words
+        cache_dir {str} -- Directory holding the compiled cache files. Caching is disabled if None
+        memory_map {bool} -- Returns graphs backed by the memory-mapped cache file
+        jobs {int} -- Number of processes parsing the word relations file when it is not cached
+        stats {RunStats} -- Counts the lines parsed and whether the cache was used
+
+    Returns:
+        dict -- A dictionary of graph names and their Graph (or MappedGraph) object
+    """
+    if cache_dir is None:
+        if memory_map:
+            raise ValueError("Memory-mapped graphs require a cache directory")
+        return load_words_graphs(file, primary_word_parser, relation_specs, word_delimiter, jobs=jobs, stats=stats)
+
+    cache_file = get_cache_path(cache_dir, file, primary_word_parser, relation_specs, word_delimiter)
+    fingerprint = get_file_fingerprint(file)
+
+    graphs = None
+    if os.path.exists(cache_file):
+        try:
+            if memory_map:
+                graphs = open_compiled_graphs(cache_file, fingerprint)
+            else:
+                graphs = read_compiled_graphs(cache_file, fingerprint)
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable word relations cache %s: %s", cache_file, e)
+
+    if graphs is not None and set(graphs) == set(relation_specs):
+        logger.info("Loaded word relations file %s from cache %s", file, cache_file)
+        if stats is not None:
+            stats.count('relations_cache_hits')
+        return graphs
+
+    if stats is not None:
+        stats.count('relations_cache_misses')
+
+    graphs = load_words_graphs(file, primary_word_parser, relation_specs, word_delimiter, jobs=jobs, stats=stats)
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        write_compiled_graphs(cache_file, graphs, fingerprint)
+        logger.info("Wrote word relations cache %s", cache_file)
+        if memory_map:
+            graphs = open_compiled_graphs(cache_file)
+    except OSError as e:
+        logger.warning("Unable to write word relations cache %s: %s", cache_file, e)
+
+    return graphs
+
+def get_cache_path(cache_dir:str, file:str, primary_word_parser:str, relation_specs:dict,
+                word_delimiter:str='|'):
+    '''
+    Determines the path of the compiled cache file for a word relations file and its parser settings
+
+    Returns:
+        str -- Path of the compiled cache file
+    '''
+    settings = json.dumps({
+        'version': CACHE_FORMAT_VERSION,
+        'file': os.path.abspath(file),
+        'primary_word_parser': primary_word_parser,
+        'word_delimiter': word_delimiter,
+        'relation_specs': {name: list(spec) for name, spec in relation_specs.items()}
+        }, sort_keys=True)
+
+    return os.path.join(cache_dir, hashlib.sha256(settings.encode('utf-8')).hexdigest() + '.graph')
+
+def get_file_fingerprint(file:str):
+    '''
+    Returns:
+        list -- The size and modification time of a file used to detect stale cache files
+    '''
+    stat = os.stat(file)
+    return [stat.st_size, stat.st_mtime_ns]
+
+def write_compiled_graphs(path:str, graphs:dict, fingerprint:list=None):
+    '''
+    Writes graphs to a compiled file made of a sorted table of the interned words shared
+    by all graphs and, for each graph, CSR style adjacency arrays with the edge scores
+
+    Arguments:
+        path {str} -- The compiled file to write. It is replaced atomically
+        graphs {dict} -- A dictionary of graph names and their Graph object
+        fingerprint {list} -- Fingerprint of the source file stored in the header
+    '''
+    words = set()
+    for graph in graphs.values():
+        words.update(graph.nodes)
+    encoded_words = sorted(word.encode('utf-8') for word in words)
+    word_ids = {word.decode('utf-8'): word_id for word_id, word in enumerate(encoded_words)}
+
+    word_offsets = array('q', [0])
+    for word in encoded_words:
+        word_offsets.append(word_offsets[-1] + len(word))
+
+    sections = [('words', b''.join(encoded_words)), ('word_offsets', word_offsets.tobytes())]
+    for name, graph in graphs.items():
+        present = array('B', bytes(len(encoded_words)))
+        offsets = array('q', [0])
+        neighbors = array('i')
+        scores = array('d')
+        for word_id, word in enumerate(encoded_words):
+            node = graph[word.decode('utf-8')]
+            if node is not None:
+                present[word_id] = 1
+                for neighbor_id, score in sorted((word_ids[x], score) for x, score in node.neighbors.items()):
+                    neighbors.append(neighbor_id)
+                    scores.append(math.nan if score is None else score)
+            offsets.append(len(neighbors))
+
+        sections.extend([
+            (name + '/present', present.tobytes()),
+            (name + '/offsets', offsets.tobytes()),
+            (name + '/neighbors', neighbors.tobytes()),
+            (name + '/scores', scores.tobytes())])
+
+    # Describe where each section starts relative to the end of the header
+    layout = {}
+    position = 0
+    for section_name, data in sections:
+        layout[section_name] = [position, len(data)]
+        position += _padded(len(data))
+
+    header = json.dumps({
+        'version': CACHE_FORMAT_VERSION,
+        'byteorder': sys.byteorder,
+        'fingerprint': fingerprint,
+        'word_count': len(encoded_words),
+        'graphs': list(graphs),
+        'sections': layout
+        }).encode('utf-8')
+    header += b' ' * (_padded(len(header)) - len(header))
+
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            fh.write(_MAGIC)
+            fh.write(_HEADER_LENGTH.pack(len(header)))
+            fh.write(header)
+            for _, data in sections:
+                fh.write(data)
+                fh.write(bytes(_padded(len(data)) - len(data)))
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def read_compiled_header(buffer):
+    '''
+    Parses the header of a compiled file held in a bytes-like buffer
+
+    Returns:
+        tuple(dict, int) -- The header and the position of the first section in the buffer
+    '''
+    if bytes(buffer[:len(_MAGIC)]) != _MAGIC:
+        raise ValueError("Not a compiled word relations file")
+
+    header_start = len(_MAGIC) + _HEADER_LENGTH.size
+    header_length, = _HEADER_LENGTH.unpack(bytes(buffer[len(_MAGIC):header_start]))
+    header = json.loads(bytes(buffer[header_start:header_start + header_length]).decode('utf-8'))
+
+    if header['version'] != CACHE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported compiled file version {header['version']}")
+    if header['byteorder'] != sys.byteorder:
+        raise ValueError(f"Compiled file was written with {header['byteorder']} endian byte order")
+
+    return header, header_start + header_length
+
+def read_compiled_graphs(path:str, fingerprint:list=None):
+    '''
+    Reads the graphs written by write_compiled_graphs into Graph objects
+
+    Arguments:
+        path {str} -- The compiled file to read
+        fingerprint {list} -- Expected fingerprint of the source file or None to skip the check
+
+    Returns:
+        dict -- A dictionary of graph names and their Graph object or None if the file is stale
+    '''
+    with open(path, 'rb') as fh:
+        buffer = fh.read()
+
+    header, data_start = read_compiled_header(buffer)
+    if fingerprint is not None and header['fingerprint'] != fingerprint:
+        return None
+
+    def section(name, typecode=None):
+        start, length = header['sections'][name]
+        data = buffer[data_start + start:data_start + start + length]
+        if typecode is None:
+            return data
+        values = array(typecode)
+        values.frombytes(data)
+        return values
+
+    blob = section('words')
+    word_offsets = section('word_offsets', 'q')
+    words = [sys.intern(blob[word_offsets[i]:word_offsets[i + 1]].decode('utf-8'))
+             for i in range(header['word_count'])]
+
+    graphs = {}
+    for name in header['graphs']:
+        present = section(name + '/present', 'B')
+        offsets = section(name + '/offsets', 'q')
+        neighbors = section(name + '/neighbors', 'i')
+        scores = section(name + '/scores', 'd')
+
+        graph = Graph()
+        for word_id, word in enumerate(words):
+            if present[word_id]:
+                graph.add_node(word)
+
+        for word_id, word in enumerate(words):
+            for i in range(offsets[word_id], offsets[word_id + 1]):
+                # Each edge is stored in both directions so only add it once
+                neighbor_id = neighbors[i]
+                if neighbor_id < word_id:
+                    continue
+                score = scores[i]
+                graph.add_edge(word, words[neighbor_id], None if math.isnan(score) else score)
+
+        graphs[name] = graph
+
+    return graphs
+
+def open_compiled_graphs(path:str, fingerprint:list=None):
+    '''
+    Memory-maps a compiled file written by write_compiled_graphs without copying its arrays
+
+    Arguments:
+        path {str} -- The compiled file to map
+        fingerprint {list} -- Expected fingerprint of the source file or None to skip the check
+
+    Returns:
+        dict -- A dictionary of graph names and their MappedGraph object or None if the file is stale
+    '''
+    with open(path, 'rb') as fh:
+        buffer = memoryview(mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ))
+
+    header, data_start = read_compiled_header(buffer)
+    if fingerprint is not None and header['fingerprint'] != fingerprint:
+        return None
+
+    def section(name, typecode=None):
+        start, length = header['sections'][name]
+        data = buffer[data_start + start:data_start + start + length]
+        return data if typecode is None else data.cast(typecode)
+
+    words = section('words')
+    word_offsets = section('word_offsets', 'q')
+
+    return {name: MappedGraph(words, word_offsets,
+                              section(name + '/present', 'B'),
+                              section(name + '/offsets', 'q'),
+                              section(name + '/neighbors', 'i'),
+                              section(name + '/scores', 'd'))
+            for name in header['graphs']}
+
+def _padded(length):
+    return (length + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+
+import logging
+from logging.config import dictConfig
+
+# Levels of the --log-level option of the scripts
+LOG_LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR')
+
+# Logging configuration of the scripts, every message going to the standard error
+LOGGING_CONFIG = dict(
+    version = 1,
+    disable_existing_loggers = False,
+    formatters = {
+        'f': {'format':
+              '%(asctime)s %(name)-12s %(levelname)-8s %(message)s'}
+        },
+    handlers = {
+        'h': {'class': 'logging.StreamHandler',
+              'formatter': 'f',
+              'level': logging.DEBUG}
+        },
+    root = {
+        'handlers': ['h'],
+        'level': logging.DEBUG,
+        }
+)
+
+# Number of occurrences of each category kept as examples
+DEFAULT_SAMPLES = 5
+
+# Diagnostics of each module, see get_diagnostics
+_diagnostics = {}
+
+class Diagnostics:
+    """Counts the occurrences of each category of problem, e.g. the lines of a word relations file
+    without a primary word, and keeps the first few occurrences of each as examples
+
+    The messages are str.format templates that are only formatted when they are logged. Every
+    occurrence is logged at DEBUG level when the logger is enabled for it, otherwise the counts
+    and the examples are only logged once by log_summary.
+    """
+    def __init__(self, name:str=None, samples:int=DEFAULT_SAMPLES):
+        '''
+        Arguments:
+            name {str} -- Name of the logger the occurrences are logged to, or None to only count them
+            samples {int} -- Number of occurrences of each category kept as examples, or None to keep every occurrence
+        '''
+        self.name = name
+        self.samples = samples
+        self.counts = {}
+        # The (category, message, fields) tuple of each occurrence kept as an example, in the order of the occurrences
+        self.examples = []
+        self._kept = {}
+        self._logger = None if name is None else logging.getLogger(name)
+
+    def record(self, category:str, message:str, **fields):
+        '''
+        Counts an occurrence of a category of problem
+
+        Arguments:
+            category {str} -- Name of the category, e.g. 'primary_word_not_found'
+            message {str} -- Template of the message describing the occurrence
+            fields -- Fields of the template
+        '''
+        self.counts[category] = self.counts.get(category, 0) + 1
+        self._add(category, message, fields)
+
+    def merge(self, other, line_offset:int=0):
+        '''
+        Adds the occurrences counted by other diagnostics, e.g. the diagnostics of a chunk of a file parsed
+        in another process. The examples of other are logged at DEBUG level in their order, like the
+        occurrences recorded, so merging the chunks of a file in order logs the same lines as parsing it
+        in a single pass
+
+        Arguments:
+            other {Diagnostics} -- The diagnostics to add, which keep every occurrence as an example if they are
+                                   to be logged
+            line_offset {int} -- Added to the line_num field of the examples of other
+        '''
+        for category, count in other.counts.items():
+            self.counts[category] = self.counts.get(category, 0) + count
+        for category, message, fields in other.examples:
+            if 'line_num' in fields:
+                fields = dict(fields, line_num=fields['line_num'] + line_offset)
+            self._add(category, message, fields)
+
+    def summary(self):
+        '''
+        Returns:
+            dict -- The count and the formatted examples of each category
+        '''
+        summary = {category: {'count': count, 'examples': []} for category, count in self.counts.items()}
+        for category, message, fields in self.examples:
+            summary[category]['examples'].append(message.format(**fields))
+
+        return summary
+
+    def discard(self, category:str):
+        '''Forgets the occurrences of a category counted so far'''
+        self.counts.pop(category, None)
+        self._kept.pop(category, None)
+        self.examples = [example for example in self.examples if example[0] != category]
+
+    def clear(self):
+        '''Forgets the occurrences counted so far'''
+        self.counts = {}
+        self.examples = []
+        self._kept = {}
+
+    def _add(self, category, message, fields):
+        kept = self._kept.get(category, 0)
+        if self.samples is None or kept < self.samples:
+            self.examples.append((category, message, fields))
+            self._kept[category] = kept + 1
+
+        if self._logger is not None and self._logger.isEnabledFor(logging.DEBUG):
+            self._logger.debug(message.format(**fields))
+
+def configure_logging(level:str):
+    '''Sets up the logging of a script at one of LOG_LEVELS'''
+    dictConfig(dict(LOGGING_CONFIG, root=dict(LOGGING_CONFIG['root'], level=level)))
+
+def get_diagnostics(name:str):
+    '''
+    Returns:
+        Diagnostics -- The diagnostics of a module, created on first use and logged to the logger of the same name
+    '''
+    if name not in _diagnostics:
+        _diagnostics[name] = Diagnostics(name)
+
+    return _diagnostics[name]
+
+def clear_diagnostics():
+    '''Forgets the occurrences counted so far by the diagnostics of each module, e.g. before reloading a file'''
+    for diagnostics in _diagnostics.values():
+        diagnostics.clear()
+
+def get_summary():
+    '''
+    Returns:
+        dict -- The summary of the diagnostics of each module that counted occurrences
+    '''
+    return {name: diagnostics.summary() for name, diagnostics in _diagnostics.items() if diagnostics.counts}
+
+def log_summary():
+    '''Logs the count and the examples of each category of problem counted by the diagnostics of each module'''
+    for name, diagnostics in _diagnostics.items():
+        summary_logger = logging.getLogger(name)
+        for category, summary in diagnostics.summary().items():
+            summary_logger.warning("%d occurrences of %s, e.g.:\n    %s", summary['count'], category,
+                                   '\n    '.join(summary['examples']))
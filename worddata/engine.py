@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+
+import logging
+
+from worddata.ambiguity import DEFAULT_INDEX_SIZE, create_antonym_index, create_synonym_index
+from worddata.ambiguity import get_ambiguous_antonyms, get_ambiguous_synonyms
+from worddata.cache import DEFAULT_CACHE_DIR, load_words_graphs_cached
+from worddata.loader import generate_wordpacks
+
+logger = logging.getLogger(__name__)
+
+MODES = ('antonyms', 'synonyms')
+
+# Graphs the engine detects ambiguities with and the relation specs they are loaded from
+GRAPH_NAMES = ('antonyms', 'antonym_synonyms', 'synonyms')
+
+# Base terms of both kinds of wordpack lines: '@ ANT-term =' for antonyms and '@ term =' for synonyms
+MIXED_TERM_FORMAT = '^@ ((?:ANT-)?[^=]+) ='
+ANTONYM_PREFIX = 'ANT-'
+
+class DetectorEngine:
+    """Detects the ambiguous antonyms and synonyms of wordpacks with the graphs of a word relations
+    file and an ambiguity index per kind of detection
+
+    The graphs are the 'antonyms', 'antonym_synonyms' and 'synonyms' graphs, e.g. as loaded by
+    DetectorEngine.load from the relation specs of the same names.
+    """
+    def __init__(self, graphs:dict, index_size:int=DEFAULT_INDEX_SIZE):
+        missing = [name for name in GRAPH_NAMES if name not in graphs]
+        if missing:
+            raise ValueError(f"Missing graphs {', '.join(missing)}")
+
+        self.graphs = graphs
+        self.indexes = {
+            'antonyms': create_antonym_index(graphs['antonyms'], graphs['antonym_synonyms'], index_size),
+            'synonyms': create_synonym_index(graphs['synonyms'], index_size)
+            }
+
+    @classmethod
+    def load(cls, relations_file:str, primary_word_parser:str, relation_specs:dict, word_delimiter:str='|',
+             cache_dir:str=DEFAULT_CACHE_DIR, memory_map:bool=False, jobs:int=1,
+             index_size:int=DEFAULT_INDEX_SIZE, stats=None):
+        '''
+        Loads every graph from a single pass over the word relations file, or from its compiled copy
+
+        Arguments:
+            relation_specs {dict} -- The RelationSpec of each of GRAPH_NAMES
+
+        Returns:
+            DetectorEngine -- An engine detecting ambiguities with the loaded graphs
+        '''
+        graphs = load_words_graphs_cached(relations_file, primary_word_parser, relation_specs, word_delimiter,
+                                          cache_dir, memory_map, jobs, stats)
+
+        return cls(graphs, index_size)
+
+    def detect(self, mode:str, wordpack_dict:dict):
+        '''
+        Returns:
+            dict -- The ambiguous antonyms or synonyms of a wordpack, as returned by get_ambiguous_antonyms
+        '''
+        if mode == 'antonyms':
+            return get_ambiguous_antonyms(self.graphs['antonyms'], self.graphs['antonym_synonyms'], wordpack_dict,
+                                          self.indexes['antonyms'])
+        if mode == 'synonyms':
+            return get_ambiguous_synonyms(self.graphs['synonyms'], wordpack_dict, self.indexes['synonyms'])
+
+        raise ValueError(f"Unknown mode '{mode}', expected one of {', '.join(MODES)}")
+
+    def detect_mixed(self, wordpack_dicts:tuple):
+        '''
+        Detects the ambiguities of a wordpack split by split_wordpack
+
+        Returns:
+            tuple(dict, dict) -- The ambiguous synonyms and the ambiguous antonyms, or None for a kind of base terms
+                                 the wordpack has none of
+        '''
+        synonym_dict, antonym_dict = wordpack_dicts
+
+        return (self.detect('synonyms', synonym_dict) if synonym_dict else None,
+                self.detect('antonyms', antonym_dict) if antonym_dict else None)
+
+    def stats(self):
+        '''
+        Returns:
+            dict -- The statistics of the ambiguity index of each kind of detection
+        '''
+        return {mode: index.stats() for mode, index in self.indexes.items()}
+
+def generate_mixed_wordpacks(wordpacks_file:str):
+    '''
+    A generator function that parses a wordpacks file holding both '@ term =' and '@ ANT-term =' lines
+    in a single pass
+
+    Yields:
+        tuple(str, tuple) -- The wordpack title and the synonym and antonym dictionaries of split_wordpack
+    '''
+    for wordpack_title, wordpack_dict in generate_wordpacks(wordpacks_file, term_format=MIXED_TERM_FORMAT):
+        yield wordpack_title, split_wordpack(wordpack_dict)
+
+def split_wordpack(wordpack_dict:dict):
+    '''
+    Splits a wordpack parsed with MIXED_TERM_FORMAT by the kind of its base terms
+
+    Returns:
+        tuple(dict, dict) -- The base terms without the ANT- prefix and their related terms, and the base terms
+                             with the prefix, without it, and their related terms
+    '''
+    synonym_dict = {}
+    antonym_dict = {}
+    for base_term, related_terms in wordpack_dict.items():
+        if base_term.startswith(ANTONYM_PREFIX):
+            # Strip the same way as a base term parsed with the antonym term format
+            antonym_dict[base_term[len(ANTONYM_PREFIX):].strip()] = related_terms
+        else:
+            synonym_dict[base_term] = related_terms
+
+    return synonym_dict, antonym_dict
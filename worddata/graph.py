@@ -1,5 +1,16 @@
 # -*- coding: utf-8 -*-
 
+from bisect import bisect_left
+from collections.abc import Mapping, Sequence
+import hashlib
+import heapq
+import math
+import sys
+from types import MappingProxyType
+
+# Number of words of a traversal depth whose neighbors are expanded at the next depth
+DEFAULT_MAX_FRONTIER = 10000
+
 class Graph:
     def __init__(self):
         self.nodes = {}
@@ -17,28 +28,377 @@ class Graph:
         if name in self.nodes:
             return self.nodes[name]
 
-        self.nodes[name] = Node(name)
+        node = Node(name)
+        self.nodes[node.value] = node
 
-        return self.nodes[name]
+        return node
 
-    def add_edge(self, name_u, name_v):
+    def add_edge(self, name_u, name_v, score=None):
         u = self.nodes[name_u]
         v = self.nodes[name_v]
-        u.neighbors[name_v] = v
-        v.neighbors[name_u] = u
+
+        # Keep the highest score when the same relation is listed more than once
+        previous = u.neighbors.get(v.value)
+        if previous is not None and (score is None or previous > score):
+            score = previous
+
+        u.neighbors[v.value] = score
+        v.neighbors[u.value] = score
 
     def delete_node(self, name):
         if name in self.nodes:
+            for neighbor in self.nodes[name].neighbors:
+                if neighbor != name:
+                    del self.nodes[neighbor].neighbors[name]
             del self.nodes[name]
 
     def clear(self):
         self.nodes.clear()
 
+    def edge_count(self):
+        '''Returns the number of edges in the graph'''
+        return _count_edges(self)
+
+    def expand(self, name, hops:int=1, score_cutoff:float=None, max_frontier:int=DEFAULT_MAX_FRONTIER,
+               memo:dict=None):
+        '''Returns the words reachable from a word within a number of hops, see expand_neighborhood'''
+        return expand_neighborhood(self, name, hops, score_cutoff, max_frontier, memo)
+
+    def freeze(self):
+        '''Returns an immutable snapshot of the graph, see FrozenGraph'''
+        return FrozenGraph(self)
+
+    def filter(self, score_cutoff):
+        '''Returns a copy of the graph without the edges scored below score_cutoff'''
+        graph = Graph()
+        for name, node in self.nodes.items():
+            graph.add_node(name)
+            for neighbor, score in node.neighbors.items():
+                if score is not None and score >= score_cutoff:
+                    graph.add_node(neighbor)
+                    graph.add_edge(name, neighbor, score)
+
+        return graph
+
 class Node:
     """A node element within a graph
+
+    The neighbors dictionary maps the name of each neighbor to the score of the edge
     """
+    __slots__ = ('neighbors', 'value')
+
     def __init__(self, value):
         self.neighbors = {}
+        self.value = sys.intern(value)
+
+    @property
+    def neighbor_set(self):
+        '''The names of the neighbors as a set-like view'''
+        return self.neighbors.keys()
+
+    @property
+    def degree(self):
+        return len(self.neighbors)
+
+class FrozenGraph:
+    """An immutable snapshot of a graph once it is loaded, e.g. to share it between threads
+
+    Each node holds its neighbors as a frozenset, which detection reads without building a set
+    from the scores, along with a read-only mapping of the scores and its degree. The graph is
+    hashable by its fingerprint, a digest of its words and scored edges.
+    """
+    def __init__(self, graph):
+        '''
+        Arguments:
+            graph {Graph} -- The graph to copy, a Graph or a MappedGraph
+        '''
+        self.nodes = MappingProxyType({name: FrozenNode(name, node.neighbors) for name, node in graph.nodes.items()})
+        self._edge_count = _count_edges(self)
+        self._fingerprint = None
+
+    def __getitem__(self, v):
+        return self.nodes.get(v)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __eq__(self, other):
+        return isinstance(other, FrozenGraph) and self.fingerprint == other.fingerprint
+
+    def __hash__(self):
+        return hash(self.fingerprint)
+
+    @property
+    def fingerprint(self):
+        '''A hex digest of the words, edges and scores of the graph, independent of the order they were added in'''
+        if self._fingerprint is None:
+            digest = hashlib.blake2b(digest_size=16)
+            for name in sorted(self.nodes):
+                digest.update(repr((name, sorted(self.nodes[name].neighbors.items()))).encode('utf-8'))
+            self._fingerprint = digest.hexdigest()
+
+        return self._fingerprint
+
+    def degree(self, name):
+        '''Returns the number of neighbors of a word, 0 if the word is not in the graph'''
+        node = self.nodes.get(name)
+        return 0 if node is None else node.degree
+
+    def edge_count(self):
+        '''Returns the number of edges in the graph'''
+        return self._edge_count
+
+    def expand(self, name, hops:int=1, score_cutoff:float=None, max_frontier:int=DEFAULT_MAX_FRONTIER,
+               memo:dict=None):
+        '''Returns the words reachable from a word within a number of hops, see expand_neighborhood'''
+        return expand_neighborhood(self, name, hops, score_cutoff, max_frontier, memo)
+
+    def freeze(self):
+        '''Returns the graph itself, which is already immutable'''
+        return self
+
+    def filter(self, score_cutoff):
+        '''Returns an in-memory copy of the graph without the edges scored below score_cutoff'''
+        return Graph.filter(self, score_cutoff)
+
+class FrozenNode:
+    """A node element within a FrozenGraph
+    """
+    __slots__ = ('degree', 'neighbor_set', 'neighbors', 'value')
+
+    def __init__(self, value, neighbors):
+        self.value = value
+        self.neighbors = MappingProxyType(dict(neighbors))
+        self.neighbor_set = frozenset(self.neighbors)
+        self.degree = len(self.neighbor_set)
+
+class MappedGraph:
+    """A read-only graph backed by the arrays of a compiled word relations file
+
+    Words are identified by their position in a table of words sorted by their UTF-8
+    encoding and the neighbors of each word are stored as sorted word IDs. All arrays
+    are memoryviews so the graph can be served directly from a memory-mapped file that
+    is shared by several processes.
+    """
+    def __init__(self, words, word_offsets, present, offsets, neighbors, scores):
+        self._words = words
+        self._word_offsets = word_offsets
+        self._present = present
+        self._offsets = offsets
+        self._neighbors = neighbors
+        self._scores = scores
+        self._length = None
+        self.nodes = MappedNodes(self)
+
+    def __getitem__(self, v):
+        word_id = self.word_id(v)
+        if word_id is None or not self._present[word_id]:
+            return None
+
+        return MappedNode(self, word_id, v)
+
+    def __len__(self):
+        if self._length is None:
+            self._length = sum(self._present)
+        return self._length
+
+    def word_id(self, name):
+        '''Returns the ID of a word or None if the word is not in the word table'''
+        try:
+            key = name.encode('utf-8')
+        except AttributeError:
+            return None
+        word_id = bisect_left(_WordTable(self), key)
+        if word_id < len(self._present) and self._word_bytes(word_id) == key:
+            return word_id
+
+        return None
+
+    def edge_count(self):
+        '''Returns the number of edges in the graph'''
+        return _count_edges(self)
+
+    def expand(self, name, hops:int=1, score_cutoff:float=None, max_frontier:int=DEFAULT_MAX_FRONTIER,
+               memo:dict=None):
+        '''Returns the words reachable from a word within a number of hops, see expand_neighborhood'''
+        return expand_neighborhood(self, name, hops, score_cutoff, max_frontier, memo)
+
+    def freeze(self):
+        '''Returns the graph itself, which is read-only and shared through the memory-mapped file rather than copied'''
+        return self
+
+    def filter(self, score_cutoff):
+        '''Returns an in-memory copy of the graph without the edges scored below score_cutoff'''
+        return Graph.filter(self, score_cutoff)
+
+    def word(self, word_id):
+        '''Returns the word for a word ID'''
+        return self._word_bytes(word_id).decode('utf-8')
+
+    def _word_bytes(self, word_id):
+        return bytes(self._words[self._word_offsets[word_id]:self._word_offsets[word_id + 1]])
+
+class MappedNodes(Mapping):
+    """The mapping of words to nodes of a MappedGraph
+    """
+    def __init__(self, graph):
+        self._graph = graph
+
+    def __getitem__(self, name):
+        node = self._graph[name]
+        if node is None:
+            raise KeyError(name)
+        return node
+
+    def __contains__(self, name):
+        return self._graph[name] is not None
+
+    def __iter__(self):
+        for word_id, present in enumerate(self._graph._present):
+            if present:
+                yield self._graph.word(word_id)
+
+    def __len__(self):
+        return len(self._graph)
+
+class MappedNode:
+    """A read-only node element within a MappedGraph
+    """
+    __slots__ = ('neighbors', 'value')
+
+    def __init__(self, graph, word_id, value):
         self.value = value
+        self.neighbors = MappedNeighbors(graph, word_id)
+
+    @property
+    def neighbor_set(self):
+        '''The names of the neighbors, read from the compiled copy'''
+        return self.neighbors
+
+    @property
+    def degree(self):
+        return len(self.neighbors)
+
+class MappedNeighbors(Mapping):
+    """The mapping of a node's neighbors to the score of the edge
+    """
+    def __init__(self, graph, word_id):
+        self._graph = graph
+        self._start = graph._offsets[word_id]
+        self._end = graph._offsets[word_id + 1]
+
+    def _position(self, name):
+        word_id = self._graph.word_id(name)
+        if word_id is None:
+            return None
+        i = bisect_left(self._graph._neighbors, word_id, self._start, self._end)
+        if i < self._end and self._graph._neighbors[i] == word_id:
+            return i
+
+        return None
+
+    def __getitem__(self, name):
+        i = self._position(name)
+        if i is None:
+            raise KeyError(name)
+        score = self._graph._scores[i]
+
+        return None if math.isnan(score) else score
+
+    def __contains__(self, name):
+        return self._position(name) is not None
+
+    def __iter__(self):
+        for i in range(self._start, self._end):
+            yield self._graph.word(self._graph._neighbors[i])
+
+    def __len__(self):
+        return self._end - self._start
+
+class _WordTable(Sequence):
+    """Exposes the sorted word table of a MappedGraph as a sequence of UTF-8 strings for bisect
+    """
+    def __init__(self, graph):
+        self._graph = graph
+
+    def __getitem__(self, word_id):
+        return self._graph._word_bytes(word_id)
+
+    def __len__(self):
+        return len(self._graph._present)
+
+def expand_neighborhood(graph, name, hops:int=1, score_cutoff:float=None, max_frontier:int=DEFAULT_MAX_FRONTIER,
+                        memo:dict=None):
+    '''Finds the words reachable from a word by following at most hops edges, breadth first
+
+    Only the edges scored at least score_cutoff are followed. When more than max_frontier words
+    are reached at the same depth, only the max_frontier words reached with the highest scores are
+    expanded at the next depth, which keeps deep traversals of densely connected words bounded.
+    The other words are still part of the neighborhood.
+
+    Arguments:
+        graph {Graph} -- A Graph, a FrozenGraph or a MappedGraph
+        name {str} -- The word to start from
+        hops {int} -- The maximum number of edges between the word and the words of its neighborhood
+        score_cutoff {float} -- The minimum score of the edges followed, or None to follow every edge
+        max_frontier {int} -- The maximum number of words expanded at each depth
+        memo {dict} -- The neighborhoods found by previous calls with the same graph, score_cutoff and
+                       max_frontier, keyed by word and hops, e.g. a NeighborhoodMemo. The neighborhood found
+                       is added to it
+
+    Returns:
+        frozenset -- The words of the neighborhood, without the word itself
+    '''
+    if memo is not None:
+        neighborhood = memo.get((name, hops))
+        if neighborhood is not None:
+            return neighborhood
+
+    # The word itself is visited first so that no path leads back to it
+    visited = {name}
+    neighborhood = set()
+    frontier = [name]
+    for _ in range(hops):
+        # The words first reached at this depth and the highest score they were reached with
+        reached = {}
+        for word in frontier:
+            node = graph[word]
+            if node is None:
+                continue
+            for neighbor, score in node.neighbors.items():
+                if score is None:
+                    if score_cutoff is not None:
+                        continue
+                    score = -math.inf
+                elif score_cutoff is not None and score < score_cutoff:
+                    continue
+                if neighbor not in visited:
+                    visited.add(neighbor)
+                    neighborhood.add(neighbor)
+                    reached[neighbor] = score
+                elif neighbor in reached and score > reached[neighbor]:
+                    reached[neighbor] = score
+
+        if len(reached) > max_frontier:
+            frontier = heapq.nlargest(max_frontier, reached, key=reached.get)
+        else:
+            frontier = list(reached)
+        if not frontier:
+            break
+
+    neighborhood = frozenset(neighborhood)
+    if memo is not None:
+        memo[(name, hops)] = neighborhood
+
+    return neighborhood
+
+def _count_edges(graph):
+    # Edges are listed by both of their nodes except for edges between a node and itself
+    degrees = 0
+    loops = 0
+    for name, node in graph.nodes.items():
+        degrees += len(node.neighbors)
+        if name in node.neighbors:
+            loops += 1
 
-    
\ No newline at end of file
+    return (degrees + loops) // 2
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+
+from collections import deque
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+from worddata.cache import get_file_fingerprint
+
+logger = logging.getLogger(__name__)
+
+STATE_FORMAT_VERSION = 1
+
+class IncrementalState:
+    """Keeps the rendered output of each wordpack of a previous run in a sidecar file so that
+    only the wordpacks that changed since then are detected again
+
+    Wordpacks are identified by a hash of their title and terms. The whole state is discarded
+    when its key changes, i.e. when the word relations file, the parser settings or the output
+    format changed, since any wordpack may then be rendered differently.
+    """
+    def __init__(self, path:str, key:str):
+        '''
+        Arguments:
+            path {str} -- The sidecar file holding the state
+            key {str} -- Identifies the graphs and settings the wordpacks are rendered with, see get_state_key
+        '''
+        self.path = path
+        self.key = key
+        self.reused = 0
+        self.detected = 0
+        self._previous = self._read()
+        self._current = {}
+
+    def write_wordpacks(self, writer, wordpacks, detect_wordpacks:callable, stats=None):
+        '''
+        Writes every wordpack with a writer, reusing the rendered output of the unchanged wordpacks
+        and detecting the others, in the order of the wordpacks
+
+        Arguments:
+            writer {WordpackWriter} -- The writer of the output file
+            wordpacks {iterable} -- Tuples of the wordpack title and its dictionary, as yielded by generate_wordpacks
+            detect_wordpacks {Callable} -- Called with an iterable of the changed wordpacks, returns an iterator of
+                                           their title, dictionary and ambiguities in order, e.g. detect_wordpacks
+            stats {RunStats} -- Counts the wordpacks and the reused wordpacks
+        '''
+        # Hash and rendered output, if reused, of each wordpack read so far that isn't written yet
+        pending = deque()
+        def changed_wordpacks():
+            for wordpack_title, wordpack_dict in wordpacks:
+                wordpack_hash = get_wordpack_hash(wordpack_title, wordpack_dict)
+                rendered = self._previous.get(wordpack_hash)
+                pending.append((wordpack_hash, rendered))
+                if rendered is None:
+                    yield wordpack_title, wordpack_dict
+
+        def write_reused():
+            while pending and pending[0][1] is not None:
+                wordpack_hash, rendered = pending.popleft()
+                writer.write_rendered(rendered)
+                self._add(wordpack_hash, rendered, stats)
+                self.reused += 1
+                if stats is not None:
+                    stats.count('wordpacks_reused')
+
+        for wordpack_title, wordpack_dict, ambiguities in detect_wordpacks(changed_wordpacks()):
+            write_reused()
+            wordpack_hash, _ = pending.popleft()
+            self._add(wordpack_hash, writer.write(wordpack_title, wordpack_dict, ambiguities), stats)
+            self.detected += 1
+        write_reused()
+
+        logger.info("Reused %d wordpacks and detected %d changed wordpacks", self.reused, self.detected)
+
+    def save(self):
+        '''Replaces the sidecar file with the wordpacks written in this run'''
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as fh:
+                json.dump({'version': STATE_FORMAT_VERSION, 'key': self.key, 'wordpacks': self._current}, fh,
+                          ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _add(self, wordpack_hash, rendered, stats):
+        self._current[wordpack_hash] = rendered
+        if stats is not None:
+            stats.count('wordpacks')
+
+    def _read(self):
+        try:
+            with open(self.path, 'r') as fh:
+                state = json.load(fh)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable incremental state %s: %s", self.path, e)
+            return {}
+
+        if not isinstance(state, dict) or state.get('version') != STATE_FORMAT_VERSION:
+            logger.info("Ignoring incremental state %s written by another version", self.path)
+            return {}
+        if state.get('key') != self.key:
+            logger.info("Word relations or settings changed since incremental state %s was written - "
+                        "detecting every wordpack", self.path)
+            return {}
+
+        return state.get('wordpacks') or {}
+
+def get_state_key(relations_file:str, **settings):
+    '''
+    Returns:
+        str -- A key identifying a version of a word relations file and the settings wordpacks are detected
+               and rendered with
+    '''
+    key = json.dumps({
+        'relations': os.path.abspath(relations_file),
+        'fingerprint': get_file_fingerprint(relations_file),
+        'settings': settings
+        }, sort_keys=True)
+
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+def get_wordpack_hash(wordpack_title:str, wordpack_dict:dict):
+    '''
+    Returns:
+        str -- A hash of the title, base terms and related terms of a wordpack, in order
+    '''
+    content = json.dumps([wordpack_title, wordpack_dict], ensure_ascii=False)
+
+    return hashlib.blake2b(content.encode('utf-8'), digest_size=16).hexdigest()
@@ -1,10 +1,53 @@
 # -*- coding: utf-8 -*-
 
+from collections import namedtuple
+from worddata.diagnostics import DEFAULT_SAMPLES, Diagnostics, get_diagnostics
 from worddata.graph import Graph
+from worddata.reader import get_compression, open_text
+import io
 import logging
+import multiprocessing
+import os
 import re
 
 logger = logging.getLogger(__name__)
+# Problems found while parsing the word relations files
+diagnostics = get_diagnostics(__name__)
+
+# Default regular expressions for the word relations file format
+DEFAULT_PRIMARY_WORD_REGEX = r"^#([^\[]+)"
+DEFAULT_ANTONYM_REGEX = r"\[(?:contrast-manual|contrast)=\d+\.\d+\]:([^;]+)"
+DEFAULT_ANTONYM_SCORE_REGEX = r"\[(?:contrast-manual|contrast)-score\]:([^;]+)"
+# Synonyms of antonyms used to detect ambiguous antonyms
+DEFAULT_ANTONYM_SYNONYM_REGEX = r"\[(?:syn|associated)[^=\]]*?=\d+\.\d+\]:([^;]+)"
+DEFAULT_ANTONYM_SYNONYM_SCORE_REGEX = r"\[(?:syn|associated).*?-score\]:([^;]+)"
+# Synonyms used to detect ambiguous synonyms
+DEFAULT_SYNONYM_REGEX = r"\[(?:associated|syn|broader|custom-list|handcraft|memberof|narrower)[\w\s\-\{\}]*?=\d+\.\d+\]:([^;]+)"
+DEFAULT_SYNONYM_SCORE_REGEX = r"\[(?:associated|syn|broader|custom-list|handcraft|memberof|narrowe)[\w\s\-\{\}]*?-score\]:([^;]+)"
+
+# Default regular expressions that only match the [tag]:words; section of a line whose tag they match
+_SECTION_PREFIX = r"\["
+_SECTION_SUFFIX = r"\]:([^;]+)"
+_SECTION_REGEXES = (DEFAULT_ANTONYM_REGEX, DEFAULT_ANTONYM_SCORE_REGEX, DEFAULT_ANTONYM_SYNONYM_REGEX,
+                    DEFAULT_SYNONYM_REGEX, DEFAULT_SYNONYM_SCORE_REGEX)
+# Default regular expressions whose lazy .*? may reach from one tag to the end of a later tag, along
+# with the start of the first tag and the end of the last one
+_SPANNING_SECTION_REGEXES = {
+    DEFAULT_ANTONYM_SYNONYM_SCORE_REGEX: (r"(?:syn|associated)", "-score")
+    }
+
+# Categories of problems of a whole line rather than of one of its relation specs
+LINE_CATEGORIES = ('primary_word_not_found',)
+
+RelationSpec = namedtuple('RelationSpec', ['words_parser', 'score_parser', 'score_cutoff'])
+RelationSpec.__new__.__defaults__ = (1,)
+RelationSpec.__doc__ = """Describes one class of relations to extract from a word relations file
+
+    Arguments:
+        words_parser {str} -- Regular expression used to parse the related words
+        score_parser {str} -- Regular expression used to parse the scores of related words
+        score_cutoff {float} -- Related words with a score below this value are not added to the graph
+    """
 
 def load_words_graph(file:str, primary_word_parser:str, words_parser:str, 
                 score_parser:str, word_delimiter:str='|', score_cutoff:float = 1,
@@ -24,81 +67,423 @@ def load_words_graph(file:str, primary_word_parser:str, words_parser:str,
     Returns:
         Graph -- A graph object that permits traversal between the antonyms
     """
-    word_graph = Graph()
-    
-    primary_word_regex = re.compile(primary_word_parser)
-    words_regex = re.compile(words_parser)
-    score_regex = re.compile(score_parser)
+    callback = None
+    if line_callback is not None and callable(line_callback):
+        callback = lambda graphs: line_callback(graphs['words'])
+
+    graphs = load_words_graphs(file, primary_word_parser,
+                               {'words': RelationSpec(words_parser, score_parser, score_cutoff)},
+                               word_delimiter, callback, reset_after_line)
+
+    return graphs['words']
+
+def load_words_graphs(file:str, primary_word_parser:str, relation_specs:dict,
+                word_delimiter:str='|', line_callback:callable=None, reset_after_line=False,
+                jobs:int=1, vocabularies:dict=None, stats=None, count_lines:bool=True):
+    """Creates one graph per relation class from a single pass over a file where
+    the words are on one line and separated by delimeters
+
+    e.g. relation_specs:
+    {
+        'antonyms': RelationSpec(antonym_regex, antonym_score_regex),
+        'synonyms': RelationSpec(synonym_regex, synonym_score_regex, 6.0)
+    }
+
+    Arguments:
+        file {str} -- The file to load into, optionally gzip or zstd compressed
+        primary_word_parser {str} -- Regular expression used to parse the primary word in data file
+        relation_specs {dict} -- A dictionary of graph names and the RelationSpec used to build each graph
+        word_delimeter {str} -- Regular expression used to split the group returned by each 'words_parser' regex into words
+        line_callback {Callable} -- Class or function called after each line is processed and passed in the dictionary of graphs
+        reset_after_line {bool} -- Clears the graphs after each line is processed
+        jobs {int} -- Number of processes parsing newline aligned ranges of the file in parallel. Compressed files are parsed in a single process
+        vocabularies {dict} -- A dictionary of graph names and a set of words. Only the edges touching one of
+                               these words are added to the graph. Graphs without a vocabulary keep every edge
+        stats {RunStats} -- Counts the lines that were parsed and skipped
+        count_lines {bool} -- Counts the lines and the problems of whole lines, see LINE_CATEGORIES. Turned off for a
+                              later pass over a file whose lines were already counted
 
-    with open(file, 'r') as fh:
+    Returns:
+        dict -- A dictionary of graph names and the Graph object built from the matching RelationSpec
+    """
+    vocabularies = [(vocabularies or {}).get(name) for name in relation_specs]
+
+    if jobs > 1 and get_compression(file) is not None:
+        logger.info("Compressed word relations file %s can't be split between jobs - processing it in a single process", file)
+        jobs = 1
+
+    # The problems of a later pass are counted apart so that its problems of whole lines can be left out
+    pass_diagnostics = diagnostics if count_lines else Diagnostics(samples=_get_samples())
+    if not count_lines:
+        stats = None
+
+    if jobs > 1:
+        if line_callback is not None or reset_after_line:
+            raise ValueError("line_callback and reset_after_line are not supported when loading with several jobs")
+        word_graphs = _load_words_graphs_parallel(file, primary_word_parser, relation_specs, word_delimiter, jobs,
+                                                  vocabularies, stats, pass_diagnostics)
+    else:
+        word_graphs = _load_words_graphs_serial(file, primary_word_parser, relation_specs, word_delimiter,
+                                                line_callback, reset_after_line, vocabularies, stats,
+                                                pass_diagnostics)
+
+    if pass_diagnostics is not diagnostics:
+        for category in LINE_CATEGORIES:
+            pass_diagnostics.discard(category)
+        diagnostics.merge(pass_diagnostics)
+
+    return word_graphs
+
+def _load_words_graphs_serial(file, primary_word_parser, relation_specs, word_delimiter, line_callback,
+                              reset_after_line, vocabularies, stats, diagnostics):
+    '''
+    Parses the word relations file line by line in this process, calling line_callback after each line
+    '''
+    word_graphs = {name: Graph() for name in relation_specs}
+    graphs = list(word_graphs.values())
+
+    with open_text(file) as fh:
         line_num = 0
-        
-        for line in fh:
-            matches = primary_word_regex.match(line) 
-            # Skip line if we can't parse the primary word
-            if ( matches == None ):
-                logger.warn(f"Primary word not found on line {line_num}")
-                continue
+        lines = _LineCounter(fh)
 
-            primary_word = matches.group(1)
-            word_graph.add_node(primary_word)
-
-            score_matches = score_regex.finditer(line)
-
-            # Get the antonym section of the line
-            words = ''
-            for word_match in words_regex.finditer(line):
-                # Split the first matched group into separate words
-                words = word_match.group(1).split(word_delimiter)
-
-                # Get the associated scores for each word
-                try:
-                    word_scores = next(score_matches).group(1).split(word_delimiter)
-                except StopIteration:
-                    logger.warn(f"Unable to parse scores for line {line_num} using regex {score_parser}")
-
-                # Remove empty values in the list, new lines, and words that contain numbers (if any)
-                #words = [x for x in words if x != '' and _hasAlphaOnly(x)]
-
-                word_scores_iter = iter(word_scores)
-                
-                for word in words:
-                    # There are many words with funky internatinoal characters
-                    #if not _hasAlphaOnly(word):
-                    #    logger.warn(f"Primary word {primary_word} has a related word ' {word} ' that contains non-alpha characters - skipping")
-                    #    try:
-                    #        next(word_scores_iter)
-                    #    except:
-                    #        pass
-                    #    continue
-
-                    try:
-                        score = float(next(word_scores_iter))
-                    except StopIteration:
-                        logger.warn(f"Primary word {primary_word} has a related word ' {word} ' without an associated score - settings score to 0")
-                        score = 0
-
-                    if score < score_cutoff:
-                        continue
-                    word_graph.add_node(word)
-                    word_graph.add_edge(primary_word, word)
+        for primary_word, relations in _parse_relations(lines, primary_word_parser, relation_specs,
+                                                        word_delimiter, diagnostics, vocabularies):
+            _add_relations(graphs, primary_word, relations)
 
             # Provide progress information
             line_num += 1
             if line_num % 100000 == 0:
                 logger.debug("Processing word relations file %s line %d", file, line_num)
 
-            if callable is not None and callable(line_callback):
-                line_callback(word_graph)
+            if line_callback is not None and callable(line_callback):
+                line_callback(word_graphs)
 
             if reset_after_line:
-                word_graph.clear()
+                for word_graph in graphs:
+                    word_graph.clear()
+    if line_num > 0:
+        logger.info("Finished process word relations file %s. Total line count: %d", file, line_num)
+
+    _count_lines(stats, lines.count, line_num)
+
+    return word_graphs
+
+def _load_words_graphs_parallel(file, primary_word_parser, relation_specs, word_delimiter, jobs, vocabularies,
+                                stats, diagnostics):
+    '''
+    Parses newline aligned byte ranges of the word relations file in a pool of processes
+    and merges the related words of each range into the graphs in file order, so the
+    graphs and the diagnostics are identical to a serial load
+    '''
+    word_graphs = {name: Graph() for name in relation_specs}
+    graphs = list(word_graphs.values())
+    specs = [tuple(spec) for spec in relation_specs.values()]
+
+    chunks = [(file, start, end, primary_word_parser, specs, word_delimiter, vocabularies)
+              for start, end in _split_file(file, jobs * 4)]
+    logger.debug("Processing word relations file %s in %d chunks with %d jobs", file, len(chunks), jobs)
+
+    line_num = 0
+    total_lines = 0
+    with multiprocessing.Pool(jobs) as pool:
+        for parsed_lines, chunk_diagnostics, chunk_lines in pool.imap(_parse_relations_chunk, chunks):
+            # Line numbers of the problems are relative to the start of their chunk
+            diagnostics.merge(chunk_diagnostics, line_num)
+
+            for primary_word, relations in parsed_lines:
+                _add_relations(graphs, primary_word, relations)
+            line_num += len(parsed_lines)
+            total_lines += chunk_lines
+
     if line_num > 0:
         logger.info("Finished process word relations file %s. Total line count: %d", file, line_num)
 
-    return word_graph
+    _count_lines(stats, total_lines, line_num)
+
+    return word_graphs
+
+def _count_lines(stats, total_lines, parsed_lines):
+    if stats is not None:
+        stats.count('relations_lines', total_lines)
+        stats.count('relations_skipped_lines', total_lines - parsed_lines)
+
+class _LineCounter:
+    """Iterates over lines while counting them
+    """
+    def __init__(self, lines):
+        self.count = 0
+        self._lines = lines
+
+    def __iter__(self):
+        for line in self._lines:
+            self.count += 1
+            yield line
+
+def _split_file(file, count):
+    '''
+    Splits a file into at most count byte ranges that start at the beginning of a line
+
+    Returns:
+        list -- A list of (start, end) byte offsets
+    '''
+    size = os.path.getsize(file)
+    boundaries = [0]
+    with open(file, 'rb') as fh:
+        for i in range(1, count):
+            position = max(size * i // count, boundaries[-1])
+            if position >= size:
+                break
+            fh.seek(position)
+            fh.readline()
+            if fh.tell() > boundaries[-1] and fh.tell() < size:
+                boundaries.append(fh.tell())
+    boundaries.append(size)
+
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+def _parse_relations_chunk(chunk):
+    '''
+    Parses a byte range of the word relations file in a worker process
+
+    Returns:
+        tuple(list, Diagnostics, int) -- The parsed lines, the problems found while parsing them and the number of lines read
+    '''
+    file, start, end, primary_word_parser, specs, word_delimiter, vocabularies = chunk
+    with open(file, 'rb') as fh:
+        fh.seek(start)
+        data = fh.read(end - start)
+
+    chunk_diagnostics = Diagnostics(samples=_get_samples())
+
+    # Decode the same way as open(file, 'r') so lines match a serial load
+    lines = _LineCounter(io.TextIOWrapper(io.BytesIO(data)))
+    relation_specs = {i: RelationSpec(*spec) for i, spec in enumerate(specs)}
+    parsed_lines = list(_parse_relations(lines, primary_word_parser, relation_specs, word_delimiter,
+                                         chunk_diagnostics, vocabularies))
+
+    return parsed_lines, chunk_diagnostics, lines.count
+
+def _get_samples():
+    '''
+    Returns:
+        int -- The number of examples kept by diagnostics that are merged later, every problem being kept when they
+               are all logged, see Diagnostics.merge
+    '''
+    return None if logger.isEnabledFor(logging.DEBUG) else DEFAULT_SAMPLES
+
+def _parse_relations(lines, primary_word_parser, relation_specs, word_delimiter, diagnostics, vocabularies):
+    '''
+    A generator function that parses the lines of a word relations file and yields a tuple
+    of the primary word and, for each relation spec, a list of (word, score) tuples of the
+    related words that meet the spec's score cutoff. The list is None when neither the
+    primary word nor any related word is in the vocabulary of the relation spec
+
+    Lines are split into their sections without regular expressions when every regular
+    expression is one of the defaults, see _SectionParser
+
+    Arguments:
+        lines {iterable} -- The lines of the word relations file
+        diagnostics {Diagnostics} -- Counts the parsing problems, with the line number as the line_num field
+        vocabularies {list} -- A set of words or None for each relation spec
+    '''
+    primary_word_regex = re.compile(primary_word_parser)
+    parsers = [(re.compile(spec.words_parser), re.compile(spec.score_parser),
+                spec.score_parser, spec.score_cutoff)
+               for spec in relation_specs.values()]
+    section_parser = _get_section_parser(primary_word_parser, relation_specs)
+
+    line_num = 0
+    for line in lines:
+        parsed = None if section_parser is None else section_parser.parse(line)
+        if parsed is not None:
+            primary_word, sections = parsed
+        else:
+            matches = primary_word_regex.match(line)
+            primary_word = None if matches is None else matches.group(1)
+            sections = [((match.group(1) for match in words_regex.finditer(line)),
+                         (match.group(1) for match in score_regex.finditer(line)))
+                        for words_regex, score_regex, _, _ in parsers]
+
+        # Skip line if we can't parse the primary word
+        if ( primary_word == None ):
+            diagnostics.record('primary_word_not_found', "Primary word not found on line {line_num}", line_num=line_num)
+            continue
+
+        relations = [_parse_line_relations(word_groups, score_groups, line_num, primary_word,
+                                           score_parser, word_delimiter, score_cutoff, diagnostics)
+                     for (word_groups, score_groups), (_, _, score_parser, score_cutoff) in zip(sections, parsers)]
+
+        for i, vocabulary in enumerate(vocabularies):
+            if vocabulary is None or primary_word in vocabulary:
+                continue
+            # Only keep the edges that touch the vocabulary
+            relations[i] = [relation for relation in relations[i] if relation[0] in vocabulary] or None
+
+        yield primary_word, relations
+        line_num += 1
+
+def _parse_line_relations(word_groups, score_groups, line_num, primary_word,
+                        score_parser, word_delimiter, score_cutoff, diagnostics):
+    '''
+    Pairs the related words of a single relation class found on a line with their scores
+
+    Arguments:
+        word_groups {iterable} -- The matched groups of related words, in line order
+        score_groups {iterable} -- The matched groups of scores, in line order
+
+    Returns:
+        list -- A list of (word, score) tuples of the related words that meet the score cutoff
+    '''
+    relations = []
+    score_groups = iter(score_groups)
+
+    # Get the antonym section of the line
+    for word_group in word_groups:
+        # Split the first matched group into separate words
+        words = word_group.split(word_delimiter)
+
+        # Get the associated scores for each word
+        try:
+            word_scores = next(score_groups).split(word_delimiter)
+        except StopIteration:
+            diagnostics.record('scores_not_found', "Unable to parse scores for line {line_num} using regex {score_parser}",
+                               line_num=line_num, score_parser=score_parser)
+            word_scores = []
+
+        for word, score in zip(words, word_scores):
+            score = float(score)
+            if score < score_cutoff:
+                continue
+            relations.append((word, score))
+
+        for word in words[len(word_scores):]:
+            diagnostics.record('score_not_found',
+                               "Primary word {primary_word} has a related word ' {word} ' without an associated score - settings score to 0",
+                               line_num=line_num, primary_word=primary_word, word=word)
+            score = 0
+            if score < score_cutoff:
+                continue
+            relations.append((word, score))
+
+    return relations
+
+def _get_section_parser(primary_word_parser:str, relation_specs:dict):
+    '''
+    Returns:
+        _SectionParser -- A parser of the lines for the relation specs, or None if any regular expression isn't a default one
+    '''
+    if primary_word_parser != DEFAULT_PRIMARY_WORD_REGEX:
+        return None
+    for spec in relation_specs.values():
+        for parser in (spec.words_parser, spec.score_parser):
+            if parser not in _SECTION_REGEXES and parser not in _SPANNING_SECTION_REGEXES:
+                return None
+
+    return _SectionParser(relation_specs)
+
+class _SectionParser:
+    """Parses the lines of the default word relations format without regular expressions
+
+    e.g. #word[syn=0.5]:other|words;[syn-score]:9.10|6.50;[contrast=0.5]:opposite;[contrast-score]:8.75;
+
+    Each line is split once into its [tag]:words; sections and the sections of each relation
+    spec are selected by their tag. Whether a tag belongs to a relation spec is decided once
+    per distinct tag with the tag part of the spec's default regular expression. Only lines
+    made of the primary word and non-empty sections are parsed, so the sections are the
+    groups the regular expressions would match on the line. Any other line is left to them.
+    """
+    def __init__(self, relation_specs:dict):
+        self._count = len(relation_specs)
+        # (spec position, 0 for words or 1 for scores, regex matching a whole tag)
+        self._tag_regexes = []
+        # (spec position, 0 for words or 1 for scores, regex matching the start of a tag, suffix of the last tag)
+        self._spanning_regexes = []
+        for position, spec in enumerate(relation_specs.values()):
+            for kind, parser in enumerate((spec.words_parser, spec.score_parser)):
+                if parser in _SPANNING_SECTION_REGEXES:
+                    head, suffix = _SPANNING_SECTION_REGEXES[parser]
+                    self._spanning_regexes.append((position, kind, re.compile(head), suffix))
+                else:
+                    tag_pattern = parser[len(_SECTION_PREFIX):-len(_SECTION_SUFFIX)]
+                    self._tag_regexes.append((position, kind, re.compile(tag_pattern)))
+        # Tags seen so far and how they are matched, see _get_tag
+        self._tags = {}
+
+    def parse(self, line:str):
+        '''
+        Returns:
+            tuple(str, list) -- The primary word and for each relation spec a tuple of the lists of its groups of words
+                                and scores, or None when the line must be parsed with the regular expressions
+        '''
+        start = line.find('[')
+        if start < 2 or line[0] != '#':
+            return None
+        end = len(line) - 1 if line.endswith('\n') else len(line)
+        if line[end - 1:end] != ';':
+            return None
+
+        body = line[start:end - 1]
+        pieces = body.split(';')
+        # Each section starts with the only [ of its [tag]:words and holds a single ]
+        if body.count('[') != len(pieces) or body.count(';[') != len(pieces) - 1 \
+                or body.count(']') != len(pieces):
+            return None
+
+        groups = [([], []) for _ in range(self._count)]
+        tags = self._tags
+        # Whether a match of each spanning regex started at an earlier section, see _get_tag
+        started = [False] * len(self._spanning_regexes)
+        for piece in pieces:
+            tag, _, words = piece.partition(']:')
+            if not words:
+                return None
+
+            tag_match = tags.get(tag)
+            if tag_match is None:
+                tag_match = self._get_tag(tag)
+            roles, spans = tag_match
+            for position, kind in roles:
+                groups[position][kind].append(words)
+            # The lazy .*? of a spanning regex ends its match at the first tag it may end at
+            for k, (position, kind, starts, ends) in enumerate(spans):
+                if (started[k] or starts) and ends:
+                    groups[position][kind].append(words)
+                    started[k] = False
+                else:
+                    started[k] = started[k] or starts
 
-def generate_wordpacks(wordpacks_file, wordpack_title_format='^(### \d+ ###)', term_format='^@ ANT-([^=]+) =', wordlist_format='= (.+)( · )?$', wordlist_delim=' · '):
+        return line[1:start], groups
+
+    def _get_tag(self, tag:str):
+        '''
+        Arguments:
+            tag {str} -- The tag of a section, preceded by its [
+
+        Returns:
+            tuple(tuple, tuple) -- The (spec position, kind) pairs the tag is matched by and for each spanning regex,
+                                   its (spec position, kind) and whether a match may start and end at the tag
+        '''
+        name = tag[1:]
+        roles = tuple((position, kind) for position, kind, tag_regex in self._tag_regexes if tag_regex.fullmatch(name))
+        spans = tuple((position, kind, head_regex.match(name) is not None, name.endswith(suffix))
+                      for position, kind, head_regex, suffix in self._spanning_regexes)
+        self._tags[tag] = (roles, spans)
+
+        return self._tags[tag]
+
+def _add_relations(graphs, primary_word, relations):
+    '''
+    Adds the primary word of a line and its related words to the graph of each relation spec
+    '''
+    for word_graph, related_words in zip(graphs, relations):
+        if related_words is None:
+            continue
+        word_graph.add_node(primary_word)
+        for word, score in related_words:
+            word_graph.add_node(word)
+            word_graph.add_edge(primary_word, word, score)
+
+def generate_wordpacks(wordpacks_file, wordpack_title_format=r'^(### \d+ ###)', term_format='^@ ANT-([^=]+) =', wordlist_format='= (.+)( · )?$', wordlist_delim=' · '):
     '''
     A generator function that parses a file containing wordpacks and yields a 
     tuple providing the wordpack title and a dictionary of { "term": [ "word", "list" ] }
@@ -115,12 +500,26 @@ def generate_wordpacks(wordpacks_file, wordpack_title_format='^(### \d+ ###)', t
     ANT-friend: foe · fiend · alien
 
     Arguments:
-        wordpack_file {str} -- Path to the file containing the wordpack groups
+        wordpack_file {str} -- Path to the file containing the wordpack groups, optionally gzip or zstd compressed
         wordpack_title_format {str} -- A regex to parse the wordpack title in group 1
         term_format {str} -- A regex to parse the base term in each term group in group 1
         wordlist_format {str} -- A regex to parse the related terms to the base term in group 1
         wordlist_delim {str} -- A delimeter used to split the wordlist into a list
 
+    Yields:
+        tuple(str, dict) -- A tuple of the Wordpack title and a dictionary of grouped terms where the key is the base term
+    '''
+    logger.info("Processing wordpack file %s", wordpacks_file)
+    with open_text(wordpacks_file) as fh:
+        yield from parse_wordpacks(fh, wordpack_title_format, term_format, wordlist_format, wordlist_delim)
+
+def parse_wordpacks(lines, wordpack_title_format=r'^(### \d+ ###)', term_format='^@ ANT-([^=]+) =', wordlist_format='= (.+)( · )?$', wordlist_delim=' · '):
+    '''
+    A generator function that parses the lines of a wordpacks file the same way as generate_wordpacks
+
+    Arguments:
+        lines {iterable} -- The lines of the wordpacks file
+
     Yields:
         tuple(str, dict) -- A tuple of the Wordpack title and a dictionary of grouped terms where the key is the base term
     '''
@@ -128,41 +527,66 @@ def generate_wordpacks(wordpacks_file, wordpack_title_format='^(### \d+ ###)', t
     term_re = re.compile(term_format)
     wordlist_re = re.compile(wordlist_format)
 
-    logger.info("Processing wordpack file %s", wordpacks_file)
-    with open(wordpacks_file, 'r') as fh:       
-        wordpack_title = None
-        wordpack_dict = {}
-        for line in fh:           
-            matches = wordpack_title_re.search(line)
-            if ( matches != None ):
-                if ( wordpack_title != None and wordpack_dict ):
-                    # Yield previously identified wordpack title and its terms using the defined data structure
-                    yield wordpack_title, wordpack_dict
-                
-                wordpack_title = matches.group(1).strip()
-                wordpack_dict = {}
-                
-                logger.debug("Processing wordpack titled '%s'", wordpack_title)
-                
-                continue
-         
-            # Continue if we haven't found the start of a wordpack
-            if ( wordpack_title is None ): continue
+    wordpack_title = None
+    wordpack_dict = {}
+    for line in lines:           
+        matches = wordpack_title_re.search(line)
+        if ( matches != None ):
+            if ( wordpack_title != None and wordpack_dict ):
+                # Yield previously identified wordpack title and its terms using the defined data structure
+                yield wordpack_title, wordpack_dict
             
-            # Get the main term
-            matches = term_re.search(line)
-            if ( matches == None ): continue
-            term = matches.group(1).strip()
+            wordpack_title = matches.group(1).strip()
+            wordpack_dict = {}
+            
+            logger.debug("Processing wordpack titled '%s'", wordpack_title)
+            
+            continue
+     
+        # Continue if we haven't found the start of a wordpack
+        if ( wordpack_title is None ): continue
+        
+        # Get the main term
+        matches = term_re.search(line)
+        if ( matches == None ): continue
+        term = matches.group(1).strip()
+
+        # Get the term's wordlist
+        matches = wordlist_re.search(line)
+        if ( matches == None ): continue
+        wordlist = matches.group(1).strip().split(wordlist_delim)
+
+        wordpack_dict[term] = wordlist
 
-            # Get the term's wordlist
-            matches = wordlist_re.search(line)
-            if ( matches == None ): continue
-            wordlist = matches.group(1).strip().split(wordlist_delim)
+    if ( wordpack_title != None and wordpack_dict):
+        yield wordpack_title, wordpack_dict
+
+def collect_base_terms(wordpacks_file, **kwargs):
+    '''
+    Collects the distinct base terms of a wordpacks file in the order they first appear
+
+    Arguments:
+        wordpacks_file {str} -- Path to the file containing the wordpack groups
+        kwargs -- Parsing options passed to generate_wordpacks
 
-            wordpack_dict[term] = wordlist
+    Returns:
+        list -- The distinct base terms
+    '''
+    return get_base_terms(generate_wordpacks(wordpacks_file, **kwargs))
+
+def get_base_terms(wordpacks):
+    '''
+    Arguments:
+        wordpacks {iterable} -- Tuples of the wordpack title and its dictionary, as yielded by generate_wordpacks
+
+    Returns:
+        list -- The distinct base terms of the wordpacks in the order they first appear
+    '''
+    base_terms = {}
+    for _, wordpack_dict in wordpacks:
+        base_terms.update(dict.fromkeys(wordpack_dict))
 
-        if ( wordpack_title != None and wordpack_dict):
-            yield wordpack_title, wordpack_dict
+    return list(base_terms)
 
 def _hasAlphaOnly(input):
     '''
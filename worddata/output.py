@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+OUTPUT_FORMATS = ('text', 'jsonl', 'tsv')
+
+# Number of characters rendered before they are written to the file
+DEFAULT_BATCH_SIZE = 1 << 20
+
+TSV_HEADER = "wordpack\tbase_term\trelated_term\tambiguous_with\n"
+
+class WordpackWriter:
+    """Renders wordpacks and their ambiguities and writes them to a file in large batches
+
+    The formats are:
+
+    text -- The wordpacks with their ambiguous related terms highlighted, e.g.
+            ### 1 ###
+            [ dog ] @ ANT-tree = maple · [ dog : canine ] · green
+    jsonl -- One JSON object per wordpack
+    tsv -- One row per related term with the base term it is ambiguous with, if any
+    """
+    def __init__(self, fh, output_format:str='text', term_prefix:str='', batch_size:int=DEFAULT_BATCH_SIZE,
+                 header:bool=True, on_flush:callable=None):
+        '''
+        Arguments:
+            fh {file} -- Text file object the output is written to
+            output_format {str} -- One of OUTPUT_FORMATS
+            term_prefix {str} -- Prefix of the base terms in the text format, e.g. 'ANT-'
+            batch_size {int} -- Number of characters rendered before they are written to the file
+            header {bool} -- Starts the tsv format with its header, e.g. unless the output is appended to another one
+            on_flush {Callable} -- Called after each batch is written to the file with the number of wordpacks in it
+        '''
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format '{output_format}', expected one of {', '.join(OUTPUT_FORMATS)}")
+
+        self.output_format = output_format
+        self.term_prefix = term_prefix
+        self.batch_size = batch_size
+        self.on_flush = on_flush
+        self._fh = fh
+        self._render = getattr(self, '_render_' + output_format)
+        self._batch = []
+        self._batch_length = 0
+        # The header is the only part of a batch that isn't a wordpack
+        self._header = output_format == 'tsv' and header
+        if self._header:
+            self._add(TSV_HEADER)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.flush()
+
+    def write(self, wordpack_title:str, wordpack_dict:dict, ambiguities:dict):
+        '''
+        Renders a wordpack and its ambiguities, as returned by get_ambiguous_antonyms or get_ambiguous_synonyms
+
+        Returns:
+            str -- The rendered wordpack
+        '''
+        rendered = self._render(wordpack_title, wordpack_dict, ambiguities)
+        self._add(rendered)
+
+        return rendered
+
+    def write_rendered(self, rendered:str):
+        '''Writes a wordpack previously rendered by write in the same format'''
+        self._add(rendered)
+
+    def flush(self):
+        '''Writes the rendered wordpacks to the file'''
+        if self._batch:
+            # Count the wordpacks from the batch itself, so that a wordpack is counted if and only if it is written
+            wordpacks = len(self._batch) - self._header
+            self._fh.write(''.join(self._batch))
+            self._batch = []
+            self._batch_length = 0
+            self._header = False
+            if self.on_flush is not None:
+                self.on_flush(wordpacks)
+
+    def _add(self, rendered:str):
+        self._batch.append(rendered)
+        self._batch_length += len(rendered)
+        if self._batch_length >= self.batch_size:
+            self.flush()
+
+    def _render_text(self, wordpack_title, wordpack_dict, ambiguities):
+        lines = [wordpack_title]
+        for base_term, related_terms in wordpack_dict.items():
+            overlap = ambiguities[base_term]['overlap']
+            matches = get_matching_base_terms(ambiguities[base_term])
+
+            terms = ' · '.join(f"[ {matches[related_term]} : {related_term} ]" if related_term in matches
+                               else related_term
+                               for related_term in related_terms)
+            if overlap:
+                lines.append(f"[ {', '.join(dict.fromkeys(overlap))} ] @ {self.term_prefix}{base_term} = {terms}")
+            else:
+                lines.append(f"@ {self.term_prefix}{base_term} = {terms}")
+
+        return '\n'.join(lines) + '\n'
+
+    def _render_jsonl(self, wordpack_title, wordpack_dict, ambiguities):
+        return json.dumps(get_wordpack_record(wordpack_title, wordpack_dict, ambiguities), ensure_ascii=False) + '\n'
+
+    def _render_tsv(self, wordpack_title, wordpack_dict, ambiguities):
+        rows = []
+        for base_term, related_terms in wordpack_dict.items():
+            matches = get_matching_base_terms(ambiguities[base_term])
+            for related_term in related_terms:
+                rows.append(f"{wordpack_title}\t{base_term}\t{related_term}\t{matches.get(related_term, '')}\n")
+
+        return ''.join(rows)
+
+def get_wordpack_record(wordpack_title:str, wordpack_dict:dict, ambiguities:dict):
+    '''
+    Returns:
+        dict -- The wordpack title and, for each base term, its related terms and the ambiguous ones
+                along with the base term they are ambiguous with
+    '''
+    terms = []
+    for base_term, related_terms in wordpack_dict.items():
+        terms.append({
+            'base_term': base_term,
+            'related_terms': related_terms,
+            'ambiguous': [{'related_term': related_term, 'base_term': overlap}
+                          for related_term, overlap in zip(ambiguities[base_term]['related_terms'],
+                                                           ambiguities[base_term]['overlap'])]
+            })
+
+    return {'wordpack': wordpack_title, 'terms': terms}
+
+def get_matching_base_terms(ambiguity:dict):
+    '''
+    Returns:
+        dict -- The ambiguous related terms of a base term and the first base term each one is ambiguous with
+    '''
+    matches = {}
+    for related_term, base_term in zip(ambiguity['related_terms'], ambiguity['overlap']):
+        matches.setdefault(related_term, base_term)
+
+    return matches
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import queue
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Number of items handed between threads at once and number of such chunks a queue holds before the
+# producer waits for the consumer
+DEFAULT_CHUNKSIZE = 64
+DEFAULT_QUEUE_SIZE = 16
+
+# Seconds a blocked producer waits before checking whether the consumer stopped
+_POLL_SECONDS = 0.1
+
+def prefetch(iterable, chunksize:int=DEFAULT_CHUNKSIZE, queue_size:int=DEFAULT_QUEUE_SIZE):
+    '''
+    A generator function that iterates over an iterable in a background thread, e.g. to parse the
+    wordpacks while the previous ones are detected
+
+    The thread runs at most queue_size chunks ahead of the consumer, so a slow consumer holds back
+    the producer rather than letting the items pile up in memory. An exception raised by the
+    iterable is raised again by the generator.
+
+    Arguments:
+        iterable {iterable} -- The items, e.g. the wordpacks yielded by generate_wordpacks
+        chunksize {int} -- Number of items handed to the consumer at once
+        queue_size {int} -- Number of chunks read ahead of the consumer
+
+    Yields:
+        object -- The items of the iterable in order
+    '''
+    chunks = queue.Queue(queue_size)
+    stopped = threading.Event()
+
+    def put(chunk):
+        # Wait for room in the queue unless the consumer stopped
+        while not stopped.is_set():
+            try:
+                chunks.put(chunk, timeout=_POLL_SECONDS)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            chunk = []
+            for item in iterable:
+                chunk.append(item)
+                if len(chunk) >= chunksize:
+                    if not put(chunk):
+                        return
+                    chunk = []
+            if chunk and not put(chunk):
+                return
+            put(None)
+        except BaseException as e:
+            put(e)
+
+    thread = threading.Thread(target=produce, name='prefetch', daemon=True)
+    thread.start()
+    try:
+        while True:
+            chunk = chunks.get()
+            if chunk is None:
+                return
+            if isinstance(chunk, BaseException):
+                raise chunk
+            yield from chunk
+    finally:
+        stopped.set()
+        thread.join()
+
+class BackgroundTask:
+    """Runs a function in a background thread, e.g. to collect the base terms of the wordpacks
+    while the word relations are loaded
+    """
+    def __init__(self, func:callable, *args, **kwargs):
+        self._result = None
+        self._error = None
+        self._thread = threading.Thread(target=self._run, args=(func, args, kwargs), name='background', daemon=True)
+        self._thread.start()
+
+    def result(self):
+        '''
+        Waits for the function to return
+
+        Returns:
+            object -- The return value of the function. An exception raised by the function is raised again
+        '''
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+        return self._result
+
+    def _run(self, func, args, kwargs):
+        try:
+            self._result = func(*args, **kwargs)
+        except BaseException as e:
+            self._error = e
+
+class BackgroundWriter:
+    """A text file object whose writes are done by a background thread, so rendering the output
+    overlaps writing it to the disk
+
+    At most queue_size writes are waiting at once. flush waits for the pending writes, which are
+    then visible through the wrapped file object, e.g. for tell. An error raised by a write is
+    raised again by the next call.
+    """
+    def __init__(self, fh, queue_size:int=DEFAULT_QUEUE_SIZE):
+        '''
+        Arguments:
+            fh {file} -- Text file object the writes are done to
+            queue_size {int} -- Number of writes waiting for the background thread before write blocks
+        '''
+        self._fh = fh
+        self._writes = queue.Queue(queue_size)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name='writer', daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, text:str):
+        self._check()
+        self._writes.put(text)
+        return len(text)
+
+    def flush(self):
+        '''Waits for the pending writes and flushes the wrapped file object'''
+        self._writes.join()
+        self._check()
+        self._fh.flush()
+
+    def tell(self):
+        self.flush()
+        return self._fh.tell()
+
+    def close(self):
+        '''Waits for the pending writes and stops the background thread. The wrapped file object is left open'''
+        if self._thread.is_alive():
+            self._writes.put(None)
+            self._thread.join()
+        self._check()
+
+    def _check(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _run(self):
+        while True:
+            text = self._writes.get()
+            try:
+                if text is None:
+                    return
+                if self._error is None:
+                    self._fh.write(text)
+            except BaseException as e:
+                self._error = e
+            finally:
+                self._writes.task_done()
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+import gzip
+import io
+import logging
+
+try:
+    import zstandard
+except ImportError:
+    # Only needed to read zstd compressed files
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BLOCK_SIZE = 1 << 20
+
+GZIP_MAGIC = b'\x1f\x8b'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+def open_text(file:str, block_size:int=DEFAULT_BLOCK_SIZE):
+    '''
+    Opens a text file for reading, decompressing it transparently if it starts with the gzip
+    or zstd magic number
+
+    The lines are identical to the lines of open(file, 'r'): a decompressed stream is decoded
+    with the same default encoding and the same line ending translation
+
+    Arguments:
+        file {str} -- Path to the file
+        block_size {int} -- Number of decompressed bytes read at once from a compressed file
+
+    Returns:
+        file -- A text file object
+    '''
+    if get_compression(file) is None:
+        return open(file, 'r')
+
+    return io.TextIOWrapper(io.BufferedReader(open_binary(file), block_size))
+
+def open_binary(file:str):
+    '''
+    Opens a file for binary reading, decompressing it if it starts with the gzip or zstd magic number
+
+    Returns:
+        file -- A binary file object
+    '''
+    compression = get_compression(file)
+    if compression == 'gzip':
+        return gzip.open(file, 'rb')
+    if compression == 'zstd':
+        if zstandard is None:
+            raise ImportError(f"The zstandard package is required to read the zstd compressed file {file}")
+        return zstandard.ZstdDecompressor().stream_reader(open(file, 'rb'), closefd=True)
+
+    return open(file, 'rb')
+
+def get_compression(file:str):
+    '''
+    Returns:
+        str -- 'gzip' or 'zstd' if the file is compressed or None otherwise
+    '''
+    with open(file, 'rb') as fh:
+        magic = fh.read(len(ZSTD_MAGIC))
+
+    if magic.startswith(GZIP_MAGIC):
+        return 'gzip'
+    if magic.startswith(ZSTD_MAGIC):
+        return 'zstd'
+
+    return None
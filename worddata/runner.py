@@ -0,0 +1,474 @@
+# -*- coding: utf-8 -*-
+
+from contextlib import nullcontext
+import logging
+
+from worddata.ambiguity import DEFAULT_INDEX_SIZE
+from worddata.cache import DEFAULT_CACHE_DIR, get_file_fingerprint, load_words_graphs_cached
+from worddata.diagnostics import LOG_LEVELS, get_summary, log_summary
+from worddata.incremental import IncrementalState, get_state_key
+from worddata.loader import DEFAULT_PRIMARY_WORD_REGEX, DEFAULT_ANTONYM_REGEX, DEFAULT_ANTONYM_SCORE_REGEX
+from worddata.loader import DEFAULT_ANTONYM_SYNONYM_REGEX, DEFAULT_ANTONYM_SYNONYM_SCORE_REGEX
+from worddata.loader import DEFAULT_SYNONYM_REGEX, DEFAULT_SYNONYM_SCORE_REGEX
+from worddata.loader import RelationSpec, generate_wordpacks, get_base_terms, load_words_graphs
+from worddata.output import OUTPUT_FORMATS, WordpackWriter
+from worddata.pipeline import BackgroundTask, BackgroundWriter, prefetch
+from worddata.sparse import ENGINES, np
+from worddata.stats import RunStats, start_profiler, stop_profiler
+from worddata.workers import DetectionPool
+from worddata.wordpacks import ResumeCheckpoint, WordpackIndex, parse_shard
+
+logger = logging.getLogger(__name__)
+
+class DetectionRun:
+    """Detects the ambiguous terms of every wordpack of a wordpacks file and writes them to an output
+    file, with the options shared by detect-antonyms.py and detect-synonyms.py: the selection of the
+    wordpacks, the loading of the graphs, the engines, the pipeline, incremental and resumed runs, and
+    the statistics
+
+    A detection script subclasses it with the graphs it loads and the way they detect a wordpack, see
+    get_relation_specs, load_demanded_graphs, create_index, create_sparse_index and detect. The
+    command line parameters are defined by add_arguments and checked by check_arguments, which
+    share the add_*_arguments functions with detect-ambiguities.py and detect-server.py.
+    """
+    # Name of the detection, part of the key of the incremental state and of the checkpoint
+    name = None
+    # Regular expression of the base term lines of the wordpacks and the prefix of the base terms in the output
+    term_format = None
+    term_prefix = ''
+    # Number of synonym hops taken by default, the help of --hops and the relations kept by --demand-load
+    default_hops = 0
+    hops_help = None
+    demand_loaded = None
+
+    def __init__(self, args):
+        '''
+        Arguments:
+            args {argparse.args} -- The parameters passed to the script, see add_arguments
+        '''
+        self.args = args
+        self.stats = RunStats()
+        # Number of passes made over the word relations file by load_graph
+        self._relations_passes = 0
+
+    def get_relation_specs(self):
+        '''
+        Returns:
+            dict -- A dictionary of graph names and the RelationSpec used to build each graph
+        '''
+        raise NotImplementedError
+
+    def load_demanded_graphs(self, base_terms:list):
+        '''
+        Returns:
+            dict -- The graphs of get_relation_specs with only the relations needed to detect the base terms, see
+                    load_graph
+        '''
+        raise NotImplementedError
+
+    def create_index(self, graphs:dict):
+        '''
+        Returns:
+            AmbiguityIndex -- The index of the expanded related words of the base terms, passed to detect
+        '''
+        raise NotImplementedError
+
+    def create_sparse_index(self, graphs:dict):
+        '''
+        Returns:
+            SparseAmbiguityIndex -- The index of the expanded related words of every word of the graphs
+        '''
+        raise NotImplementedError
+
+    def detect(self, graphs:dict, index, wordpack_dict:dict):
+        '''
+        Returns:
+            dict -- The ambiguities of a wordpack, as returned by get_ambiguous_antonyms
+        '''
+        raise NotImplementedError
+
+    def load_graph(self, name:str, vocabulary:set):
+        '''
+        Returns:
+            Graph -- The graph of a relation spec with only the edges touching a vocabulary, parsed from the word
+                     relations file without its compiled copy. The lines of the file and their problems are only
+                     counted by the first pass over it
+        '''
+        args = self.args
+        self._relations_passes += 1
+        return load_words_graphs(args.relations, args.primary_word_regex, {name: self.get_relation_specs()[name]},
+                                 args.word_delimeter, jobs=args.jobs, vocabularies={name: vocabulary},
+                                 stats=self.stats, count_lines=self._relations_passes == 1)[name]
+
+    def run(self):
+        '''Detects the wordpacks and writes the output file, the statistics and the profile'''
+        args = self.args
+        stats = self.stats
+        profiler = start_profiler(args.profile)
+
+        relation_specs = self.get_relation_specs()
+        # Settings the output depends on, identifying the incremental state and the checkpoint of the output file
+        settings = dict(script=self.name, primary_word_regex=args.primary_word_regex,
+                        relation_specs={name: list(spec) for name, spec in relation_specs.items()},
+                        word_delimiter=args.word_delimeter, hops=args.hops, hop_cutoff=args.hop_cutoff,
+                        format=args.format)
+
+        with stats.stage('parse_wordpacks'):
+            # Seek to the wordpacks of a shard, to the selected titles or to the wordpacks an interrupted run didn't
+            # write with the index of the wordpacks file
+            checkpoint = None
+            if args.shard or args.only or args.resume:
+                wordpack_index = WordpackIndex.load(args.wordpacks, cache_dir=None if args.no_cache else args.cache_dir)
+                if args.resume:
+                    checkpoint = ResumeCheckpoint(args.output, get_state_key(
+                        args.relations, wordpacks=get_file_fingerprint(args.wordpacks), shard=args.shard,
+                        only=args.only, **settings))
+                positions = wordpack_index.select(args.shard, args.only, checkpoint.start if checkpoint else 0)
+                read_wordpacks = lambda on_read=None: wordpack_index.generate_wordpacks(
+                    positions, term_format=self.term_format, on_read=on_read)
+                stats.count('wordpacks_selected', len(positions))
+            else:
+                read_wordpacks = lambda on_read=None: generate_wordpacks(args.wordpacks, term_format=self.term_format)
+
+            # Incremental runs only expand the base terms of the changed wordpacks, when they are detected, and the
+            # sparse engine expands every word of the graphs
+            collect = args.demand_load or not (args.incremental or args.engine == 'sparse')
+            base_terms_task = None
+            if args.pipeline and collect and not args.demand_load:
+                # Collect the base terms in the background while the word relations are loaded
+                base_terms_task = BackgroundTask(get_base_terms, read_wordpacks())
+            else:
+                base_terms = get_base_terms(read_wordpacks()) if collect else []
+                stats.count('base_terms', len(base_terms))
+
+        with stats.stage('load_relations'):
+            if args.demand_load:
+                graphs = self.load_demanded_graphs(base_terms)
+            else:
+                # Create the graphs of every relation spec from our data in a single pass
+                graphs = load_words_graphs_cached(args.relations, args.primary_word_regex, relation_specs,
+                                                  args.word_delimeter, None if args.no_cache else args.cache_dir,
+                                                  args.mmap, args.jobs, stats)
+
+            if args.stats:
+                for name, graph in graphs.items():
+                    stats.count(name + '_nodes', len(graph))
+                    stats.count(name + '_edges', graph.edge_count())
+
+        if base_terms_task is not None:
+            with stats.stage('parse_wordpacks'):
+                base_terms = base_terms_task.result()
+                stats.count('base_terms', len(base_terms))
+
+        # Expand the related words of every base term found in the wordpacks once
+        with stats.stage('build_index'):
+            if args.engine == 'sparse':
+                # Expand every word of the graphs at once and detect the wordpacks in batches
+                index = self.create_sparse_index(graphs)
+                pool = nullcontext()
+                detect_all = lambda wordpacks: index.detect_wordpacks(wordpacks, stats=stats)
+            else:
+                index = self.create_index(graphs)
+                index.precompute(base_terms)
+                pool = DetectionPool(lambda wordpack_dict: self.detect(graphs, index, wordpack_dict), args.workers)
+                detect_all = lambda wordpacks: pool.detect_wordpacks(wordpacks, stats=stats)
+
+        # Parse out the wordpack title and the groups of words in it
+        wordpacks = read_wordpacks(checkpoint.track if checkpoint else None)
+        if args.pipeline:
+            # Parse the next wordpacks while the previous ones are detected
+            wordpacks = prefetch(wordpacks)
+        state = None
+        if args.incremental:
+            state = IncrementalState(args.incremental, get_state_key(args.relations, **settings))
+
+        # A resumed output and the shards after the first one continue an output that already has the header
+        header = not (checkpoint and checkpoint.output_size) and not (args.shard and args.shard[0] > 1)
+        # The worker processes are forked before the thread of the BackgroundWriter starts
+        with stats.stage('detect'), pool, \
+                checkpoint.open_output() if checkpoint else open(args.output, 'w+') as output_fh, \
+                BackgroundWriter(output_fh) if args.pipeline else nullcontext(output_fh) as fh, \
+                WordpackWriter(fh, args.format, self.term_prefix, header=header,
+                               on_flush=lambda written: checkpoint.save(fh, written) if checkpoint else None) as writer:
+            if state is not None:
+                state.write_wordpacks(writer, wordpacks, detect_all, stats)
+            else:
+                for (wordpack_title, wordpack_dict, ambiguities) in detect_all(wordpacks):
+                    stats.count('wordpacks')
+                    with stats.stage('write_output'):
+                        # The checkpoint only counts the wordpacks the writer flushed to the output file
+                        writer.write(wordpack_title, wordpack_dict, ambiguities)
+
+        if checkpoint:
+            checkpoint.remove()
+        if state is not None:
+            state.save()
+
+        logger.info("Ambiguity index statistics: %s", index.stats())
+        log_summary()
+
+        stop_profiler(profiler, args.profile)
+        if args.stats:
+            stats.details['ambiguity_index'] = index.stats()
+            stats.details['diagnostics'] = get_summary()
+            stats.write(args.stats)
+
+    @classmethod
+    def add_arguments(cls, parser):
+        '''Defines the command line parameters shared by the detection scripts, from -j to --resume'''
+        add_relations_arguments(parser, demand_load=True)
+        parser.add_argument(
+            "--hops",
+            metavar='NUM',
+            required=False,
+            default=cls.default_hops,
+            type=int,
+            help=cls.hops_help)
+        parser.add_argument(
+            "--hop-cutoff",
+            metavar='NUM',
+            required=False,
+            type=float,
+            help="Only follow the synonyms scored at least the provided value in the hops")
+        add_detection_arguments(parser, engine=True)
+        add_log_level_argument(parser)
+        add_format_argument(parser, f"Format of the output file: the wordpacks with the ambiguous {cls.name} "
+                                    "highlighted, one JSON object per wordpack or one tab separated row per related term")
+        parser.add_argument(
+            "--incremental",
+            metavar='PATH',
+            required=False,
+            help="Sidecar file keeping the output of each wordpack between runs. Only the wordpacks that changed are "
+                 "detected again, unless the word relations file or the settings changed")
+        parser.add_argument(
+            "--shard",
+            metavar='I/N',
+            required=False,
+            type=parse_shard,
+            help="Only detect the I-th of N runs of consecutive wordpacks, e.g. 2/4. The outputs of the shards 1 to N "
+                 "concatenated in order are the output of the whole wordpacks file")
+        parser.add_argument(
+            "--only",
+            metavar='TITLE',
+            required=False,
+            action='append',
+            help="Only detect the wordpack with the provided title, e.g. '### 12 ###'. Can be repeated")
+        parser.add_argument(
+            "--resume",
+            action='store_true',
+            help="Record the wordpacks written to the output file and continue after them if the run is interrupted and "
+                 "restarted with the same files and settings")
+
+    @classmethod
+    def check_arguments(cls, parser, args):
+        '''Exits with an error if parameters defined by add_arguments cannot be used together'''
+        check_relations_arguments(parser, args)
+        if args.hops < 0:
+            parser.error("--hops cannot be negative")
+        if args.demand_load and args.hops > cls.default_hops:
+            parser.error(f"--demand-load only loads the {cls.demand_loaded} and cannot be used with --hops above "
+                         f"{cls.default_hops}")
+        if args.engine == 'sparse' and (args.hops != cls.default_hops or args.hop_cutoff is not None):
+            parser.error("--engine sparse only expands the default hops and cannot be used with --hops or --hop-cutoff")
+        if args.resume and args.incremental:
+            parser.error("--resume cannot be used with --incremental, which rewrites the whole output file")
+        if args.engine == 'sparse' and np is None:
+            parser.error("--engine sparse requires the numpy and scipy packages")
+        if args.engine == 'sparse' and args.workers > 1:
+            parser.error("--engine sparse detects batches of wordpacks in a single process and cannot be used with --workers")
+
+def add_relations_arguments(parser, demand_load:bool=False, index_scope:str='wordpacks'):
+    '''
+    Defines the command line parameters of the loading of the word relations shared by every script, from -j
+    to --index-size
+
+    Arguments:
+        demand_load {bool} -- Also defines --demand-load
+        index_scope {str} -- What the expanded related words of the base terms are kept across, e.g. 'requests'
+    '''
+    parser.add_argument(
+        "-j", "--jobs",
+        metavar='NUM',
+        required=False,
+        default=1,
+        type=int,
+        help="Number of processes used to parse the word relations file")
+    parser.add_argument(
+        "--cache-dir",
+        metavar='PATH',
+        required=False,
+        default=DEFAULT_CACHE_DIR,
+        help="Directory holding compiled copies of the word relations file that are reused between runs")
+    parser.add_argument(
+        "--no-cache",
+        action='store_true',
+        help="Always parse the word relations file and never read or write compiled copies")
+    parser.add_argument(
+        "--mmap",
+        action='store_true',
+        help="Serve the word relations directly from the memory-mapped compiled copy instead of loading them into memory")
+    if demand_load:
+        parser.add_argument(
+            "--demand-load",
+            action='store_true',
+            help="Only load the word relations needed by the base terms of the wordpacks file, bypassing the compiled copies")
+    parser.add_argument(
+        "--index-size",
+        metavar='NUM',
+        required=False,
+        default=DEFAULT_INDEX_SIZE,
+        type=int,
+        help=f"Maximum number of base terms whose expanded related words are kept in memory across {index_scope}")
+
+def add_detection_arguments(parser, engine:bool=False):
+    '''
+    Defines the command line parameters of the detection of a wordpacks file, from --workers to --profile
+
+    Arguments:
+        engine {bool} -- Also defines --engine, for the scripts that can detect with the sparse engine
+    '''
+    parser.add_argument(
+        "--workers",
+        metavar='NUM',
+        required=False,
+        default=1,
+        type=int,
+        help="Number of processes used to detect ambiguities in the wordpacks")
+    if engine:
+        parser.add_argument(
+            "--engine",
+            choices=ENGINES,
+            default='python',
+            help="Detect each wordpack with sets of expanded words, or batches of wordpacks with sparse matrices of the "
+                 "expanded words of every word, which requires numpy and scipy")
+        pipeline_help = ("Parse the wordpacks file while the word relations are loaded and while the previous wordpacks "
+                         "are detected, and write the output in the background")
+    else:
+        pipeline_help = ("Parse the wordpacks file while the previous wordpacks are detected and write the outputs in the "
+                         "background")
+    parser.add_argument(
+        "--pipeline",
+        action='store_true',
+        help=pipeline_help)
+    parser.add_argument(
+        "--stats",
+        metavar='PATH',
+        required=False,
+        help="JSON file the time, memory and counters of each stage and the wordpack latencies are written to")
+    parser.add_argument(
+        "--profile",
+        metavar='PATH',
+        required=False,
+        help="File the cProfile statistics of the run are written to, readable with the pstats module")
+
+def add_log_level_argument(parser, summarized:str="at the end of the run", ambiguities:bool=True):
+    '''
+    Defines the --log-level command line parameter, see configure_logging
+
+    Arguments:
+        summarized {str} -- When the problems found while parsing the word relations file are summarized
+        ambiguities {bool} -- The script logs every ambiguity at DEBUG level
+    '''
+    logged = "Every problem found while parsing the word relations file and every ambiguity are" if ambiguities \
+        else "Every problem found while parsing the word relations file is"
+    parser.add_argument(
+        "--log-level",
+        choices=LOG_LEVELS,
+        default='INFO',
+        help=f"Level of the messages logged. {logged} logged at DEBUG level, otherwise the problems are counted and "
+             f"summarized with a few examples {summarized}")
+
+def add_format_argument(parser, help:str):
+    '''Defines the --format command line parameter, see WordpackWriter'''
+    parser.add_argument(
+        "--format",
+        choices=OUTPUT_FORMATS,
+        default='text',
+        help=help)
+
+def add_engine_arguments(parser):
+    '''
+    Defines the command line parameters of the relations loaded by DetectorEngine, from -p to -d, see
+    get_engine_relation_specs
+    '''
+    parser.add_argument(
+        "-p", "--primary-word-regex",
+        metavar='REGEX',
+        required=False,
+        default=DEFAULT_PRIMARY_WORD_REGEX,
+        help="Regex to parse the list of words in the word relations file")
+    parser.add_argument(
+        "--antonym-regex",
+        metavar='REGEX',
+        required=False,
+        default=DEFAULT_ANTONYM_REGEX,
+        help="Regex to parse the list of antonyms in the word relations file")
+    parser.add_argument(
+        "--antonym-score-regex",
+        metavar='REGEX',
+        required=False,
+        default=DEFAULT_ANTONYM_SCORE_REGEX,
+        help="Regex to parse the score of antonyms in the word relations file")
+    parser.add_argument(
+        "--antonym-synonym-regex",
+        metavar='REGEX',
+        required=False,
+        default=DEFAULT_ANTONYM_SYNONYM_REGEX,
+        help="Regex to parse the list of synonyms of antonyms in the word relations file")
+    parser.add_argument(
+        "--antonym-synonym-score-regex",
+        metavar='REGEX',
+        required=False,
+        default=DEFAULT_ANTONYM_SYNONYM_SCORE_REGEX,
+        help="Regex to parse the score of synonyms of antonyms in the word relations file")
+    parser.add_argument(
+        "--antonym-synonym-cutoff",
+        metavar='NUM',
+        required=False,
+        default="8.0",
+        type=float,
+        help="Eliminate synonyms of antonyms that are below the provided value")
+    parser.add_argument(
+        "--synonym-regex",
+        metavar='REGEX',
+        required=False,
+        default=DEFAULT_SYNONYM_REGEX,
+        help="Regex to parse the list of synonyms in the word relations file")
+    parser.add_argument(
+        "--synonym-score-regex",
+        metavar='REGEX',
+        required=False,
+        default=DEFAULT_SYNONYM_SCORE_REGEX,
+        help="Regex to parse the score of synonyms in the word relations file")
+    parser.add_argument(
+        "--synonym-cutoff",
+        metavar='NUM',
+        required=False,
+        default="6.0",
+        type=float,
+        help="Eliminate synonyms that are below the provided value")
+    parser.add_argument(
+        "-d", "--word-delimeter",
+        metavar='CHAR',
+        required=False,
+        default="|",
+        help="Delimiter to split the text matched by the regexes into a list")
+
+def get_engine_relation_specs(args):
+    '''
+    Returns:
+        dict -- The RelationSpec of each graph of DetectorEngine, from the parameters defined by add_engine_arguments
+    '''
+    return {
+        'antonyms': RelationSpec(args.antonym_regex, args.antonym_score_regex),
+        'antonym_synonyms': RelationSpec(args.antonym_synonym_regex, args.antonym_synonym_score_regex,
+                                         args.antonym_synonym_cutoff),
+        'synonyms': RelationSpec(args.synonym_regex, args.synonym_score_regex, args.synonym_cutoff)
+        }
+
+def check_relations_arguments(parser, args):
+    '''Exits with an error if parameters defined by add_relations_arguments cannot be used together'''
+    if args.mmap and args.no_cache:
+        parser.error("--mmap requires the compiled copy of the word relations file and cannot be used with --no-cache")
+    if args.mmap and getattr(args, 'demand_load', False):
+        parser.error("--mmap requires the compiled copy of the word relations file and cannot be used with --demand-load")
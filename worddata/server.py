@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import io
+import json
+import logging
+import threading
+import time
+
+from worddata.ambiguity import DEFAULT_INDEX_SIZE
+from worddata.cache import DEFAULT_CACHE_DIR, get_file_fingerprint
+from worddata.diagnostics import clear_diagnostics, get_summary, log_summary
+from worddata.engine import DetectorEngine, MODES
+from worddata.loader import parse_wordpacks
+from worddata.output import WordpackWriter, get_wordpack_record
+
+logger = logging.getLogger(__name__)
+
+# Base term format of the wordpacks submitted as text and the prefix of the base terms in the text output
+TERM_FORMATS = {
+    'antonyms': '^@ ANT-([^=]+) =',
+    'synonyms': '^@ ([^=]+) ='
+    }
+TERM_PREFIXES = {
+    'antonyms': 'ANT-',
+    'synonyms': ''
+    }
+# Formats of the detected wordpacks in a response
+FORMATS = ('json', 'text')
+
+class DetectionService:
+    """Keeps the graphs of a word relations file in memory and detects the ambiguous terms of
+    the wordpacks submitted to it
+
+    The relation specs must be named after the graphs of DetectorEngine. The graphs
+    are reloaded before a request is handled when the size or modification time of the word
+    relations file changed. If the reload fails, the previous graphs are kept and the file isn't
+    reloaded again until it changes once more. Requests are detected concurrently, each with the
+    graphs loaded when it was received.
+
+    e.g. request:
+    {
+        "id": 1,
+        "mode": "antonyms",
+        "wordpacks": [{"wordpack": "### 1 ###", "terms": {"tree": ["maple", "canine"], "dog": ["rover"]}}]
+    }
+
+    The wordpacks can also be submitted as "text" in the format of a wordpacks file. The response
+    holds the "wordpacks" in the format of get_wordpack_record, or the "text" of the highlighted
+    wordpacks when the request's "format" is "text", or an "error".
+    """
+    def __init__(self, relations_file:str, primary_word_parser:str, relation_specs:dict, word_delimiter:str='|',
+                 cache_dir:str=DEFAULT_CACHE_DIR, memory_map:bool=False, jobs:int=1,
+                 index_size:int=DEFAULT_INDEX_SIZE):
+        self.relations_file = relations_file
+        self.primary_word_parser = primary_word_parser
+        self.relation_specs = relation_specs
+        self.word_delimiter = word_delimiter
+        self.cache_dir = cache_dir
+        self.memory_map = memory_map
+        self.jobs = jobs
+        self.index_size = index_size
+        self.fingerprint = None
+        # Fingerprint of the word relations file when it last failed to reload
+        self.failed_fingerprint = None
+        self.loaded_at = None
+        self.reloads = 0
+        self.requests = 0
+        # Problems found while parsing the word relations file on the last load
+        self.diagnostics = {}
+        self._engine = None
+        # Held while the graphs are reloaded, the engine is read or the counters are updated
+        self._lock = threading.RLock()
+
+        self.load()
+
+    def load(self):
+        '''Loads the graphs of the word relations file into a new detector engine'''
+        fingerprint = get_file_fingerprint(self.relations_file)
+        clear_diagnostics()
+        self._engine = DetectorEngine.load(self.relations_file, self.primary_word_parser, self.relation_specs,
+                                           self.word_delimiter, self.cache_dir, self.memory_map, self.jobs,
+                                           self.index_size)
+        self.fingerprint = fingerprint
+        self.loaded_at = time.time()
+        logger.info("Loaded word relations file %s", self.relations_file)
+        log_summary()
+        self.diagnostics = get_summary()
+
+    def reload_if_changed(self):
+        '''
+        Returns:
+            bool -- True if the word relations file changed and its graphs were reloaded
+        '''
+        with self._lock:
+            fingerprint = None
+            try:
+                fingerprint = get_file_fingerprint(self.relations_file)
+                if fingerprint in (self.fingerprint, self.failed_fingerprint):
+                    return False
+                logger.info("Word relations file %s changed - reloading it", self.relations_file)
+                self.load()
+            except (OSError, ValueError) as e:
+                logger.error("Unable to reload word relations file %s, keeping the loaded graphs: %s",
+                             self.relations_file, e)
+                self.failed_fingerprint = fingerprint
+                return False
+
+            self.failed_fingerprint = None
+            self.reloads += 1
+            return True
+
+    def handle(self, request:dict):
+        '''
+        Returns:
+            dict -- The response to a request
+        '''
+        return self.answer(request)[1]
+
+    def answer(self, request:dict):
+        '''
+        Returns:
+            tuple(int, dict) -- The HTTP status of the response to a request, 400 for an invalid request and 500 for
+                                an unexpected failure, and the response
+        '''
+        response = {'id': request.get('id')} if isinstance(request, dict) else {'id': None}
+        try:
+            with self._lock:
+                self.requests += 1
+                self.reload_if_changed()
+                engine = self._engine
+            # Detect outside of the lock so that requests are answered concurrently. A reload replaces the engine
+            # rather than changing it, so the request is answered with the graphs loaded when it started
+            response.update(self._detect(engine, request))
+        except ValueError as e:
+            response['error'] = str(e)
+            return 400, response
+        except Exception as e:
+            # A request the validation missed must not stop the service
+            logger.exception("Unable to handle request %s", response['id'])
+            response['error'] = f"Internal error: {e}"
+            return 500, response
+
+        return 200, response
+
+    def status(self):
+        '''
+        Returns:
+            dict -- The loaded word relations file, the size of its graphs, the problems found while parsing it and
+                    the request counters
+        '''
+        with self._lock:
+            return {
+                'relations': self.relations_file,
+                'fingerprint': self.fingerprint,
+                'failed_fingerprint': self.failed_fingerprint,
+                'loaded_at': self.loaded_at,
+                'reloads': self.reloads,
+                'requests': self.requests,
+                'nodes': {name: len(graph) for name, graph in self._engine.graphs.items()},
+                'indexes': self._engine.stats(),
+                'diagnostics': self.diagnostics
+                }
+
+    def _detect(self, engine, request):
+        if not isinstance(request, dict):
+            raise ValueError("The request must be a JSON object")
+
+        mode = request.get('mode', 'antonyms')
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode '{mode}', expected one of {', '.join(MODES)}")
+        output_format = request.get('format', 'json')
+        if output_format not in FORMATS:
+            raise ValueError(f"Unknown format '{output_format}', expected one of {', '.join(FORMATS)}")
+
+        results = [(wordpack_title, wordpack_dict, engine.detect(mode, wordpack_dict))
+                   for wordpack_title, wordpack_dict in _get_wordpacks(request, mode)]
+
+        if output_format == 'text':
+            fh = io.StringIO()
+            with WordpackWriter(fh, 'text', TERM_PREFIXES[mode]) as writer:
+                for result in results:
+                    writer.write(*result)
+            return {'text': fh.getvalue()}
+
+        return {'wordpacks': [get_wordpack_record(*result) for result in results]}
+
+def _get_wordpacks(request, mode):
+    '''
+    Returns:
+        list -- The (title, wordpack dictionary) tuples of the wordpacks of a request
+    '''
+    if 'text' in request:
+        if not isinstance(request['text'], str):
+            raise ValueError("'text' must be a string")
+        return list(parse_wordpacks(request['text'].splitlines(True), term_format=TERM_FORMATS[mode]))
+
+    wordpacks = request.get('wordpacks')
+    if not isinstance(wordpacks, list):
+        raise ValueError("The request must hold a list of 'wordpacks' or the 'text' of a wordpacks file")
+
+    parsed = []
+    for wordpack in wordpacks:
+        if not isinstance(wordpack, dict) or not isinstance(wordpack.get('wordpack'), str):
+            raise ValueError("Each wordpack must hold its 'wordpack' title as a string")
+        terms = wordpack.get('terms')
+        if not isinstance(terms, dict) or not all(isinstance(related_terms, list) and
+                                                  all(isinstance(term, str) for term in related_terms)
+                                                  for related_terms in terms.values()):
+            raise ValueError("Each wordpack must hold a dictionary of 'terms' and their list of related terms")
+        parsed.append((wordpack['wordpack'], terms))
+
+    return parsed
+
+def serve_http(service:DetectionService, host:str='127.0.0.1', port:int=8080):
+    '''
+    Answers requests until interrupted: POST /detect with a request as its JSON body, POST /reload
+    to reload the graphs if the word relations file changed and GET /status
+    '''
+    server = ThreadingHTTPServer((host, port), _RequestHandler)
+    server.service = service
+    logger.info("Serving ambiguity detection on http://%s:%d", *server.server_address[:2])
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+def serve_lines(service:DetectionService, input_fh, output_fh):
+    '''
+    Answers requests read one JSON object per line from input_fh with one JSON object per line
+    written to output_fh, until the end of input_fh
+    '''
+    for line in input_fh:
+        if not line.strip():
+            continue
+        try:
+            response = service.handle(json.loads(line))
+        except json.JSONDecodeError as e:
+            response = {'id': None, 'error': f"Invalid JSON request: {e}"}
+
+        output_fh.write(json.dumps(response, ensure_ascii=False) + '\n')
+        output_fh.flush()
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == '/status':
+            self._respond(200, self.server.service.status())
+        else:
+            self._respond(404, {'error': f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        service = self.server.service
+        if self.path == '/reload':
+            self._respond(200, {'reloaded': service.reload_if_changed()})
+            return
+        if self.path != '/detect':
+            self._respond(404, {'error': f"Unknown path {self.path}"})
+            return
+
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length))
+        except (ValueError, UnicodeDecodeError) as e:
+            self._respond(400, {'id': None, 'error': f"Invalid JSON request: {e}"})
+            return
+
+        self._respond(*service.answer(request))
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+    def _respond(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+
+from itertools import repeat
+import logging
+import time
+
+try:
+    import numpy as np
+    import scipy.sparse
+except ImportError:
+    # The sparse engine is optional
+    np = None
+    scipy = None
+
+logger = logging.getLogger(__name__)
+
+ENGINES = ('python', 'sparse')
+
+# Number of wordpacks detected by each batch of array operations
+DEFAULT_BATCH_SIZE = 1024
+
+def create_sparse_antonym_index(antonyms_graph, synonyms_graph):
+    '''
+    Returns:
+        SparseAmbiguityIndex -- An index of the antonyms of every word and the synonyms of those antonyms,
+                                computed as the sparse product A + A·S of the adjacency matrices of the graphs
+    '''
+    vocabulary = _get_vocabulary(antonyms_graph, synonyms_graph)
+    antonyms = _get_adjacency_matrix(antonyms_graph, vocabulary)
+    synonyms = _get_adjacency_matrix(synonyms_graph, vocabulary)
+
+    return SparseAmbiguityIndex(vocabulary, antonyms + antonyms @ synonyms)
+
+def create_sparse_synonym_index(synonyms_graph):
+    '''
+    Returns:
+        SparseAmbiguityIndex -- An index of the synonyms of every word, the adjacency matrix of the graph
+    '''
+    vocabulary = _get_vocabulary(synonyms_graph)
+
+    return SparseAmbiguityIndex(vocabulary, _get_adjacency_matrix(synonyms_graph, vocabulary))
+
+class SparseAmbiguityIndex:
+    """The expanded set of related words of every word of the graphs, held as a sparse matrix
+    over an interned vocabulary, that detects the ambiguities of batches of wordpacks at once
+
+    A batch gathers the expansion rows of every base term of its wordpacks from the CSR matrix
+    and joins them with the sorted related terms of the same wordpacks with a binary search,
+    so the Python work left per wordpack is mapping its terms to IDs and building the result
+    dictionaries.
+
+    Requires the numpy and scipy packages.
+    """
+    def __init__(self, vocabulary:dict, expansions):
+        '''
+        Arguments:
+            vocabulary {dict} -- The ID of each word, the rows and columns of the expansion matrix
+            expansions {scipy.sparse matrix} -- The words each word is expanded to, nonzero where a row's word expands
+                                                to a column's word
+        '''
+        expansions = expansions.tocsr()
+        expansions.sum_duplicates()
+        expansions.sort_indices()
+
+        self.vocabulary = vocabulary
+        self.batches = 0
+        self._indptr = expansions.indptr.astype(np.int64)
+        self._indices = expansions.indices.astype(np.int64)
+
+    def __len__(self):
+        return len(self.vocabulary)
+
+    def precompute(self, terms):
+        '''Does nothing since the expansions of every word are computed when the index is created'''
+
+    def stats(self):
+        '''
+        Returns:
+            dict -- The size of the vocabulary, the number of expanded words and the number of batches
+        '''
+        return {
+            'vocabulary': len(self.vocabulary),
+            'expansions': len(self._indices),
+            'batches': self.batches
+            }
+
+    def detect_wordpacks(self, wordpacks, batch_size:int=DEFAULT_BATCH_SIZE, stats=None):
+        '''
+        A generator function that detects the ambiguities of wordpacks in batches and yields the
+        results in the order of the wordpacks
+
+        Arguments:
+            wordpacks {iterable} -- Tuples of the wordpack title and its dictionary, as yielded by generate_wordpacks
+            batch_size {int} -- Number of wordpacks detected at once
+            stats {RunStats} -- Records the detection latency of each wordpack, as the latency of its batch divided
+                                by the size of the batch
+
+        Yields:
+            tuple(str, dict, dict) -- The wordpack title, its dictionary and its ambiguities, as returned by
+                                      get_ambiguous_antonyms or get_ambiguous_synonyms
+        '''
+        batch = []
+        for wordpack in wordpacks:
+            batch.append(wordpack)
+            if len(batch) >= batch_size:
+                yield from self._detect_batch(batch, stats)
+                batch = []
+        if batch:
+            yield from self._detect_batch(batch, stats)
+
+    def detect(self, wordpack_dict:dict):
+        '''
+        Returns:
+            dict -- The ambiguities of a single wordpack, as returned by get_ambiguous_antonyms
+        '''
+        return self.find_overlaps([wordpack_dict])[0]
+
+    def find_overlaps(self, wordpack_dicts:list):
+        '''Finds the related terms of each base term that belong to the expanded set of words of another
+        base term of the same wordpack, for a batch of wordpacks
+
+        Returns:
+            list -- The ambiguities of each wordpack in the same structure and order as find_overlaps
+        '''
+        self.batches += 1
+        vocabulary = self.vocabulary
+        size = len(vocabulary)
+
+        # Every base term of the batch, its wordpack and its number of related terms
+        base_ids = []
+        base_packs = []
+        base_terms = []
+        base_lengths = []
+        # Every related term of the batch
+        term_ids = []
+        for pack_index, wordpack_dict in enumerate(wordpack_dicts):
+            for base_term, related_terms in wordpack_dict.items():
+                base_ids.append(vocabulary.get(base_term, -1))
+                base_packs.append(pack_index)
+                base_terms.append((pack_index, base_term, related_terms))
+                base_lengths.append(len(related_terms))
+                term_ids.extend(map(vocabulary.get, related_terms, repeat(-1)))
+
+        results = [{base_term: {'overlap': [], 'related_terms': []} for base_term in wordpack_dict}
+                   for wordpack_dict in wordpack_dicts]
+        if not term_ids or not len(self._indices):
+            return results
+
+        base_ids = np.array(base_ids, dtype=np.int64)
+        base_packs = np.array(base_packs, dtype=np.int64)
+        base_lengths = np.array(base_lengths, dtype=np.int64)
+        term_ids = np.array(term_ids, dtype=np.int64)
+        # The base term each related term belongs to and its position in the list
+        term_owners = np.repeat(np.arange(len(base_ids), dtype=np.int64), base_lengths)
+        term_positions = _get_ranges(np.zeros(len(base_ids), dtype=np.int64), base_lengths)
+
+        # Related terms of the vocabulary sorted by wordpack and word
+        term_keys = base_packs[term_owners] * size + term_ids
+        sorted_terms = np.flatnonzero(term_ids >= 0)
+        sorted_terms = sorted_terms[np.argsort(term_keys[sorted_terms], kind='stable')]
+        term_keys = term_keys[sorted_terms]
+
+        # Expanded words of every base term of the vocabulary, as rows of the expansion matrix
+        bases = np.flatnonzero(base_ids >= 0)
+        starts = self._indptr[base_ids[bases]]
+        lengths = self._indptr[base_ids[bases] + 1] - starts
+        expanded_bases = np.repeat(bases, lengths)
+        expanded_keys = base_packs[expanded_bases] * size + self._indices[_get_ranges(starts, lengths)]
+
+        # Join the expanded words with the related terms of the same wordpack
+        first = np.searchsorted(term_keys, expanded_keys, 'left')
+        counts = np.searchsorted(term_keys, expanded_keys, 'right') - first
+        matched_bases = np.repeat(expanded_bases, counts)
+        matched_terms = sorted_terms[_get_ranges(first, counts)]
+        matched_owners = term_owners[matched_terms]
+        matched_positions = term_positions[matched_terms]
+
+        # Don't compare the same group of words
+        keep = matched_owners != matched_bases
+        matched_owners, matched_bases, matched_positions = (matched_owners[keep], matched_bases[keep],
+                                                            matched_positions[keep])
+
+        # Order the overlaps by base term and then by related term
+        order = np.lexsort((matched_positions, matched_bases, matched_owners))
+
+        # Each ambiguity is only logged at DEBUG level, checked once per batch
+        debug = logger.isEnabledFor(logging.DEBUG)
+        for owner, base, position in zip(matched_owners[order].tolist(), matched_bases[order].tolist(),
+                                         matched_positions[order].tolist()):
+            pack_index, base_term, related_terms = base_terms[owner]
+            overlap = base_terms[base][1]
+            ambiguity = results[pack_index][base_term]
+            ambiguity['overlap'].append(overlap)
+            ambiguity['related_terms'].append(related_terms[position])
+            if debug:
+                logger.debug("Base term '%s' and its related term '%s' are ambiguous with base term group '%s'",
+                             base_term, related_terms[position], overlap)
+
+        return results
+
+    def _detect_batch(self, batch, stats):
+        start = time.perf_counter()
+        results = self.find_overlaps([wordpack_dict for _, wordpack_dict in batch])
+        if stats is not None:
+            seconds = (time.perf_counter() - start) / len(batch)
+            for _ in batch:
+                stats.record_latency(seconds)
+
+        for (wordpack_title, wordpack_dict), ambiguities in zip(batch, results):
+            yield wordpack_title, wordpack_dict, ambiguities
+
+def _get_ranges(starts, lengths):
+    # Concatenation of the ranges [start, start + length)
+    offsets = np.arange(lengths.sum(), dtype=np.int64) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+
+    return np.repeat(starts, lengths) + offsets
+
+def _get_vocabulary(*graphs):
+    if np is None:
+        raise ImportError("The numpy and scipy packages are required by the sparse engine")
+
+    vocabulary = {}
+    for graph in graphs:
+        for name in graph.nodes:
+            vocabulary.setdefault(name, len(vocabulary))
+
+    return vocabulary
+
+def _get_adjacency_matrix(graph, vocabulary:dict):
+    rows = []
+    columns = []
+    for name, node in graph.nodes.items():
+        row = vocabulary[name]
+        for neighbor in node.neighbors:
+            rows.append(row)
+            columns.append(vocabulary[neighbor])
+
+    return scipy.sparse.csr_matrix((np.ones(len(rows), dtype=np.int32), (rows, columns)),
+                                   shape=(len(vocabulary), len(vocabulary)))
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+
+from contextlib import contextmanager
+import cProfile
+import json
+import logging
+import sys
+import time
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+LATENCY_PERCENTILES = (50, 90, 99)
+
+class RunStats:
+    """Collects the wall and CPU time of the stages of a run along with counters and
+    the latency of each wordpack detection
+
+    Stages may be nested and entered several times. The time reported for a stage
+    excludes the time spent in the stages nested within it, so the stage times add
+    up to the time of the run. Counters incremented while a stage is active are also
+    reported per stage along with their rate per second of that stage.
+    """
+    def __init__(self):
+        self.stages = {}
+        self.counters = {}
+        self.latencies = []
+        # Additional measurements reported as they are, e.g. cache statistics
+        self.details = {}
+        self._active = []
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+
+    @contextmanager
+    def stage(self, name:str):
+        '''Measures the code run within the context as the named stage'''
+        stage = self.stages.setdefault(name, {'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'counters': {}})
+        # The time spent in nested stages, deducted from this stage
+        nested = [0.0, 0.0]
+        self._active.append((stage, nested))
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield stage
+        finally:
+            wall = time.perf_counter() - wall
+            cpu = time.process_time() - cpu
+            self._active.pop()
+            stage['wall_seconds'] += wall - nested[0]
+            stage['cpu_seconds'] += cpu - nested[1]
+            stage['peak_rss_kb'] = get_peak_rss_kb()
+            if self._active:
+                self._active[-1][1][0] += wall
+                self._active[-1][1][1] += cpu
+
+    def count(self, name:str, value:int=1):
+        '''Increments a counter of the run and of the active stage'''
+        self.counters[name] = self.counters.get(name, 0) + value
+        if self._active:
+            counters = self._active[-1][0]['counters']
+            counters[name] = counters.get(name, 0) + value
+
+    def record_latency(self, seconds:float):
+        '''Records the detection latency of a wordpack'''
+        self.latencies.append(seconds)
+
+    def report(self):
+        '''
+        Returns:
+            dict -- The measurements of the run
+        '''
+        stages = {}
+        for name, stage in self.stages.items():
+            stages[name] = dict(stage, rates={
+                counter + '_per_second': value / stage['wall_seconds'] if stage['wall_seconds'] else None
+                for counter, value in stage['counters'].items()})
+
+        return {
+            'wall_seconds': time.perf_counter() - self._wall,
+            'cpu_seconds': time.process_time() - self._cpu,
+            'peak_rss_kb': get_peak_rss_kb(),
+            'stages': stages,
+            'counters': self.counters,
+            'wordpack_latency_seconds': get_latency_summary(self.latencies),
+            **self.details
+            }
+
+    def write(self, path:str):
+        '''Writes the measurements of the run to a JSON file'''
+        with open(path, 'w') as fh:
+            json.dump(self.report(), fh, indent=2)
+            fh.write("\n")
+        logger.info("Wrote run statistics to %s", path)
+
+def get_latency_summary(latencies:list):
+    '''
+    Returns:
+        dict -- The count, mean, maximum and percentiles of a list of latencies
+    '''
+    if not latencies:
+        return {'count': 0}
+
+    ordered = sorted(latencies)
+    summary = {
+        'count': len(ordered),
+        'mean': sum(ordered) / len(ordered),
+        'max': ordered[-1]
+        }
+    for percentile in LATENCY_PERCENTILES:
+        # Nearest rank percentile
+        rank = max(1, -(-percentile * len(ordered) // 100))
+        summary[f'p{percentile}'] = ordered[rank - 1]
+
+    return summary
+
+def get_peak_rss_kb():
+    '''
+    Returns:
+        int -- Peak resident set size of the process in kilobytes or None if it is unknown
+    '''
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes rather than kilobytes
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+def start_profiler(path:str=None):
+    '''
+    Returns:
+        cProfile.Profile -- A running profiler or None if no profile output path is provided
+    '''
+    if path is None:
+        return None
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+
+    return profiler
+
+def stop_profiler(profiler, path:str=None):
+    '''Stops a profiler returned by start_profiler and dumps its statistics to a file readable by pstats'''
+    if profiler is None:
+        return
+
+    profiler.disable()
+    profiler.dump_stats(path)
+    logger.info("Wrote profile to %s", path)
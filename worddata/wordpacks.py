@@ -0,0 +1,389 @@
+# -*- coding: utf-8 -*-
+
+from array import array
+from collections import deque
+import hashlib
+import io
+import json
+import locale
+import logging
+import os
+import re
+import tempfile
+
+from worddata.cache import DEFAULT_CACHE_DIR, get_file_fingerprint
+from worddata.loader import parse_wordpacks
+from worddata.reader import DEFAULT_BLOCK_SIZE, open_binary
+
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT_VERSION = 1
+CHECKPOINT_FORMAT_VERSION = 1
+
+# Suffix of the checkpoint file of an output file
+CHECKPOINT_SUFFIX = '.resume'
+
+DEFAULT_WORDPACK_TITLE_FORMAT = r'^(### \d+ ###)'
+
+class WordpackIndex:
+    """The title and byte offset of each wordpack of a wordpacks file
+
+    The index is built by a single pass over the file and gives random access to the
+    wordpacks: a selection of wordpacks is read by seeking to the first wordpack of each
+    run of consecutive wordpacks. Seeking in a compressed file decompresses the file up to
+    the offset, so only uncompressed files are read without going through the skipped
+    wordpacks.
+    """
+    def __init__(self, wordpacks_file:str, titles:list, offsets, size:int,
+                 wordpack_title_format:str=DEFAULT_WORDPACK_TITLE_FORMAT):
+        '''
+        Arguments:
+            wordpacks_file {str} -- Path to the wordpacks file
+            titles {list} -- The title of each wordpack, as parsed by generate_wordpacks
+            offsets {array} -- The byte offset of the title line of each wordpack in the decompressed file
+            size {int} -- The size of the decompressed file, where the last wordpack ends
+            wordpack_title_format {str} -- The regex the titles were parsed with
+        '''
+        self.wordpacks_file = wordpacks_file
+        self.titles = titles
+        self.offsets = offsets
+        self.size = size
+        self.wordpack_title_format = wordpack_title_format
+
+    def __len__(self):
+        return len(self.titles)
+
+    @classmethod
+    def build(cls, wordpacks_file:str, wordpack_title_format:str=DEFAULT_WORDPACK_TITLE_FORMAT):
+        '''
+        Finds the title lines of a wordpacks file in a single pass
+
+        Returns:
+            WordpackIndex -- The index of the wordpacks file
+        '''
+        logger.info("Indexing wordpack file %s", wordpacks_file)
+        wordpack_title_re = re.compile(wordpack_title_format)
+        encoding = locale.getpreferredencoding(False)
+
+        titles = []
+        offsets = array('q')
+        offset = 0
+        with io.BufferedReader(open_binary(wordpacks_file), DEFAULT_BLOCK_SIZE) as fh:
+            for line in fh:
+                matches = wordpack_title_re.search(line.decode(encoding, 'replace'))
+                if matches is not None:
+                    titles.append(matches.group(1).strip())
+                    offsets.append(offset)
+                offset += len(line)
+
+        return cls(wordpacks_file, titles, offsets, offset, wordpack_title_format)
+
+    @classmethod
+    def load(cls, wordpacks_file:str, wordpack_title_format:str=DEFAULT_WORDPACK_TITLE_FORMAT,
+             cache_dir:str=DEFAULT_CACHE_DIR):
+        '''
+        Reads the index of a wordpacks file from the cache directory, or builds it and writes it
+        there if it is missing or the size or modification time of the wordpacks file changed
+
+        Arguments:
+            cache_dir {str} -- Directory holding the index files. The index is always built if None
+
+        Returns:
+            WordpackIndex -- The index of the wordpacks file
+        '''
+        if cache_dir is None:
+            return cls.build(wordpacks_file, wordpack_title_format)
+
+        index_file = get_index_path(cache_dir, wordpacks_file, wordpack_title_format)
+        fingerprint = get_file_fingerprint(wordpacks_file)
+        if os.path.exists(index_file):
+            try:
+                index = cls.read(index_file, wordpacks_file, fingerprint)
+                if index is not None:
+                    logger.info("Loaded the index of wordpack file %s from cache %s", wordpacks_file, index_file)
+                    return index
+            except (OSError, ValueError) as e:
+                logger.warning("Ignoring unreadable wordpack index %s: %s", index_file, e)
+
+        index = cls.build(wordpacks_file, wordpack_title_format)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            index.write(index_file, fingerprint)
+            logger.info("Wrote wordpack index %s", index_file)
+        except OSError as e:
+            logger.warning("Unable to write wordpack index %s: %s", index_file, e)
+
+        return index
+
+    @classmethod
+    def read(cls, path:str, wordpacks_file:str, fingerprint:list=None):
+        '''
+        Returns:
+            WordpackIndex -- The index read from an index file, or None if it was written for another
+                             version of the wordpacks file
+        '''
+        with open(path, 'rb') as fh:
+            header = json.loads(fh.readline())
+            if header.get('version') != INDEX_FORMAT_VERSION or header.get('fingerprint') != fingerprint:
+                return None
+            offsets = array('q')
+            offsets.frombytes(fh.read(header['count'] * offsets.itemsize))
+            titles = fh.read().decode('utf-8').split('\n') if header['count'] else []
+
+        if len(offsets) != header['count'] or len(titles) != header['count']:
+            raise ValueError("Truncated wordpack index")
+
+        return cls(wordpacks_file, titles, offsets, header['size'], header['wordpack_title_format'])
+
+    def write(self, path:str, fingerprint:list=None):
+        '''Writes the index to a file made of a JSON header line, the offsets and the titles. It is replaced atomically'''
+        header = json.dumps({
+            'version': INDEX_FORMAT_VERSION,
+            'fingerprint': fingerprint,
+            'wordpack_title_format': self.wordpack_title_format,
+            'count': len(self.titles),
+            'size': self.size
+            })
+
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                fh.write(header.encode('utf-8') + b'\n')
+                fh.write(self.offsets.tobytes())
+                fh.write('\n'.join(self.titles).encode('utf-8'))
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def select(self, shard:tuple=None, titles:list=None, start:int=0):
+        '''
+        Selects wordpacks by their position in the file
+
+        Shards are consecutive runs of wordpacks of about the same number of wordpacks, so the
+        outputs of shards 1 to N concatenated in order are the output of the whole file.
+
+        Arguments:
+            shard {tuple} -- The number of the shard, from 1, and the number of shards, or None for every wordpack
+            titles {list} -- Only select the wordpacks with one of these titles, or None for every wordpack
+            start {int} -- Only select the wordpacks from this position, e.g. to resume an interrupted run
+
+        Returns:
+            range|list -- The positions of the selected wordpacks in ascending order
+        '''
+        positions = range(len(self.titles))
+        if shard is not None:
+            number, count = shard
+            positions = range(len(self.titles) * (number - 1) // count, len(self.titles) * number // count)
+        positions = positions[max(start - positions.start, 0):]
+
+        if titles is not None:
+            wanted = set(titles)
+            missing = wanted.difference(self.titles)
+            if missing:
+                logger.warning("No wordpack titled %s in wordpack file %s",
+                               ', '.join(f"'{title}'" for title in sorted(missing)), self.wordpacks_file)
+            positions = [position for position in positions if self.titles[position] in wanted]
+
+        return positions
+
+    def generate_wordpacks(self, positions, term_format:str='^@ ANT-([^=]+) =', wordlist_format:str='= (.+)( · )?$',
+                           wordlist_delim:str=' · ', on_read:callable=None):
+        '''
+        A generator function that seeks to the wordpacks at the selected positions and parses them
+        the same way as generate_wordpacks
+
+        Arguments:
+            positions {iterable} -- The positions of the wordpacks in ascending order, e.g. as returned by select
+            on_read {Callable} -- Called with the position of each wordpack before it is yielded
+
+        Yields:
+            tuple(str, dict) -- A tuple of the Wordpack title and a dictionary of grouped terms where the key is the base term
+        '''
+        wordpack_title_re = re.compile(self.wordpack_title_format)
+        with open_binary(self.wordpacks_file) as fh:
+            for start, stop in _get_runs(positions):
+                fh.seek(self.offsets[start])
+                end = self.offsets[stop] if stop < len(self.offsets) else self.size
+                lines = io.TextIOWrapper(io.BufferedReader(_RangeReader(fh, end - self.offsets[start]),
+                                                           DEFAULT_BLOCK_SIZE))
+
+                # Parse the lines of each wordpack of the run separately to know its position
+                position = start - 1
+                wordpack_lines = []
+                for line in lines:
+                    if wordpack_title_re.search(line) is not None:
+                        yield from self._parse(position, wordpack_lines, term_format, wordlist_format,
+                                               wordlist_delim, on_read)
+                        position += 1
+                        wordpack_lines = []
+                    wordpack_lines.append(line)
+                yield from self._parse(position, wordpack_lines, term_format, wordlist_format, wordlist_delim,
+                                       on_read)
+
+    def _parse(self, position, lines, term_format, wordlist_format, wordlist_delim, on_read):
+        for wordpack_title, wordpack_dict in parse_wordpacks(lines, self.wordpack_title_format, term_format,
+                                                             wordlist_format, wordlist_delim):
+            if on_read is not None:
+                on_read(position)
+            yield wordpack_title, wordpack_dict
+
+class ResumeCheckpoint:
+    """Records how far an output file was written so that an interrupted run resumes after the
+    last wordpack written instead of starting over
+
+    The checkpoint is a file next to the output file holding the size of the output file and
+    the position of the next wordpack in the wordpack index. It is saved each time the writer
+    flushes and is discarded when its key changes, i.e. when the wordpacks file, the word
+    relations file or the settings changed, or when the output file is shorter than recorded.
+    """
+    def __init__(self, output_file:str, key:str):
+        '''
+        Arguments:
+            output_file {str} -- The output file the wordpacks are written to
+            key {str} -- Identifies the files and settings the output is written with, see get_state_key
+        '''
+        self.output_file = output_file
+        self.path = output_file + CHECKPOINT_SUFFIX
+        self.key = key
+        checkpoint = self._read()
+        # Position of the first wordpack to detect and size of the output file written so far, if any
+        self.start = checkpoint.get('next', 0)
+        self.output_size = checkpoint.get('output_size')
+        self._next = self.start
+        self._pending = deque()
+
+    def open_output(self):
+        '''
+        Returns:
+            file -- The output file opened for writing after the last wordpack written, or truncated if there is none
+        '''
+        if self.output_size is None:
+            return open(self.output_file, 'w+')
+
+        fh = open(self.output_file, 'r+')
+        fh.truncate(self.output_size)
+        fh.seek(self.output_size)
+        return fh
+
+    def track(self, position:int):
+        '''Records the position of a wordpack handed to the detection, see WordpackIndex.generate_wordpacks'''
+        self._pending.append(position)
+
+    def written(self, count:int=1):
+        '''Records that the oldest wordpacks handed to the detection were written to the output file'''
+        for _ in range(count):
+            self._next = self._pending.popleft() + 1
+
+    def save(self, fh, written:int=0):
+        '''
+        Records the wordpacks written to an output file object once it is flushed. It is replaced atomically
+
+        Arguments:
+            written {int} -- Number of wordpacks written since the last call, see WordpackWriter's on_flush
+        '''
+        self.written(written)
+        fh.flush()
+        checkpoint = {'version': CHECKPOINT_FORMAT_VERSION, 'key': self.key, 'next': self._next,
+                      'output_size': fh.tell()}
+
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as tmp_fh:
+                json.dump(checkpoint, tmp_fh)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def remove(self):
+        '''Removes the checkpoint once every wordpack was written'''
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def _read(self):
+        try:
+            with open(self.path, 'r') as fh:
+                checkpoint = json.load(fh)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable checkpoint %s: %s", self.path, e)
+            return {}
+
+        if not isinstance(checkpoint, dict) or checkpoint.get('version') != CHECKPOINT_FORMAT_VERSION:
+            logger.info("Ignoring checkpoint %s written by another version", self.path)
+            return {}
+        if checkpoint.get('key') != self.key:
+            logger.info("Files or settings changed since checkpoint %s was written - starting over", self.path)
+            return {}
+
+        try:
+            if os.path.getsize(self.output_file) < checkpoint.get('output_size', 0):
+                logger.info("Output file %s is shorter than recorded by checkpoint %s - starting over",
+                            self.output_file, self.path)
+                return {}
+        except FileNotFoundError:
+            logger.info("Output file %s of checkpoint %s is missing - starting over", self.output_file, self.path)
+            return {}
+
+        logger.info("Resuming from wordpack %d of checkpoint %s", checkpoint.get('next', 0), self.path)
+        return checkpoint
+
+def get_index_path(cache_dir:str, wordpacks_file:str, wordpack_title_format:str=DEFAULT_WORDPACK_TITLE_FORMAT):
+    '''
+    Returns:
+        str -- Path of the index file of a wordpacks file in the cache directory
+    '''
+    settings = json.dumps({
+        'version': INDEX_FORMAT_VERSION,
+        'file': os.path.abspath(wordpacks_file),
+        'wordpack_title_format': wordpack_title_format
+        }, sort_keys=True)
+
+    return os.path.join(cache_dir, hashlib.sha256(settings.encode('utf-8')).hexdigest() + '.wpindex')
+
+def parse_shard(value:str):
+    '''
+    Parses a shard given as its number, from 1, and the number of shards, e.g. 2/4
+
+    Returns:
+        tuple(int, int) -- The number of the shard and the number of shards
+    '''
+    number, _, count = value.partition('/')
+    number, count = int(number), int(count)
+    if not 1 <= number <= count:
+        raise ValueError(f"Shard {value} is not between 1/{count} and {count}/{count}")
+
+    return number, count
+
+def _get_runs(positions):
+    # Runs of consecutive positions as (first, after last) tuples
+    start = stop = None
+    for position in positions:
+        if position != stop:
+            if start is not None:
+                yield start, stop
+            start = position
+        stop = position + 1
+    if start is not None:
+        yield start, stop
+
+class _RangeReader(io.RawIOBase):
+    """Reads at most a number of bytes from a binary file object, from its current position
+    """
+    def __init__(self, fh, length:int):
+        self._fh = fh
+        self._remaining = length
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._fh.read(min(len(buffer), self._remaining))
+        buffer[:len(data)] = data
+        self._remaining -= len(data)
+
+        return len(data)
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+
+from collections import deque
+import logging
+import multiprocessing
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNKSIZE = 64
+
+# Detection function inherited by the forked worker processes
+_detect = None
+
+def detect_wordpacks(detect:callable, wordpacks, workers:int=1, chunksize:int=DEFAULT_CHUNKSIZE, stats=None):
+    '''
+    A generator function that runs a detection function on each wordpack and yields the
+    results in the order of the wordpacks, in a DetectionPool created for them
+
+    Arguments:
+        detect {Callable} -- Function called with a wordpack dictionary that returns its ambiguities
+        wordpacks {iterable} -- Tuples of the wordpack title and its dictionary, as yielded by generate_wordpacks
+        workers {int} -- Number of worker processes
+        chunksize {int} -- Number of wordpacks sent to a worker at once
+        stats {RunStats} -- Records the detection latency of each wordpack, measured where it was detected
+
+    Yields:
+        tuple(str, dict, dict) -- The wordpack title, its dictionary and the result of the detection function
+    '''
+    with DetectionPool(detect, workers) as pool:
+        yield from pool.detect_wordpacks(wordpacks, chunksize, stats)
+
+class DetectionPool:
+    """Runs a detection function on wordpacks in a pool of worker processes
+
+    The workers are forked from the parent process when the pool is entered, so they inherit
+    the detection function and the graphs it reads (memory-mapped graphs are shared rather
+    than copied) and only the wordpacks and the detection results are sent between processes.
+    The pool must be entered before the run starts any other thread, e.g. the thread of a
+    BackgroundWriter, since forking a process with several threads is unsafe and deprecated
+    since Python 3.12. With a single worker, the wordpacks are detected in the parent process.
+    """
+    def __init__(self, detect:callable, workers:int=1):
+        '''
+        Arguments:
+            detect {Callable} -- Function called with a wordpack dictionary that returns its ambiguities
+            workers {int} -- Number of worker processes
+        '''
+        if workers > 1 and 'fork' not in multiprocessing.get_all_start_methods():
+            logger.warning("Worker processes require the fork start method - detecting wordpacks in a single process")
+            workers = 1
+
+        self.detect = detect
+        self.workers = workers
+        self._pool = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def open(self):
+        '''Forks the worker processes'''
+        global _detect
+        if self.workers <= 1 or self._pool is not None:
+            return
+
+        _detect = self.detect
+        try:
+            self._pool = multiprocessing.get_context('fork').Pool(self.workers)
+        except BaseException:
+            _detect = None
+            raise
+
+    def close(self):
+        '''Stops the worker processes'''
+        global _detect
+        try:
+            if self._pool is not None:
+                self._pool.terminate()
+        finally:
+            self._pool = None
+            _detect = None
+
+    def detect_wordpacks(self, wordpacks, chunksize:int=DEFAULT_CHUNKSIZE, stats=None):
+        '''
+        A generator function that runs the detection function on each wordpack and yields the
+        results in the order of the wordpacks, see detect_wordpacks
+        '''
+        if self._pool is None:
+            for wordpack_title, wordpack_dict in wordpacks:
+                result, seconds = _timed(self.detect, wordpack_dict)
+                if stats is not None:
+                    stats.record_latency(seconds)
+                yield wordpack_title, wordpack_dict, result
+            return
+
+        # Wordpacks handed to the pool, in order, waiting for their result
+        pending = deque()
+        def submit():
+            for wordpack in wordpacks:
+                pending.append(wordpack)
+                yield wordpack[1]
+
+        for result, seconds in self._pool.imap(_detect_wordpack, submit(), chunksize):
+            wordpack_title, wordpack_dict = pending.popleft()
+            if stats is not None:
+                stats.record_latency(seconds)
+            yield wordpack_title, wordpack_dict, result
+
+def _detect_wordpack(wordpack_dict):
+    return _timed(_detect, wordpack_dict)
+
+def _timed(detect, wordpack_dict):
+    start = time.perf_counter()
+    result = detect(wordpack_dict)
+    return result, time.perf_counter() - start